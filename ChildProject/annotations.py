@@ -1,19 +1,47 @@
+import copy
 import datetime
-import multiprocessing as mp
+import hashlib
+import json
 import numpy as np
 import os
 import pandas as pd
-from functools import reduce, partial
+from functools import reduce
+from io import BytesIO
 from shutil import move, rmtree
 import sys
 import traceback
-from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple, Union
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Set, Tuple, Union
 
 from . import __version__
+from . import cache
 from .projects import ChildProject
 from .converters import *
-from .tables import IndexTable, IndexColumn, assert_dataframe, assert_columns_presence
-from .utils import Segment, intersect_ranges, path_is_parent
+from .storage import (
+    CONSOLIDATED_STORE,
+    SEGMENTS_FORMATS,
+    SegmentsStore,
+    read_columns,
+    read_segments,
+    segments_format,
+    write_segments,
+)
+from .tables import (
+    IndexTable,
+    IndexColumn,
+    NA_VALUES,
+    assert_dataframe,
+    assert_columns_presence,
+    compact_dtypes,
+)
+from .locks import LockManager, append_atomic
+from .intervals import (
+    IntervalIndex,
+    IntervalSet,
+    keyed_intersection,
+    overlapping_pairs,
+)
+from .parallel import Executor, TaskError, report_errors
+from .utils import SegmentsCache, path_is_parent
 
 
 class AnnotationManager:
@@ -111,54 +139,74 @@ class AnnotationManager:
             required=True,
         ),
         IndexColumn(
-            name="speaker_id", description="identity of speaker in the annotation"
+            name="speaker_id",
+            description="identity of speaker in the annotation",
+            dtype="str",
         ),
         IndexColumn(
             name="speaker_type",
             description="class of speaker (FEM = female adult, MAL = male adult, CHI = key child, OCH = other child)",
             choices=["FEM", "MAL", "CHI", "OCH", "NA"],
+            dtype="str",
         ),
         IndexColumn(
             name="ling_type",
             description="1 if the vocalization contains at least a vowel (ie canonical or non-canonical), 0 if crying or laughing",
             choices=["1", "0", "NA"],
+            dtype="str",
         ),
         IndexColumn(
             name="vcm_type",
             description="vocal maturity defined as: C (canonical), N (non-canonical), Y (crying) L (laughing), J (junk)",
             choices=["C", "N", "Y", "L", "J", "NA"],
+            dtype="str",
         ),
         IndexColumn(
             name="lex_type",
             description="W if meaningful, 0 otherwise",
             choices=["W", "0", "NA"],
+            dtype="str",
         ),
         IndexColumn(
             name="mwu_type",
             description="M if multiword, 1 if single word -- only filled if lex_type==W",
             choices=["M", "1", "NA"],
+            dtype="str",
         ),
         IndexColumn(
             name="msc_type",
             description="morphosyntactical complexity of the utterances defined as: 0 (0 meaningful word), 1 (1 meaningful word), S (simple utterance), C (complex utterance)",
             choices=["0", "1", "S", "C"],
+            dtype="str",
         ),
         IndexColumn(
             name="addressee",
             description="T if target-child-directed, C if other-child-directed, A if adult-directed, U if uncertain or other. Multiple values should be sorted and separated by commas",
             choices=["T", "C", "A", "U", "NA"],
+            dtype="str",
         ),
         IndexColumn(
-            name="transcription", description="orthographic transcription of the speach"
+            name="transcription",
+            description="orthographic transcription of the speach",
+            dtype="str",
         ),
         IndexColumn(
-            name="phonemes", description="amount of phonemes", regex=r"(\d+(\.\d+)?)"
+            name="phonemes",
+            description="amount of phonemes",
+            regex=r"(\d+(\.\d+)?)",
+            dtype="float",
         ),
         IndexColumn(
-            name="syllables", description="amount of syllables", regex=r"(\d+(\.\d+)?)"
+            name="syllables",
+            description="amount of syllables",
+            regex=r"(\d+(\.\d+)?)",
+            dtype="float",
         ),
         IndexColumn(
-            name="words", description="amount of words", regex=r"(\d+(\.\d+)?)"
+            name="words",
+            description="amount of words",
+            regex=r"(\d+(\.\d+)?)",
+            dtype="float",
         ),
         IndexColumn(
             name="lena_block_type",
@@ -183,31 +231,37 @@ class AnnotationManager:
                 "XIC",
                 "XIOCAC",
             ],
+            dtype="str",
         ),
         IndexColumn(
             name="lena_block_number",
             description="number of the LENA pause/conversation the segment belongs to",
             regex=r"(\d+(\.\d+)?)",
+            dtype="float",
         ),
         IndexColumn(
             name="lena_conv_status",
             description="LENA conversation status",
             choices=["BC", "RC", "EC"],
+            dtype="str",
         ),
         IndexColumn(
             name="lena_response_count",
             description="LENA turn count within block",
             regex=r"(\d+(\.\d+)?)",
+            dtype="float",
         ),
         IndexColumn(
             name="lena_conv_floor_type",
             description="(FI): Floor Initiation, (FH): Floor Holding",
             choices=["FI", "FH"],
+            dtype="str",
         ),
         IndexColumn(
             name="lena_conv_turn_type",
             description="LENA turn type",
             choices=["TIFI", "TIMI", "TIFR", "TIMR", "TIFE", "TIME", "NT"],
+            dtype="str",
         ),
         IndexColumn(
             name="lena_speaker",
@@ -229,70 +283,190 @@ class AnnotationManager:
                 "MAN",
                 "FAF",
             ],
+            dtype="str",
         ),
         IndexColumn(
             name="utterances_count",
             description="utterances count",
             regex=r"(\d+(\.\d+)?)",
+            dtype="float",
         ),
         IndexColumn(
-            name="utterances_length", description="utterances length", regex=r"([0-9]+)"
+            name="utterances_length",
+            description="utterances length",
+            regex=r"([0-9]+)",
+            dtype="float",
         ),
         IndexColumn(
-            name="non_speech_length", description="non-speech length", regex=r"([0-9]+)"
+            name="non_speech_length",
+            description="non-speech length",
+            regex=r"([0-9]+)",
+            dtype="float",
         ),
         IndexColumn(
             name="average_db",
             description="average dB level",
             regex=r"(\-?)(\d+(\.\d+)?)",
+            dtype="float",
+        ),
+        IndexColumn(
+            name="peak_db",
+            description="peak dB level",
+            regex=r"(\-?)(\d+(\.\d+)?)",
+            dtype="float",
+        ),
+        IndexColumn(
+            name="child_cry_vfx_len",
+            description="childCryVfxLen",
+            regex=r"([0-9]+)",
+            dtype="float",
+        ),
+        IndexColumn(
+            name="utterances", description="LENA utterances details (json)", dtype="str"
         ),
+        IndexColumn(name="cries", description="cries (json)", dtype="str"),
+        IndexColumn(name="vfxs", description="Vfx (json)", dtype="str"),
         IndexColumn(
-            name="peak_db", description="peak dB level", regex=r"(\-?)(\d+(\.\d+)?)"
+            name="cries_count",
+            description="amount of cries (length of cries)",
+            regex=r"([0-9]+)",
+            dtype="float",
         ),
         IndexColumn(
-            name="child_cry_vfx_len", description="childCryVfxLen", regex=r"([0-9]+)"
+            name="vfxs_count",
+            description="amount of Vfx (length of vfxs)",
+            regex=r"([0-9]+)",
+            dtype="float",
         ),
-        IndexColumn(name="utterances", description="LENA utterances details (json)"),
-        IndexColumn(name="cries", description="cries (json)"),
-        IndexColumn(name="vfxs", description="Vfx (json)"),
     ]
 
-    def __init__(self, project: ChildProject):
+    # millisecond timestamps of the index of annotations and of the segments
+    TIMESTAMP_COLUMNS = [
+        "time_seek",
+        "range_onset",
+        "range_offset",
+        "segment_onset",
+        "segment_offset",
+    ]
+
+    # columns of the index of annotations which values are shared by many annotations
+    COMPACT_INDEX_COLUMNS = [
+        "set",
+        "recording_filename",
+        "raw_filename",
+        "format",
+        "filter",
+        "imported_at",
+        "package_version",
+        "error",
+        "merged_from",
+    ]
+
+    INDEX_PATH = "metadata/annotations.csv"
+    # rows added to the index but not yet merged into INDEX_PATH (see import_annotations)
+    JOURNAL_PATH = "metadata/annotations.journal.csv"
+
+    def __init__(self, project: ChildProject, cache_size: int = 256 * 1024 ** 2):
         """AnnotationManager constructor
 
         :param project: :class:`ChildProject` instance of the target dataset.
         :type project: :class:`ChildProject`
+        :param cache_size: maximum memory footprint (in bytes) of the cache of converted annotations read by :meth:`get_segments`. 0 disables the cache. Defaults to 256 MB.
+        :type cache_size: int, optional
         """
         self.project = project
         self.annotations = None
+        # state of the index and its journal on disk when they were last read
+        self._generation = None
         self.errors = []
+        self.segments_cache = SegmentsCache(cache_size)
+        # {set: (state of the store on disk, converted annotations it holds)}
+        self._store_indexes = {}
 
         if not isinstance(project, ChildProject):
             raise ValueError("project should derive from ChildProject")
 
+        self.locks = LockManager(self.project.path)
+
         self.project.read()
 
-        index_path = os.path.join(self.project.path, "metadata/annotations.csv")
+        index_path = os.path.join(self.project.path, self.INDEX_PATH)
         if not os.path.exists(index_path):
-            open(index_path, "w+").write(",".join([c.name for c in self.INDEX_COLUMNS]))
+
+            def write(path):
+                with open(path, "w+") as f:
+                    f.write(",".join([c.name for c in self.INDEX_COLUMNS]))
+
+            with self._lock_index():
+                if not os.path.exists(index_path):
+                    cache.write_atomic(index_path, write)
 
         self.errors, self.warnings = self.read()
 
-    def read(self) -> Tuple[List[str], List[str]]:
-        """Read the index of annotations from ``metadata/annotations.csv`` and store it into
-        self.annotations.
+    @property
+    def annotations(self) -> pd.DataFrame:
+        """Index of annotations (see :ref:`format-annotations`)."""
+        return self._annotations
+
+    @annotations.setter
+    def annotations(self, annotations: pd.DataFrame):
+        self._annotations = annotations
+        self._interval_index = None
+
+    @property
+    def interval_index(self) -> IntervalIndex:
+        """Interval index of the annotations, grouped by recording and set.
+        It is built upon first use and dropped whenever ``annotations`` is replaced
+        or written, so in-place modifications of the index of annotations
+        must be followed by :meth:`write` (or a new assignment) to be taken into account.
+        """
+        if self._interval_index is None:
+            self._interval_index = IntervalIndex(
+                self._annotations, ["recording_filename", "set"]
+            )
+
+        return self._interval_index
 
+    def _lock_index(self, shared: bool = False):
+        return self.locks.index(shared)
 
+    def read(self, compact: bool = False) -> Tuple[List[str], List[str]]:
+        """Read the index of annotations from ``metadata/annotations.csv``
+        (and the rows of ``metadata/annotations.journal.csv`` that have not been merged into it yet)
+        and store it into self.annotations.
+
+        :param compact: store repeated values (e.g. sets and recordings) as categories and timestamps as int32 where possible, in order to save memory. Defaults to False.
+        :type compact: bool, optional
         :return: a tuple containing the list of errors and the list of warnings generated while reading the index
         :rtype: Tuple[List[str],List[str]]
         """
-        table = IndexTable(
-            "input",
-            path=os.path.join(self.project.path, "metadata/annotations.csv"),
-            columns=self.INDEX_COLUMNS,
-        )
-        self.annotations = table.read()
-        errors, warnings = table.validate()
+        with self._lock_index(shared=True):
+            table = IndexTable(
+                "input",
+                path=os.path.join(self.project.path, self.INDEX_PATH),
+                columns=self.INDEX_COLUMNS,
+            )
+            annotations = table.read()
+            errors, warnings = table.validate()
+
+            # updates are excluded by the lock of the index
+            self._generation = self._index_generation()
+
+            journal_path = os.path.join(self.project.path, self.JOURNAL_PATH)
+            if os.path.exists(journal_path):
+                journal = IndexTable(
+                    "input", path=journal_path, columns=self.INDEX_COLUMNS
+                )
+                journal.read()
+                journal_errors, journal_warnings = journal.validate()
+                errors += journal_errors
+                warnings += journal_warnings
+
+                # rows of the journal follow those of the index
+                journal.df.index = journal.df.index + len(annotations)
+                annotations = pd.concat([annotations, journal.df], sort=False)
+
+        self.annotations = annotations
 
         duplicates = self.annotations.groupby(["set", "annotation_filename"]).agg(
             count=("range_offset", "count")
@@ -309,6 +483,14 @@ class AnnotationManager:
                 ]
             )
 
+        if compact:
+            self.annotations = compact_dtypes(
+                self.annotations,
+                self.INDEX_COLUMNS,
+                categorical=self.COMPACT_INDEX_COLUMNS,
+                timestamps=self.TIMESTAMP_COLUMNS,
+            )
+
         return errors, warnings
 
     def validate_annotation(self, annotation: dict) -> Tuple[List[str], List[str]]:
@@ -331,7 +513,18 @@ class AnnotationManager:
         )
 
         try:
-            segments.read()
+            if os.path.exists(segments.path) or not self.is_consolidated(
+                annotation["set"]
+            ):
+                segments.read()
+            else:
+                with SegmentsStore(self._store_path(annotation["set"])) as store:
+                    segments.df = store.read(
+                        annotation["annotation_filename"],
+                        keep_default_na=False,
+                        na_values=NA_VALUES,
+                    )
+                segments.df.index = segments.df.index + 2
         except Exception as e:
             error_message = "error while trying to read {} from {}:\n\t{}".format(
                 annotation["annotation_filename"], annotation["set"], str(e)
@@ -340,8 +533,88 @@ class AnnotationManager:
 
         return segments.validate()
 
+    def _converted_source(self, annotation: dict) -> str:
+        # file the converted annotation is actually read from
+        path = os.path.join(
+            self.project.path,
+            "annotations",
+            annotation["set"],
+            "converted",
+            str(annotation["annotation_filename"]),
+        )
+
+        if os.path.exists(path) or not self.is_consolidated(annotation["set"]):
+            return path
+
+        return self._store_path(annotation["set"])
+
+    def _validator_version(self) -> str:
+        specs = [
+            (
+                c.name,
+                c.required,
+                c.regex,
+                c.choices,
+                c.datetime,
+                getattr(c.function, "__qualname__", None),
+            )
+            for c in self.SEGMENTS_COLUMNS
+        ]
+        return "{}:{}".format(
+            __version__, hashlib.sha1(repr(specs).encode("utf-8")).hexdigest()
+        )
+
+    def _fingerprint(self, annotation: dict, previous: dict = None) -> dict:
+        """size, mtime and content hash of the file a converted annotation is read from.
+        The content hash of ``previous`` is reused if neither the size nor the mtime changed.
+        """
+        path = self._converted_source(annotation)
+
+        if not os.path.exists(path):
+            return None
+
+        stat = os.stat(path)
+        fingerprint = {
+            "path": os.path.relpath(path, self.project.path),
+            "size": stat.st_size,
+            "mtime": stat.st_mtime_ns,
+        }
+
+        if (
+            previous
+            and previous["path"] == fingerprint["path"]
+            and previous["size"] == fingerprint["size"]
+            and previous["mtime"] == fingerprint["mtime"]
+        ):
+            fingerprint["hash"] = previous["hash"]
+        else:
+            fingerprint["hash"] = cache.hash_files([path])
+
+        return fingerprint
+
+    @staticmethod
+    def _task_error(error: TaskError) -> List[str]:
+        """validation errors reporting a failed task"""
+        return [
+            "error while validating {}/{}:\n\t{}".format(
+                error.task["set"], error.task["annotation_filename"], error
+            )
+        ]
+
+    def _validate_with_fingerprint(self, annotation: dict) -> tuple:
+        # the fingerprint is taken before validating, so that
+        # later modifications are detected by the next run
+        fingerprint = self._fingerprint(annotation)
+        errors, warnings = self.validate_annotation(annotation)
+        return errors, warnings, fingerprint
+
     def validate(
-        self, annotations: pd.DataFrame = None, threads: int = 0
+        self,
+        annotations: pd.DataFrame = None,
+        threads: int = 0,
+        incremental: bool = False,
+        backend: str = None,
+        chunksize: int = None,
     ) -> Tuple[List[str], List[str]]:
         """check all indexed annotations for errors
 
@@ -349,6 +622,12 @@ class AnnotationManager:
         :type annotations: pd.DataFrame, optional
         :param threads: how many threads to run the tests with, defaults to 0. If <= 0, all available CPU cores will be used.
         :type threads: int, optional
+        :param backend: how to run the tests (serial, thread or process), defaults to None (see :class:`~ChildProject.parallel.Executor`)
+        :type backend: str, optional
+        :param chunksize: amount of annotations sent to a worker at once, defaults to None
+        :type chunksize: int, optional
+        :param incremental: only validate converted annotations that changed since they last passed validation, defaults to False. Results are recorded in ``.childproject/cache/validation.json``.
+        :type incremental: bool, optional
         :return: a tuple containg the list of errors and the list of warnings detected
         :rtype: Tuple[List[str], List[str]]
         """
@@ -358,13 +637,95 @@ class AnnotationManager:
             assert_dataframe("annotations", annotations)
 
         annotations = annotations.dropna(subset=["annotation_filename"])
+        annotations = annotations.to_dict(orient="records")
+
+        if not incremental:
+            with Executor(
+                threads, backend, chunksize, target=self._worker_copy()
+            ) as executor:
+                res = executor.map(
+                    "validate_annotation", annotations, capture_errors=True
+                )
+
+            res = [
+                (self._task_error(r), []) if isinstance(r, TaskError) else r
+                for r in res
+            ]
 
-        errors, warnings = [], []
+            errors = reduce(lambda x, y: x + y[0], res, [])
+            warnings = reduce(lambda x, y: x + y[1], res, [])
 
-        with mp.Pool(processes=threads if threads > 0 else mp.cpu_count()) as pool:
-            res = pool.map(
-                self.validate_annotation, annotations.to_dict(orient="records")
+            return errors, warnings
+
+        manifest_path = cache.cache_path(self.project.path, "validation.json")
+        try:
+            with open(manifest_path, "r") as f:
+                manifest = json.load(f)
+        except (OSError, ValueError):
+            manifest = {}
+
+        validator = self._validator_version()
+
+        res = [None] * len(annotations)
+        pending = []
+        for i, annotation in enumerate(annotations):
+            key = "{}/{}".format(annotation["set"], annotation["annotation_filename"])
+            entry = manifest.get(key)
+
+            if entry is not None and entry["validator"] == validator:
+                fingerprint = self._fingerprint(annotation, entry)
+                if fingerprint and fingerprint["hash"] == entry["hash"]:
+                    entry.update(fingerprint)
+                    res[i] = ([], entry["warnings"])
+                    continue
+
+            pending.append(i)
+
+        print(
+            "{} annotation(s) unchanged since their last validation".format(
+                len(annotations) - len(pending)
             )
+        )
+
+        if pending:
+            with Executor(
+                threads, backend, chunksize, target=self._worker_copy()
+            ) as executor:
+                validated = executor.map(
+                    "_validate_with_fingerprint",
+                    [annotations[i] for i in pending],
+                    capture_errors=True,
+                )
+
+            validated = [
+                (self._task_error(r), [], None) if isinstance(r, TaskError) else r
+                for r in validated
+            ]
+
+            for i, (errors, warnings, fingerprint) in zip(pending, validated):
+                res[i] = (errors, warnings)
+
+                annotation = annotations[i]
+                key = "{}/{}".format(annotation["set"], annotation["annotation_filename"])
+
+                # only successful validations are recorded
+                if errors or fingerprint is None:
+                    manifest.pop(key, None)
+                    continue
+
+                manifest[key] = dict(
+                    fingerprint, validator=validator, warnings=warnings
+                )
+
+        def write(path):
+            with open(path, "w") as f:
+                json.dump(manifest, f)
+
+        if cache.writable(self.project.path):
+            try:
+                cache.write_atomic(manifest_path, write)
+            except OSError:
+                pass
 
         errors = reduce(lambda x, y: x + y[0], res, [])
         warnings = reduce(lambda x, y: x + y[1], res, [])
@@ -374,19 +735,341 @@ class AnnotationManager:
     def write(self):
         """Update the annotations index,
         while enforcing its good shape.
+        The index is replaced atomically, and the journal (see :meth:`import_annotations`)
+        is merged into it: rows that were appended to the journal since
+        the index was read (e.g. by other processes) are added to ``self.annotations``.
+
+        :raises RuntimeError: if the index was otherwise updated since it was read
+            (e.g. by :meth:`compact_index` in another process); it must then be read again.
+        """
+        with self._lock_index():
+            self._sync_journal()
+
+            self.annotations[["time_seek", "range_onset", "range_offset"]].fillna(
+                0, inplace=True
+            )
+            self.annotations[
+                ["time_seek", "range_onset", "range_offset"]
+            ] = self.annotations[["time_seek", "range_onset", "range_offset"]].astype(
+                int
+            )
+
+            cache.write_atomic(
+                os.path.join(self.project.path, self.INDEX_PATH),
+                lambda path: self.annotations.to_csv(path, index=False),
+            )
+
+            journal_path = os.path.join(self.project.path, self.JOURNAL_PATH)
+            if os.path.exists(journal_path):
+                os.remove(journal_path)
+            self._generation = self._index_generation()
+
+        self._interval_index = None
+
+    def _index_generation(self) -> tuple:
+        """inode, modification time and size of the index and of its journal
+        (None for files that do not exist)"""
+
+        def generation(path):
+            try:
+                stat = os.stat(os.path.join(self.project.path, path))
+            except FileNotFoundError:
+                return None
+
+            return stat.st_ino, stat.st_mtime_ns, stat.st_size
+
+        return generation(self.INDEX_PATH), generation(self.JOURNAL_PATH)
+
+    def _sync_journal(self, reread: bool = False):
+        """Add the rows appended to the journal since the index was read
+        to ``self.annotations``. If the index was otherwise updated meanwhile,
+        it is read again if ``reread`` is True, otherwise a RuntimeError is raised.
+        The lock of the index must be held."""
+        current = self._index_generation()
+        if current == self._generation:
+            return
+
+        index, journal = current
+        previous_index, previous_journal = self._generation or (None, None)
+
+        # the journal is only removed or replaced when the index is rewritten
+        appended = (
+            self._generation is not None
+            and index == previous_index
+            and journal is not None
+            and (
+                previous_journal is None
+                or (
+                    journal[0] == previous_journal[0]
+                    and journal[2] >= previous_journal[2]
+                )
+            )
+        )
+
+        if not appended:
+            if reread:
+                self.read()
+                return
+
+            raise RuntimeError(
+                "the index of annotations was updated by another process "
+                "since it was read; read it again before writing it"
+            )
+
+        offset = previous_journal[2] if previous_journal is not None else 0
+
+        with open(os.path.join(self.project.path, self.JOURNAL_PATH), "rb") as f:
+            header = f.readline()
+            f.seek(max(offset, len(header)))
+            rows = f.read()
+
+        self._generation = current
+        if not rows.strip():
+            return
+
+        appended = pd.read_csv(BytesIO(header + rows))
+        appended.index = appended.index + len(self.annotations)
+        self.annotations = pd.concat([self.annotations, appended], sort=False)
+
+    def _append(self, annotations: pd.DataFrame):
+        """Append annotations to the journal of the index,
+        without reading or rewriting the index itself."""
+        annotations = annotations.reindex(columns=[c.name for c in self.INDEX_COLUMNS])
+        timestamps = ["time_seek", "range_onset", "range_offset"]
+        annotations[timestamps] = annotations[timestamps].fillna(0).astype(int)
+
+        journal_path = os.path.join(self.project.path, self.JOURNAL_PATH)
+
+        with self._lock_index():
+            # rows appended by others are taken in, so that the journal
+            # is entirely part of self.annotations once the new rows are added
+            self._sync_journal(reread=True)
+
+            header = not os.path.exists(journal_path)
+            append_atomic(
+                journal_path,
+                annotations.to_csv(index=False, header=header).encode("utf-8"),
+            )
+            self._generation = self._index_generation()
+
+    def _commit(self, annotations: pd.DataFrame, journal: bool = False):
+        """Add annotations to the index, either by rewriting it
+        or by appending them to its journal."""
+        if journal:
+            self._append(annotations)
+            self.annotations = pd.concat([self.annotations, annotations], sort=False)
+            return
+
+        # no other process may update the index between reading and writing it
+        with self._lock_index():
+            self.read()
+            self.annotations = pd.concat([self.annotations, annotations], sort=False)
+            self.write()
+
+    def compact_index(self):
+        """Merge the rows of the journal ``metadata/annotations.journal.csv``
+        into the index ``metadata/annotations.csv``.
+        """
+        with self._lock_index():
+            self.read()
+            self.write()
+
+    def get_set_format(self, annotation_set: str) -> str:
+        """Retrieve the storage format of the converted annotations of a given set,
+        based on the converted files referenced in the index. Sets that have not been
+        imported yet default to csv.
+
+        :param annotation_set: name of the set
+        :type annotation_set: str
+        :return: storage format (one of ``csv``, ``parquet`` or ``feather``)
+        :rtype: str
         """
-        self.annotations[["time_seek", "range_onset", "range_offset"]].fillna(
-            0, inplace=True
+        annotations = self.annotations[self.annotations["set"] == annotation_set]
+        annotations = annotations.dropna(subset=["annotation_filename"])
+
+        if not len(annotations):
+            return "csv"
+
+        return segments_format(annotations["annotation_filename"].iloc[-1])
+
+    def _store_path(self, annotation_set: str) -> str:
+        return os.path.join(
+            self.project.path,
+            "annotations",
+            annotation_set,
+            "converted",
+            CONSOLIDATED_STORE,
         )
-        self.annotations[
-            ["time_seek", "range_onset", "range_offset"]
-        ] = self.annotations[["time_seek", "range_onset", "range_offset"]].astype(int)
-        self.annotations.to_csv(
-            os.path.join(self.project.path, "metadata/annotations.csv"), index=False
+
+    def is_consolidated(self, annotation_set: str) -> bool:
+        """Whether the converted annotations of a set are stored
+        into a consolidated store (see :meth:`consolidate_set`).
+
+        :param annotation_set: name of the set
+        :type annotation_set: str
+        :rtype: bool
+        """
+        return os.path.exists(self._store_path(annotation_set))
+
+    def converted_exists(self, annotation_set: str, annotation_filename: str) -> bool:
+        """Whether a converted annotation is locally available,
+        either as a standalone file or in the consolidated store of its set.
+
+        :param annotation_set: name of the set
+        :type annotation_set: str
+        :param annotation_filename: converted annotation filename
+        :type annotation_filename: str
+        :rtype: bool
+        """
+        path = os.path.join(
+            self.project.path,
+            "annotations",
+            annotation_set,
+            "converted",
+            annotation_filename,
+        )
+
+        if os.path.exists(path):
+            return True
+
+        return annotation_filename in self._store_index(annotation_set)
+
+    def _store_index(self, annotation_set: str) -> Set[str]:
+        """converted annotations held by the consolidated store of a set
+        (empty if it is not consolidated). The footer of the store is only parsed
+        again if the store was replaced since it was last read."""
+        try:
+            stat = os.stat(self._store_path(annotation_set))
+        except FileNotFoundError:
+            self._store_indexes.pop(annotation_set, None)
+            return set()
+
+        state = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+        cached = self._store_indexes.get(annotation_set)
+        if cached is not None and cached[0] == state:
+            return cached[1]
+
+        with SegmentsStore(self._store_path(annotation_set)) as store:
+            index = set(store.index)
+
+        self._store_indexes[annotation_set] = (state, index)
+        return index
+
+    def _read_converted(
+        self,
+        annotation_set: str,
+        annotations: pd.DataFrame,
+        prune: bool = False,
+        keep_default_na: bool = True,
+        na_values: List[str] = None,
+        cache: bool = False,
+        columns: List[str] = None,
+        dtype: Dict[str, str] = None,
+    ):
+        """iterate over the converted annotations of ``annotations`` (all belonging to ``annotation_set``),
+        opening the consolidated store of the set only once if there is one.
+        Standalone files take precedence over the store. If ``prune`` is True,
+        segments that fall outside of all the ranges of the annotations may be skipped.
+        If ``cache`` is True, segments are retrieved from (and stored into) ``self.segments_cache``
+        whenever it is enabled; they are then shared with the cache and must not be modified.
+        ``columns`` and ``dtype`` restrict the columns that are read and set their types (see :func:`~ChildProject.storage.read_segments`).
+
+        yields tuples of ``(annotation_filename, annotations, segments)``
+        """
+        path = os.path.join(self.project.path, "annotations", annotation_set, "converted")
+
+        store = None
+        if self.is_consolidated(annotation_set):
+            store = SegmentsStore(self._store_path(annotation_set))
+            store.open()
+
+        cache = cache and self.segments_cache.capacity > 0
+        options = (
+            keep_default_na,
+            tuple(na_values) if na_values is not None else None,
+            tuple(columns) if columns is not None else None,
+            tuple(sorted((dtype or {}).items(), key=str)),
+        )
+
+        try:
+            for annotation_filename, _annotations in annotations.groupby(
+                "annotation_filename", observed=True
+            ):
+                filename = os.path.join(path, annotation_filename)
+
+                if store is None or os.path.exists(filename):
+                    load = lambda: read_segments(
+                        filename,
+                        columns=columns,
+                        keep_default_na=keep_default_na,
+                        na_values=na_values,
+                        dtype=dtype,
+                    )
+                    segments = (
+                        self.segments_cache.get(filename, options, load)
+                        if cache
+                        else load()
+                    )
+                elif annotation_filename in store:
+                    # cached entries hold whole annotations so that they can be reused
+                    load = lambda: store.read(
+                        annotation_filename,
+                        columns=columns,
+                        onset=_annotations["range_onset"].min()
+                        if prune and not cache
+                        else None,
+                        offset=_annotations["range_offset"].max()
+                        if prune and not cache
+                        else None,
+                        keep_default_na=keep_default_na,
+                        na_values=na_values,
+                        dtype=dtype,
+                    )
+                    segments = (
+                        self.segments_cache.get(
+                            store.path, (annotation_filename,) + options, load
+                        )
+                        if cache
+                        else load()
+                    )
+                else:
+                    raise FileNotFoundError(
+                        "'{}' could not be found in {} or in {}".format(
+                            annotation_filename, path, CONSOLIDATED_STORE
+                        )
+                    )
+
+                yield annotation_filename, _annotations, segments
+        finally:
+            if store is not None:
+                store.close()
+
+    def _invalidate_set(self, annotation_set: str):
+        self.segments_cache.invalidate(
+            os.path.join(self.project.path, "annotations", annotation_set, "converted")
+        )
+        self._store_indexes.pop(annotation_set, None)
+
+    def _worker_copy(self) -> "AnnotationManager":
+        """lightweight copy of the manager for worker processes,
+        without the index of annotations (which tasks do not need)"""
+        worker = copy.copy(self)
+        worker.annotations = None
+        return worker
+
+    def _write_segments(self, segments: pd.DataFrame, path: str):
+        write_segments(
+            segments,
+            path,
+            categorical=[c.name for c in self.SEGMENTS_COLUMNS if c.choices],
         )
 
     def _import_annotation(
-        self, import_function: Callable[[str], pd.DataFrame], params: dict, annotation: dict
+        self,
+        import_function: Callable[[str], pd.DataFrame],
+        params: dict,
+        output_formats: dict,
+        annotation: dict,
     ):
         """import and convert ``annotation``. This function should not be called outside of this class.
 
@@ -394,6 +1077,8 @@ class AnnotationManager:
         :type import_function: Callable[[str], pd.DataFrame]
         :param params: Optional parameters. With ```new_tiers```, the corresponding EAF tiers will be imported
         :type params: dict
+        :param output_formats: storage format of the converted annotations, for each set
+        :type output_formats: dict
         :param annotation: input annotation dictionary (attributes defined according to :ref:`ChildProject.annotations.AnnotationManager.SEGMENTS_COLUMNS`)
         :type annotation: dict
         :return: output annotation dictionary (attributes defined according to :ref:`ChildProject.annotations.AnnotationManager.SEGMENTS_COLUMNS`)
@@ -401,8 +1086,11 @@ class AnnotationManager:
         """
 
         source_recording = os.path.splitext(annotation["recording_filename"])[0]
-        annotation_filename = "{}_{}_{}.csv".format(
-            source_recording, annotation["range_onset"], annotation["range_offset"]
+        annotation_filename = "{}_{}_{}{}".format(
+            source_recording,
+            annotation["range_onset"],
+            annotation["range_offset"],
+            SEGMENTS_FORMATS[output_formats[annotation["set"]]],
         )
         output_filename = os.path.join(
             "annotations", annotation["set"], "converted", annotation_filename
@@ -472,7 +1160,7 @@ class AnnotationManager:
             os.path.dirname(os.path.join(self.project.path, output_filename)),
             exist_ok=True,
         )
-        df.to_csv(os.path.join(self.project.path, output_filename), index=False)
+        self._write_segments(df, os.path.join(self.project.path, output_filename))
 
         annotation["annotation_filename"] = annotation_filename
         annotation["imported_at"] = datetime.datetime.now().strftime(
@@ -491,17 +1179,29 @@ class AnnotationManager:
         threads: int = -1,
         import_function: Callable[[str], pd.DataFrame] = None,
         new_tiers: list = None,
+        output_format: str = None,
+        backend: str = None,
+        chunksize: int = None,
+        journal: bool = False,
     ) -> pd.DataFrame:
         """Import and convert annotations.
 
         :param input: dataframe of all annotations to import, as described in :ref:`format-input-annotations`.
         :type input: pd.DataFrame
-        :param threads: If > 1, conversions will be run on ``threads`` threads, defaults to -1
+        :param threads: If > 1, conversions will be run on ``threads`` threads, defaults to -1. If <= 0, all available CPU cores will be used.
         :type threads: int, optional
         :param import_function: If specified, the custom ``import_function`` function will be used to convert all ``input`` annotations, defaults to None
         :type import_function: Callable[[str], pd.DataFrame], optional
         :param new_tiers: List of EAF tiers names. If specified, the corresponding EAF tiers will be imported.
         :type new_tiers: list[str], optional
+        :param output_format: storage format of the converted annotations (csv, parquet or feather). If None, the current format of each set is used (csv for new sets), defaults to None
+        :type output_format: str, optional
+        :param backend: how to run the conversions (serial, thread or process), defaults to None (see :class:`~ChildProject.parallel.Executor`)
+        :type backend: str, optional
+        :param chunksize: amount of annotations sent to a worker at once, defaults to None
+        :type chunksize: int, optional
+        :param journal: append the imported annotations to ``metadata/annotations.journal.csv`` instead of rewriting the whole index. The journal is merged into ``metadata/annotations.csv`` on the next update of the index (or with :meth:`compact_index`), and its rows are included by :meth:`read` meanwhile. Defaults to False.
+        :type journal: bool, optional
         :return: dataframe of imported annotations, as in :ref:`format-annotations`.
         :rtype: pd.DataFrame
         """
@@ -532,34 +1232,66 @@ class AnnotationManager:
         input["range_onset"] = input["range_onset"].astype(int)
         input["range_offset"] = input["range_offset"].astype(int)
 
+        if output_format is not None and output_format not in SEGMENTS_FORMATS:
+            raise ValueError(
+                "invalid output format '{}', should be any of: {}".format(
+                    output_format, ",".join(SEGMENTS_FORMATS.keys())
+                )
+            )
+
+        output_formats = {
+            annotation_set: output_format or self.get_set_format(annotation_set)
+            for annotation_set in input["set"].unique()
+        }
+
         builtin = input[input["format"].isin(converters.keys())]
         if not builtin["format"].map(lambda f: converters[f].THREAD_SAFE).all():
             print(
                 "warning: some of the converters do not support multithread importation; running on 1 thread"
             )
             threads = 1
-
-        if threads == 1:
-            imported = input.apply(
-                partial(self._import_annotation, import_function, {"new_tiers": new_tiers}), axis=1
-            ).to_dict(orient="records")
-        else:
-            with mp.Pool(processes=threads if threads > 0 else mp.cpu_count()) as pool:
-                imported = pool.map(
-                    partial(self._import_annotation, import_function, {"new_tiers": new_tiers}),
+            backend = "serial"
+
+        # other processes may import into the same sets meanwhile, but not
+        # rewrite them (see LockManager) until the new annotations are indexed
+        with self.locks.sets(shared=output_formats):
+            with Executor(
+                threads, backend, chunksize, target=self._worker_copy()
+            ) as executor:
+                imported = executor.map(
+                    "_import_annotation",
                     input.to_dict(orient="records"),
+                    import_function,
+                    {"new_tiers": new_tiers},
+                    output_formats,
+                    capture_errors=True,
                 )
 
-        imported = pd.DataFrame(imported)
-        imported.drop(
-            list(set(imported.columns) - {c.name for c in self.INDEX_COLUMNS}),
-            axis=1,
-            inplace=True,
-        )
+            for i, result in enumerate(imported):
+                if isinstance(result, TaskError):
+                    report_errors(
+                        [result],
+                        lambda task: "'{}/{}'".format(
+                            task["set"], task["raw_filename"]
+                        ),
+                    )
+                    imported[i] = dict(result.task, error=result.traceback)
+
+            imported = pd.DataFrame(imported)
+            imported.drop(
+                list(set(imported.columns) - {c.name for c in self.INDEX_COLUMNS}),
+                axis=1,
+                inplace=True,
+            )
+
+            for annotation_set in output_formats:
+                self._invalidate_set(annotation_set)
 
-        self.read()
-        self.annotations = pd.concat([self.annotations, imported], sort=False)
-        self.write()
+            self._commit(imported, journal)
+
+        for annotation_set in output_formats:
+            if self.is_consolidated(annotation_set):
+                self.consolidate_set(annotation_set)
 
         return imported
 
@@ -601,27 +1333,34 @@ class AnnotationManager:
         :param recursive: remove subsets as well, defaults to False
         :type recursive: bool, optional
         """
-        self.read()
+        with self.locks.set(annotation_set):
+            subsets = []
+            if recursive:
+                subsets = self.get_subsets(annotation_set, recursive=False)
 
-        subsets = []
-        if recursive:
-            subsets = self.get_subsets(annotation_set, recursive=False)
+            for subset in subsets:
+                self.remove_set(subset, recursive=recursive)
 
-        for subset in subsets:
-            self.remove_set(subset, recursive=recursive)
+            path = os.path.join(
+                self.project.path, "annotations", annotation_set, "converted"
+            )
 
-        path = os.path.join(
-            self.project.path, "annotations", annotation_set, "converted"
-        )
+            try:
+                rmtree(path)
+            except:
+                print(
+                    "could not delete '{}', as it does not exist (yet?)".format(path)
+                )
+                pass
 
-        try:
-            rmtree(path)
-        except:
-            print("could not delete '{}', as it does not exist (yet?)".format(path))
-            pass
+            self._invalidate_set(annotation_set)
 
-        self.annotations = self.annotations[self.annotations["set"] != annotation_set]
-        self.write()
+            with self._lock_index():
+                self.read()
+                self.annotations = self.annotations[
+                    self.annotations["set"] != annotation_set
+                ]
+                self.write()
 
     def rename_set(
         self,
@@ -642,76 +1381,260 @@ class AnnotationManager:
         :param ignore_errors: If True, keep going even if unindexed files are detected, defaults to False
         :type ignore_errors: bool, optional
         """
-        self.read()
-
         annotation_set = annotation_set.rstrip("/").rstrip("\\")
         new_set = new_set.rstrip("/").rstrip("\\")
 
-        current_path = os.path.join(self.project.path, "annotations", annotation_set)
-        new_path = os.path.join(self.project.path, "annotations", new_set)
+        with self.locks.sets(exclusive=[annotation_set, new_set]):
+            self.read()
 
-        if not os.path.exists(current_path):
-            raise Exception("'{}' does not exists, aborting".format(current_path))
+            current_path = os.path.join(
+                self.project.path, "annotations", annotation_set
+            )
+            new_path = os.path.join(self.project.path, "annotations", new_set)
 
-        if os.path.exists(new_path):
-            raise Exception("'{}' already exists, aborting".format(new_path))
+            if not os.path.exists(current_path):
+                raise Exception("'{}' does not exists, aborting".format(current_path))
 
-        if (
-            self.annotations[self.annotations["set"] == annotation_set].shape[0] == 0
-            and not ignore_errors
-            and not recursive
-        ):
-            raise Exception(
-                "set '{}' have no indexed annotation, aborting. use --ignore_errors to force"
-            )
+            if os.path.exists(new_path):
+                raise Exception("'{}' already exists, aborting".format(new_path))
 
-        subsets = []
-        if recursive:
-            subsets = self.get_subsets(annotation_set, recursive=False)
-
-        for subset in subsets:
-            self.rename_set(
-                annotation_set=subset,
-                new_set=re.sub(
-                    r"^{}/".format(re.escape(annotation_set)),
-                    os.path.join(new_set, ""),
-                    subset,
-                ),
-                recursive=recursive,
-                ignore_errors=ignore_errors,
+            if (
+                self.annotations[self.annotations["set"] == annotation_set].shape[0]
+                == 0
+                and not ignore_errors
+                and not recursive
+            ):
+                raise Exception(
+                    "set '{}' have no indexed annotation, aborting. use --ignore_errors to force"
+                )
+
+            subsets = []
+            if recursive:
+                subsets = self.get_subsets(annotation_set, recursive=False)
+
+            for subset in subsets:
+                self.rename_set(
+                    annotation_set=subset,
+                    new_set=re.sub(
+                        r"^{}/".format(re.escape(annotation_set)),
+                        os.path.join(new_set, ""),
+                        subset,
+                    ),
+                    recursive=recursive,
+                    ignore_errors=ignore_errors,
+                )
+
+            os.makedirs(new_path, exist_ok=True)
+
+            if os.path.exists(os.path.join(current_path, "raw")):
+                move(os.path.join(current_path, "raw"), os.path.join(new_path, "raw"))
+
+            if os.path.exists(os.path.join(current_path, "converted")):
+                move(
+                    os.path.join(current_path, "converted"),
+                    os.path.join(new_path, "converted"),
+                )
+
+            self._invalidate_set(annotation_set)
+            self._invalidate_set(new_set)
+
+            with self._lock_index():
+                self.read()
+                self.annotations.loc[
+                    (self.annotations["set"] == annotation_set), "set"
+                ] = new_set
+                self.write()
+
+    def migrate_set(
+        self, annotation_set: str, output_format: str, recursive: bool = False
+    ):
+        """Convert the converted annotations of a set into another storage format
+        (csv, parquet or feather), replacing the original files and updating the
+        index accordingly.
+
+        :param annotation_set: name of the set to migrate
+        :type annotation_set: str
+        :param output_format: target storage format
+        :type output_format: str
+        :param recursive: migrate subsets as well, defaults to False
+        :type recursive: bool, optional
+        """
+        if output_format not in SEGMENTS_FORMATS:
+            raise ValueError(
+                "invalid output format '{}', should be any of: {}".format(
+                    output_format, ",".join(SEGMENTS_FORMATS.keys())
+                )
             )
 
-        os.makedirs(new_path, exist_ok=True)
+        with self.locks.set(annotation_set):
+            self.read()
+
+            subsets = []
+            if recursive:
+                subsets = self.get_subsets(annotation_set, recursive=False)
+
+            for subset in subsets:
+                self.migrate_set(subset, output_format, recursive=recursive)
 
-        if os.path.exists(os.path.join(current_path, "raw")):
-            move(os.path.join(current_path, "raw"), os.path.join(new_path, "raw"))
+            path = os.path.join(
+                self.project.path, "annotations", annotation_set, "converted"
+            )
 
-        if os.path.exists(os.path.join(current_path, "converted")):
-            move(
-                os.path.join(current_path, "converted"),
-                os.path.join(new_path, "converted"),
+            mask = (self.annotations["set"] == annotation_set) & (
+                ~self.annotations["annotation_filename"].isnull()
             )
 
-        self.annotations.loc[
-            (self.annotations["set"] == annotation_set), "set"
-        ] = new_set
-        self.write()
+            consolidated = self.is_consolidated(annotation_set)
+
+            filenames = {}
+            for annotation_filename, _, segments in self._read_converted(
+                annotation_set,
+                self.annotations[mask],
+                keep_default_na=False,
+                na_values=[""],
+            ):
+                new_filename = (
+                    os.path.splitext(annotation_filename)[0]
+                    + SEGMENTS_FORMATS[output_format]
+                )
+
+                if new_filename == annotation_filename and not consolidated:
+                    continue
+
+                self._write_segments(segments, os.path.join(path, new_filename))
+                filenames[annotation_filename] = new_filename
+
+            if consolidated:
+                os.remove(self._store_path(annotation_set))
+
+            self._invalidate_set(annotation_set)
+
+            filenames = {
+                annotation_filename: new_filename
+                for annotation_filename, new_filename in filenames.items()
+                if annotation_filename != new_filename
+            }
+
+            if not filenames:
+                return
+
+            with self._lock_index():
+                self.read()
+                mask = (self.annotations["set"] == annotation_set) & (
+                    ~self.annotations["annotation_filename"].isnull()
+                )
+                self.annotations.loc[
+                    mask, "annotation_filename"
+                ] = self.annotations.loc[mask, "annotation_filename"].replace(
+                    filenames
+                )
+                self.write()
+
+            for annotation_filename in filenames:
+                os.remove(os.path.join(path, annotation_filename))
+
+    def consolidate_set(self, annotation_set: str, recursive: bool = False):
+        """Gather all the converted annotations of a set into a single parquet store
+        (``annotations/<set>/converted/_consolidated.parquet``) with one row group per
+        converted annotation and an index in its footer. Reading many annotations
+        from a consolidated set requires only one file handle, and only the relevant
+        row groups are loaded. Standalone converted files are removed once they have
+        been added to the store. If the set is already consolidated, the store is
+        rewritten with its annotations copied as is, and only standalone files are read.
+        This requires ``pyarrow``.
+
+        :param annotation_set: name of the set to consolidate
+        :type annotation_set: str
+        :param recursive: consolidate subsets as well, defaults to False
+        :type recursive: bool, optional
+        """
+        with self.locks.set(annotation_set):
+            self.read()
+
+            subsets = []
+            if recursive:
+                subsets = self.get_subsets(annotation_set, recursive=False)
+
+            for subset in subsets:
+                self.consolidate_set(subset, recursive=recursive)
+
+            annotations = self.annotations[
+                (self.annotations["set"] == annotation_set)
+                & (~self.annotations["annotation_filename"].isnull())
+            ]
+
+            if not len(annotations):
+                return
+
+            path = os.path.join(self.project.path, "annotations", annotation_set, "converted")
+            store_path = self._store_path(annotation_set)
+
+            store = None
+            if os.path.exists(store_path):
+                store = SegmentsStore(store_path)
+                store.open()
+
+            columns = []
+            for annotation_filename in annotations["annotation_filename"].unique():
+                filename = os.path.join(path, annotation_filename)
+                if os.path.exists(filename) or store is None:
+                    _columns = read_columns(filename)
+                else:
+                    _columns = store.columns(annotation_filename)
+
+                columns += [column for column in _columns if column not in columns]
+
+            def segments(annotation_filename):
+                filename = os.path.join(path, annotation_filename)
+                if store is not None and not os.path.exists(filename):
+                    # copied from the previous store as is
+                    return None
+
+                return read_segments(filename, keep_default_na=False, na_values=[""])
+
+            try:
+                SegmentsStore.write(
+                    store_path + ".tmp",
+                    columns,
+                    (
+                        (
+                            annotation_filename,
+                            _annotations["recording_filename"].iloc[0],
+                            segments(annotation_filename),
+                        )
+                        for annotation_filename, _annotations in annotations.groupby(
+                            "annotation_filename", sort=False, observed=True
+                        )
+                    ),
+                    source=store,
+                )
+            finally:
+                if store is not None:
+                    store.close()
+
+            os.replace(store_path + ".tmp", store_path)
+            self._invalidate_set(annotation_set)
+
+            for annotation_filename in annotations["annotation_filename"].unique():
+                filename = os.path.join(path, annotation_filename)
+                if os.path.exists(filename):
+                    os.remove(filename)
 
     def merge_annotations(
-        self, left_columns, right_columns, columns, output_set, input
+        self, left_columns, right_columns, columns, output_set, output_format, input
     ):
         left_annotations = input["left_annotations"]
         right_annotations = input["right_annotations"]
 
         annotations = left_annotations.copy()
         annotations["format"] = ""
-        annotations["annotation_filename"] = annotations.apply(
-            lambda annotation: "{}_{}_{}.csv".format(
-                os.path.splitext(annotation["recording_filename"])[0],
-                annotation["range_onset"],
-                annotation["range_offset"],
-            ),
-            axis=1,
+        annotations["annotation_filename"] = (
+            annotations["recording_filename"].map(lambda f: os.path.splitext(f)[0])
+            + "_"
+            + annotations["range_onset"].astype(str)
+            + "_"
+            + annotations["range_offset"].astype(str)
+            + SEGMENTS_FORMATS[output_format]
         )
 
         for key in columns:
@@ -719,7 +1642,7 @@ class AnnotationManager:
 
         annotations["set"] = output_set
 
-        left_annotation_files = [
+        left_missing_annotations = [
             os.path.join(
                 self.project.path,
                 "annotations",
@@ -728,12 +1651,10 @@ class AnnotationManager:
                 a["annotation_filename"],
             )
             for a in left_annotations.to_dict(orient="records")
-        ]
-        left_missing_annotations = [
-            f for f in left_annotation_files if not os.path.exists(f)
+            if not self.converted_exists(a["set"], a["annotation_filename"])
         ]
 
-        right_annotation_files = [
+        right_missing_annotations = [
             os.path.join(
                 self.project.path,
                 "annotations",
@@ -742,9 +1663,7 @@ class AnnotationManager:
                 a["annotation_filename"],
             )
             for a in right_annotations.to_dict(orient="records")
-        ]
-        right_missing_annotations = [
-            f for f in right_annotation_files if not os.path.exists(f)
+            if not self.converted_exists(a["set"], a["annotation_filename"])
         ]
 
         if left_missing_annotations:
@@ -817,41 +1736,26 @@ class AnnotationManager:
 
         output_segments.fillna("NA", inplace=True)
 
+        # split the segments by interval once, and write each annotation as soon as it is ready
+        segments_columns = {c.name for c in self.SEGMENTS_COLUMNS}
+        intervals = output_segments["interval"].to_numpy()
+        output_segments = output_segments[
+            [c for c in output_segments.columns if c in segments_columns]
+        ]
+        by_interval = pd.Series(np.arange(len(intervals))).groupby(intervals).indices
+
         for annotation in annotations.to_dict(orient="records"):
-            interval = annotation["interval"]
-            annotation_filename = annotation["annotation_filename"]
-            annotation_set = annotation["set"]
-
-            os.makedirs(
-                os.path.dirname(
-                    os.path.join(
-                        self.project.path,
-                        "annotations",
-                        annotation_set,
-                        "converted",
-                        annotation_filename,
-                    )
-                ),
-                exist_ok=True,
+            path = os.path.join(
+                self.project.path,
+                "annotations",
+                annotation["set"],
+                "converted",
+                annotation["annotation_filename"],
             )
+            os.makedirs(os.path.dirname(path), exist_ok=True)
 
-            segments = output_segments[output_segments["interval"] == interval]
-            segments.drop(
-                columns=list(
-                    set(segments.columns) - {c.name for c in self.SEGMENTS_COLUMNS}
-                ),
-                inplace=True,
-            )
-            segments.to_csv(
-                os.path.join(
-                    self.project.path,
-                    "annotations",
-                    annotation_set,
-                    "converted",
-                    annotation_filename,
-                ),
-                index=False,
-            )
+            rows = by_interval.get(annotation["interval"], [])
+            self._write_segments(output_segments.iloc[rows], path)
 
         return annotations
 
@@ -864,6 +1768,10 @@ class AnnotationManager:
         output_set: str,
         columns: dict = {},
         threads=-1,
+        output_format: str = None,
+        backend: str = None,
+        chunksize: int = None,
+        journal: bool = False,
     ):
         """Merge columns from ``left_set`` and ``right_set`` annotations, 
         for all matching segments, into a new set of annotations named
@@ -879,6 +1787,16 @@ class AnnotationManager:
         :type right_columns: List
         :param output_set: Name of the output annotations set.
         :type output_set: str
+        :param output_format: storage format of the output set (csv, parquet or feather). If None, the format of ``left_set`` is used, defaults to None
+        :type output_format: str, optional
+        :param threads: amount of recordings to process in parallel, defaults to -1. If <= 0, all available CPU cores will be used.
+        :type threads: int, optional
+        :param backend: how to process the recordings (serial, thread or process), defaults to None (see :class:`~ChildProject.parallel.Executor`)
+        :type backend: str, optional
+        :param chunksize: amount of recordings sent to a worker at once, defaults to None
+        :type chunksize: int, optional
+        :param journal: append the new annotations to the journal of the index instead of rewriting it (see :meth:`import_annotations`), defaults to False
+        :type journal: bool, optional
         :return: [description]
         :rtype: [type]
         """
@@ -905,6 +1823,11 @@ class AnnotationManager:
             union
         ), "left_columns and right_columns have missing values"
 
+        if output_format is None:
+            output_format = self.get_set_format(left_set)
+
+        assert output_format in SEGMENTS_FORMATS, "invalid output format"
+
         annotations = self.annotations[
             self.annotations["set"].isin([left_set, right_set])
         ]
@@ -927,46 +1850,187 @@ class AnnotationManager:
             .reset_index()
         )
 
+        right_by_recording = dict(
+            tuple(right_annotations.groupby("recording_filename", sort=False))
+        )
         input_annotations = [
             {
-                "left_annotations": left_annotations[
-                    left_annotations["recording_filename"] == recording
-                ],
-                "right_annotations": right_annotations[
-                    right_annotations["recording_filename"] == recording
-                ],
+                "left_annotations": _left_annotations,
+                "right_annotations": right_by_recording.get(
+                    recording, right_annotations.iloc[0:0]
+                ),
             }
-            for recording in left_annotations["recording_filename"].unique()
+            for recording, _left_annotations in left_annotations.groupby(
+                "recording_filename", sort=False
+            )
         ]
 
-        pool = mp.Pool(processes=threads if threads > 0 else mp.cpu_count())
-        annotations = pool.map(
-            partial(
-                self.merge_annotations, left_columns, right_columns, columns, output_set
-            ),
-            input_annotations,
-        )
-        annotations = pd.concat(annotations)
-        annotations.drop(
-            columns=list(
-                set(annotations.columns) - {c.name for c in self.INDEX_COLUMNS}
-            ),
-            inplace=True,
-        )
-        annotations.fillna({"raw_filename": "NA"}, inplace=True)
+        # the output set is not rewritten by other processes until it is indexed
+        with self.locks.sets(shared=[left_set, right_set], exclusive=[output_set]):
+            with Executor(
+                threads, backend, chunksize, target=self._worker_copy()
+            ) as executor:
+                annotations = executor.map(
+                    "merge_annotations",
+                    input_annotations,
+                    left_columns,
+                    right_columns,
+                    columns,
+                    output_set,
+                    output_format,
+                    capture_errors=True,
+                )
+
+            annotations = report_errors(
+                annotations,
+                lambda task: "recording '{}'".format(
+                    task["left_annotations"]["recording_filename"].iloc[0]
+                ),
+            )
+            annotations = pd.concat(annotations)
+            annotations.drop(
+                columns=list(
+                    set(annotations.columns) - {c.name for c in self.INDEX_COLUMNS}
+                ),
+                inplace=True,
+            )
+            annotations.fillna({"raw_filename": "NA"}, inplace=True)
 
-        self.read()
-        self.annotations = pd.concat([self.annotations, annotations], sort=False)
-        self.write()
+            self._invalidate_set(output_set)
 
-    def get_segments(self, annotations: pd.DataFrame) -> pd.DataFrame:
+            self._commit(annotations, journal)
+
+    def get_segments(
+        self,
+        annotations: pd.DataFrame,
+        columns: List[str] = None,
+        enforce_dtypes: bool = False,
+        compact: bool = False,
+    ) -> pd.DataFrame:
         """get all segments associated to the annotations referenced in ``annotations``.
 
         :param annotations: dataframe of annotations, according to :ref:`format-annotations`
         :type annotations: pd.DataFrame
+        :param columns: columns of the segments to load (``segment_onset`` and ``segment_offset`` are always loaded; columns of ``annotations`` are always included). Defaults to None (all columns).
+        :type columns: List[str], optional
+        :param enforce_dtypes: read the columns of the segments with the dtypes declared in :attr:`SEGMENTS_COLUMNS` rather than inferring them, defaults to False
+        :type enforce_dtypes: bool, optional
+        :param compact: store the columns of ``annotations`` and the columns of the segments that have a known set of values (see :attr:`SEGMENTS_COLUMNS`) as categories, and timestamps as int32 where possible, in order to save memory. Defaults to False.
+        :type compact: bool, optional
         :return: dataframe of all the segments merged (as specified in :ref:`format-annotations-segments`), merged with ``annotations``. 
         :rtype: pd.DataFrame
         """
+        annotations = AnnotationManager._prepare_annotations(annotations, compact)
+
+        segments = []
+        positions = []
+        for segs, matches in self._clipped_segments(
+            annotations, columns, enforce_dtypes
+        ):
+            segments.append(segs)
+            positions.append(matches)
+
+        if not segments:
+            return pd.DataFrame(
+                columns=set(
+                    [c.name for c in AnnotationManager.SEGMENTS_COLUMNS if c.required]
+                    + list(annotations.columns)
+                )
+            )
+
+        segments = pd.concat(segments)
+
+        # attach the metadata of the annotations to their segments in one go
+        metadata = annotations.take(np.concatenate(positions))
+        for c in annotations.columns:
+            segments[c] = metadata[c].values
+
+        if compact:
+            segments = self._compact_segments(segments)
+
+        return segments
+
+    def iter_segments(
+        self,
+        annotations: pd.DataFrame,
+        batch_size: int = None,
+        columns: List[str] = None,
+        enforce_dtypes: bool = False,
+        compact: bool = False,
+    ) -> Iterator[pd.DataFrame]:
+        """iterate over the segments associated to the annotations referenced in ``annotations``,
+        without loading all of them at once. Segments are the same as those returned by
+        :meth:`get_segments`, but they are yielded one recording at a time
+        (or by batches of ``batch_size`` rows).
+
+        >>> n = 0
+        >>> for segments in am.iter_segments(am.annotations, columns=["speaker_type"]):
+        ...     n += (segments["speaker_type"] == "CHI").sum()
+
+        :param annotations: dataframe of annotations, according to :ref:`format-annotations`
+        :type annotations: pd.DataFrame
+        :param batch_size: if specified, yield batches of exactly ``batch_size`` segments (except for the last one) instead of one dataframe per recording, defaults to None
+        :type batch_size: int, optional
+        :param columns: columns to return (other columns of the segments are not even loaded), defaults to None (all columns)
+        :type columns: List[str], optional
+        :param enforce_dtypes: same as :meth:`get_segments`, defaults to False
+        :type enforce_dtypes: bool, optional
+        :param compact: same as :meth:`get_segments`. Columns of ``annotations`` share the same categories across batches, and so do columns of the segments with a known set of values unless they hold unexpected values; ``pd.api.types.union_categoricals`` may be needed to concatenate batches otherwise. Defaults to False
+        :type compact: bool, optional
+        :return: dataframes of segments
+        :rtype: Iterator[pd.DataFrame]
+        """
+        annotations = AnnotationManager._prepare_annotations(annotations, compact)
+
+        if batch_size is not None and int(batch_size) <= 0:
+            raise ValueError("batch_size should be a positive integer")
+
+        pending = []
+        pending_rows = 0
+
+        for recording, _annotations in annotations.groupby(
+            "recording_filename", observed=True
+        ):
+            for segs, matches in self._clipped_segments(
+                _annotations, columns, enforce_dtypes
+            ):
+                metadata = annotations.take(matches)
+                for c in annotations.columns:
+                    if columns is None or c in columns:
+                        segs[c] = metadata[c].values
+
+                if columns is not None:
+                    segs = segs.reindex(columns=columns)
+
+                if compact:
+                    segs = self._compact_segments(segs)
+
+                pending.append(segs)
+                pending_rows += len(segs)
+
+                if batch_size is None or pending_rows < batch_size:
+                    continue
+
+                batch = pd.concat(pending)
+                complete = len(batch) - len(batch) % batch_size
+                for start in range(0, complete, batch_size):
+                    yield batch.iloc[start : start + batch_size]
+
+                pending = [batch.iloc[complete:]] if complete < len(batch) else []
+                pending_rows = len(batch) - complete
+
+            if batch_size is None and pending:
+                yield pd.concat(pending)
+                pending = []
+                pending_rows = 0
+
+        if pending:
+            yield pd.concat(pending)
+
+    @staticmethod
+    def _prepare_annotations(
+        annotations: pd.DataFrame, compact: bool = False
+    ) -> pd.DataFrame:
         assert_dataframe("annotations", annotations)
         assert_columns_presence(
             "annotations",
@@ -981,45 +2045,86 @@ class AnnotationManager:
         )
 
         annotations = annotations.dropna(subset=["annotation_filename"])
-        annotations.drop(columns=["raw_filename"], inplace=True)
+        annotations = annotations.drop(columns=["raw_filename"])
 
-        segments = []
-        for index, _annotations in annotations.groupby(["set", "annotation_filename"]):
-            s, annotation_filename = index
-            df = pd.read_csv(
-                os.path.join(
-                    self.project.path,
-                    "annotations",
-                    s,
-                    "converted",
-                    annotation_filename,
-                )
+        # segments refer to their annotation by position
+        annotations = annotations.reset_index(drop=True)
+
+        if compact:
+            # metadata is repeated for every segment of the annotation
+            annotations = compact_dtypes(
+                annotations,
+                categorical=annotations.columns[annotations.dtypes == object],
+                timestamps=AnnotationManager.TIMESTAMP_COLUMNS,
             )
 
-            for annotation in _annotations.to_dict(orient="records"):
-                segs = df.copy()
-                segs = AnnotationManager.clip_segments(
-                    segs, annotation["range_onset"], annotation["range_offset"]
+        return annotations
+
+    def _compact_segments(self, segments: pd.DataFrame) -> pd.DataFrame:
+        return compact_dtypes(
+            segments, self.SEGMENTS_COLUMNS, timestamps=self.TIMESTAMP_COLUMNS
+        )
+
+    def _clipped_segments(
+        self,
+        annotations: pd.DataFrame,
+        columns: List[str] = None,
+        enforce_dtypes: bool = False,
+    ) -> Iterator[Tuple[pd.DataFrame, np.ndarray]]:
+        """yield the clipped segments of each converted annotation referenced in ``annotations``,
+        along with the position (in ``annotations``) of the annotation of each segment"""
+        if columns is not None:
+            # timestamps are needed to clip the segments
+            columns = list(
+                dict.fromkeys(["segment_onset", "segment_offset"] + list(columns))
+            )
+
+        dtype = None
+        if enforce_dtypes:
+            dtype = {c.name: c.dtype for c in self.SEGMENTS_COLUMNS if c.dtype}
+
+        for s, set_annotations in annotations.groupby("set", observed=True):
+            for annotation_filename, _annotations, df in self._read_converted(
+                s,
+                set_annotations,
+                prune=True,
+                cache=True,
+                columns=columns,
+                dtype=dtype,
+            ):
+                segs, matches = AnnotationManager._clip_to_annotations(
+                    df, _annotations
                 )
 
-                if not len(segs):
-                    continue
+                if len(segs):
+                    yield segs, _annotations.index.values[matches]
 
-                for c in annotation.keys():
-                    segs[c] = annotation[c]
+    @staticmethod
+    def _clip_to_annotations(
+        segments: pd.DataFrame, annotations: pd.DataFrame
+    ) -> Tuple[pd.DataFrame, np.ndarray]:
+        """clip the segments of a converted annotation within the range of each of the annotations
+        that refer to it, as :meth:`clip_segments` would for each annotation separately.
+
+        returns the clipped segments, ordered by annotation and by position in the file,
+        and the position in ``annotations`` of the annotation of each segment
+        """
+        onsets = segments["segment_onset"].values
+        offsets = segments["segment_offset"].values
+        starts = annotations["range_onset"].astype(np.int64).values
+        stops = annotations["range_offset"].astype(np.int64).values
 
-                segments.append(segs)
+        matches, rows = overlapping_pairs(starts, stops, onsets, offsets)
 
-        return (
-            pd.concat(segments)
-            if segments
-            else pd.DataFrame(
-                columns=set(
-                    [c.name for c in AnnotationManager.SEGMENTS_COLUMNS if c.required]
-                    + list(annotations.columns)
-                )
-            )
-        )
+        clipped_onsets = np.clip(onsets[rows], starts[matches], stops[matches])
+        clipped_offsets = np.clip(offsets[rows], starts[matches], stops[matches])
+        keep = clipped_offsets > clipped_onsets
+
+        segments = segments.take(rows[keep])
+        segments["segment_onset"] = clipped_onsets[keep].astype(onsets.dtype)
+        segments["segment_offset"] = clipped_offsets[keep].astype(offsets.dtype)
+
+        return segments, matches[keep]
 
     def get_collapsed_segments(self, annotations: pd.DataFrame) -> pd.DataFrame:
         """get all segments associated to the annotations referenced in ``annotations``,
@@ -1112,7 +2217,7 @@ class AnnotationManager:
                     )
                 )
 
-        annotations = self.annotations[self.annotations["set"].isin(sets)]
+        index = self.interval_index
 
         stack = []
         recordings = list(ranges["recording_filename"].unique())
@@ -1121,42 +2226,30 @@ class AnnotationManager:
             _ranges = ranges[ranges["recording_filename"] == recording].sort_values(
                 ["range_onset", "range_offset"]
             )
-            _annotations = annotations[
-                annotations["recording_filename"] == recording
-            ].sort_values(["range_onset", "range_offset"])
 
-            for s in sets:
-                ann = _annotations[_annotations["set"] == s]
-
-                selected_segments = (
-                    Segment(onset, offset)
-                    for (onset, offset) in _ranges[
-                        ["range_onset", "range_offset"]
-                    ].values.tolist()
-                )
-
-                set_segments = (
-                    Segment(onset, offset)
-                    for (onset, offset) in ann[
-                        ["range_onset", "range_offset"]
-                    ].values.tolist()
-                )
+            selected_segments = IntervalSet.from_dataframe(
+                _ranges, "range_onset", "range_offset"
+            )
 
-                intersection = intersect_ranges(selected_segments, set_segments)
+            for s in sets:
+                set_segments = IntervalSet(*index.intervals((recording, s)))
+                intersection = selected_segments.intersection(set_segments)
 
                 segments = []
-                for segment in intersection:
-                    segment_ann = ann.copy()
+                for start, stop in intersection:
+                    segment_ann = self.annotations.iloc[
+                        index.overlapping((recording, s), start, stop)
+                    ].copy()
                     segment_ann["range_onset"].clip(
-                        lower=segment.start, upper=segment.stop, inplace=True
+                        lower=start, upper=stop, inplace=True
                     )
                     segment_ann["range_offset"].clip(
-                        lower=segment.start, upper=segment.stop, inplace=True
+                        lower=start, upper=stop, inplace=True
                     )
                     segment_ann = segment_ann[
                         (segment_ann["range_offset"] - segment_ann["range_onset"]) > 0
                     ]
-                    segments.append(segment_ann.copy())
+                    segments.append(segment_ann)
 
                 stack += segments
 
@@ -1238,9 +2331,35 @@ class AnnotationManager:
 
         assert end_dt > start_dt, "end_time must follow start_time"
 
+        day = 86400 * 1000
         start_ts = get_ms_since_midight(start_dt)
         end_ts = get_ms_since_midight(end_dt)
 
+        def format_clock_times(ts):
+            # same as str(datetime.timedelta(milliseconds=ts % day))[:-3].zfill(5)
+            us = np.round(np.mod(ts, day) * 1000).astype(np.int64)
+            hours, us = np.divmod(us, 3600 * 10**6)
+            minutes, us = np.divmod(us, 60 * 10**6)
+            seconds, us = np.divmod(us, 10**6)
+
+            hours = pd.Series(hours, dtype=str)
+            minutes = pd.Series(minutes, dtype=str).str.zfill(2)
+            clock_times = hours.str.zfill(2) + ":" + minutes
+
+            # timedelta strings retain seconds when they have a fractional part
+            fractional = us > 0
+            clock_times[fractional] = (
+                hours[fractional]
+                + ":"
+                + minutes[fractional]
+                + ":"
+                + pd.Series(seconds[fractional], dtype=str).str.zfill(2).values
+                + "."
+                + pd.Series(us[fractional], dtype=str).str.zfill(6).str[:3].values
+            )
+
+            return clock_times.values
+
         annotations = annotations.merge(
             self.project.recordings[["recording_filename", "start_time"]], how="left"
         )
@@ -1252,54 +2371,50 @@ class AnnotationManager:
         annotations.dropna(subset=["start_time"], inplace=True)
 
         # clock-time of the beginning and end of the annotation
-        annotations["range_onset_time"] = annotations["start_time"] + pd.to_timedelta(
+        onset_times = annotations["start_time"] + pd.to_timedelta(
             annotations["range_onset"], unit="ms"
         )
-        annotations["range_onset_ts"] = (
-            annotations["range_onset_time"].apply(get_ms_since_midight).astype(int)
-        )
-
-        annotations["range_offset_ts"] = (
-            annotations["range_onset_ts"]
-            + annotations["range_offset"]
-            - annotations["range_onset"]
+        # whole seconds since midnight (as get_ms_since_midight)
+        range_onset_ts = (
+            (onset_times.dt.floor("s") - onset_times.dt.normalize())
+            / pd.Timedelta(milliseconds=1)
+        ).astype(int)
+        range_offset_ts = (
+            range_onset_ts + annotations["range_offset"] - annotations["range_onset"]
         ).astype(int)
 
-        matches = []
-        for annotation in annotations.to_dict(orient="records"):
-            onsets = np.arange(start_ts, annotation["range_offset_ts"], 86400 * 1000)
-            offsets = onsets + (end_ts - start_ts)
+        range_onset_ts = range_onset_ts.values
+        range_offset_ts = range_offset_ts.values
 
-            xs = (Segment(onset, offset) for onset, offset in zip(onsets, offsets))
-            ys = iter(
-                (Segment(annotation["range_onset_ts"], annotation["range_offset_ts"]),)
-            )
+        # one occurrence of the time range per day covered by the annotation,
+        # as in np.arange(start_ts, range_offset_ts, day)
+        days = np.ceil((range_offset_ts - start_ts) / day)
+        days = np.maximum(days, 0).astype(np.int64)
+        rows = np.repeat(np.arange(len(annotations)), days)
+        first = np.repeat(np.cumsum(days) - days, days)
+        window_onsets = start_ts + (np.arange(len(rows)) - first) * day
+        window_offsets = window_onsets + (end_ts - start_ts)
 
-            intersection = intersect_ranges(xs, ys)
-            for segment in intersection:
-                ann = annotation.copy()
-                ann["range_onset"] += segment.start - ann["range_onset_ts"]
-                ann["range_offset"] += segment.stop - ann["range_offset_ts"]
+        # clip annotations to each occurrence
+        onsets = np.maximum(window_onsets, range_onset_ts[rows])
+        offsets = np.minimum(window_offsets, range_offset_ts[rows])
 
-                ann["range_onset_time"] = str(
-                    datetime.timedelta(milliseconds=segment.start % (86400 * 1000))
-                )[:-3].zfill(len("00:00"))
-                ann["range_offset_time"] = str(
-                    datetime.timedelta(milliseconds=segment.stop % (86400 * 1000))
-                )[:-3].zfill(len("00:00"))
+        range_onset = (
+            annotations["range_onset"].values[rows] + onsets - range_onset_ts[rows]
+        )
+        range_offset = (
+            annotations["range_offset"].values[rows] + offsets - range_offset_ts[rows]
+        )
 
-                if ann["range_onset"] >= ann["range_offset"]:
-                    continue
+        keep = (onsets < offsets) & (range_onset < range_offset)
 
-                matches.append(ann)
+        matches = annotations.iloc[rows[keep]].reset_index(drop=True)
+        matches["range_onset"] = range_onset[keep]
+        matches["range_offset"] = range_offset[keep]
+        matches["range_onset_time"] = format_clock_times(onsets[keep])
+        matches["range_offset_time"] = format_clock_times(offsets[keep])
 
-        if len(matches):
-            return pd.DataFrame(matches).drop(
-                columns=["range_onset_ts", "range_offset_ts"]
-            )
-        else:
-            columns = set(annotations.columns) - {"range_onset_ts", "range_offset_ts"}
-            return pd.DataFrame(columns=columns)
+        return matches
 
     def get_segments_timestamps(
         self,
@@ -1338,33 +2453,34 @@ class AnnotationManager:
         columns_to_drop = set(segments.columns) & set(columns_to_merge)
 
         if len(columns_to_drop):
-            segments.drop(columns=columns_to_drop, inplace=True)
+            segments = segments.drop(columns=columns_to_drop)
 
-        segments = segments.merge(
-            self.project.recordings[
-                ["recording_filename"] + columns_to_merge
-            ].set_index("recording_filename"),
-            how="left",
-            right_index=True,
-            left_on="recording_filename",
-        )
+        # parse the start of each recording once, rather than once per segment
+        recordings = self.project.recordings[["recording_filename"] + columns_to_merge]
 
         if ignore_date:
-            segments["start_time"] = pd.to_datetime(
-                segments["start_time"], format="%H:%M", errors="coerce",
+            start_time = pd.to_datetime(
+                recordings["start_time"], format="%H:%M", errors="coerce",
             )
         else:
-            segments["start_time"] = pd.to_datetime(
-                segments[["date_iso", "start_time"]].apply(
-                    lambda row: "{} {}".format(
-                        str(row["date_iso"]), str(row["start_time"])
-                    ),
-                    axis=1,
-                ),
+            start_time = pd.to_datetime(
+                recordings["date_iso"].map(str)
+                + " "
+                + recordings["start_time"].map(str),
                 format="%Y-%m-%d %H:%M",
                 errors="coerce",
             )
 
+        segments = segments.merge(
+            pd.DataFrame(
+                {"start_time": start_time.values},
+                index=recordings["recording_filename"].values,
+            ),
+            how="left",
+            right_index=True,
+            left_on="recording_filename",
+        )
+
         segments["onset_time"] = segments["start_time"] + pd.to_timedelta(
             segments[onset], unit="ms", errors="coerce"
         )
@@ -1372,7 +2488,7 @@ class AnnotationManager:
             segments[offset], unit="ms", errors="coerce"
         )
 
-        return segments.drop(columns=columns_to_merge)
+        return segments.drop(columns=["start_time"])
 
     @staticmethod
     def intersection(annotations: pd.DataFrame, sets: list = None) -> pd.DataFrame:
@@ -1393,7 +2509,6 @@ class AnnotationManager:
             {"recording_filename", "set", "range_onset", "range_offset"},
         )
 
-        stack = []
         recordings = list(annotations["recording_filename"].unique())
 
         if sets is None:
@@ -1401,43 +2516,46 @@ class AnnotationManager:
         else:
             annotations = annotations[annotations["set"].isin(sets)]
 
-        for recording in recordings:
-            _annotations = annotations[annotations["recording_filename"] == recording]
-            _annotations = _annotations.sort_values(["range_onset", "range_offset"])
-
-            segments = []
-            for s in sets:
-                ann = _annotations[_annotations["set"] == s]
-                segments.append(
-                    (
-                        Segment(onset, offset)
-                        for (onset, offset) in ann[
-                            ["range_onset", "range_offset"]
-                        ].values.tolist()
-                    )
-                )
-
-            segments = reduce(intersect_ranges, segments)
-
-            result = []
-            for segment in segments:
-                ann = _annotations.copy()
-                ann["range_onset"].clip(
-                    lower=segment.start, upper=segment.stop, inplace=True
-                )
-                ann["range_offset"].clip(
-                    lower=segment.start, upper=segment.stop, inplace=True
-                )
-                ann = ann[(ann["range_offset"] - ann["range_onset"]) > 0]
-                result.append(ann)
+        if not len(sets):
+            return pd.DataFrame()
+
+        keys = pd.Index(recordings).get_indexer(annotations["recording_filename"])
+        onsets = annotations["range_onset"].to_numpy()
+        offsets = annotations["range_offset"].to_numpy()
+
+        # portions of each recording covered by all sets
+        codes = pd.Index(sets).get_indexer(annotations["set"])
+        by_set = np.argsort(codes, kind="stable")
+        bounds = np.searchsorted(codes[by_set], np.arange(len(sets) + 1))
+        segment_keys, starts, stops = keyed_intersection(
+            [
+                (keys[rows], onsets[rows], offsets[rows])
+                for rows in np.split(by_set, bounds[1:-1])
+            ]
+        )
 
-            if not len(result):
-                continue
+        # annotations overlapping each portion, by onset and offset
+        order = np.lexsort((offsets, onsets, keys))
+        left, right = overlapping_pairs(
+            starts,
+            stops,
+            onsets[order],
+            offsets[order],
+            presorted=True,
+            range_keys=segment_keys,
+            interval_keys=keys[order],
+        )
 
-            _annotations = pd.concat(result)
-            stack.append(_annotations)
+        result = annotations.iloc[order[right]].copy()
+        result["range_onset"] = np.clip(
+            result["range_onset"].to_numpy(), starts[left], stops[left]
+        )
+        result["range_offset"] = np.clip(
+            result["range_offset"].to_numpy(), starts[left], stops[left]
+        )
+        result = result[(result["range_offset"] - result["range_onset"]) > 0]
 
-        return pd.concat(stack) if len(stack) else pd.DataFrame()
+        return result if len(result) else pd.DataFrame()
 
     def set_from_path(self, path: str) -> str:
         annotations_path = os.path.join(self.project.path, "annotations")
@@ -0,0 +1,237 @@
+import hashlib
+import json
+import os
+import pandas as pd
+from typing import Iterable
+
+from .locks import lock_file
+
+# files of the package within a dataset, ignored by version control
+PRIVATE_DIRECTORY = ".childproject"
+CACHE_DIRECTORY = os.path.join(PRIVATE_DIRECTORY, "cache")
+STATS_FILE = "stats.json"
+
+# hits and misses not saved yet,
+# as {project path: {cache name: {"hits": int, "misses": int}}}
+_pending_stats = {}
+
+
+def cache_path(project_path: str, *paths: str) -> str:
+    """Path to a file or directory within the cache directory of a dataset
+    (``.childproject/cache`` at the root of the dataset).
+
+    :param project_path: path to the root of the dataset
+    :type project_path: str
+    :return: path
+    :rtype: str
+    """
+    return os.path.join(project_path, CACHE_DIRECTORY, *paths)
+
+
+def hash_files(paths: Iterable[str], root: str = None, salt: str = "") -> str:
+    """Hash the contents of a list of files (and their location relative to ``root``).
+
+    :param paths: files to hash
+    :type paths: Iterable[str]
+    :param root: paths are hashed relatively to ``root``, defaults to None
+    :type root: str, optional
+    :param salt: string to hash along with the files (e.g. version or options), defaults to ""
+    :type salt: str, optional
+    :return: hexadecimal digest
+    :rtype: str
+    """
+    digest = hashlib.sha1(salt.encode("utf-8"))
+
+    for path in paths:
+        name = os.path.relpath(path, root) if root else path
+        digest.update(name.encode("utf-8") + b"\0")
+
+        if not os.path.exists(path):
+            digest.update(b"\1")
+            continue
+
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                digest.update(chunk)
+
+        digest.update(b"\0")
+
+    return digest.hexdigest()
+
+
+def makedirs(path: str):
+    """Create a directory (and its parents). Directories created within
+    ``.childproject`` are excluded from version control (e.g. git or DataLad)
+    by a ``.gitignore`` file at the root of ``.childproject``.
+
+    :param path: path of the directory
+    :type path: str
+    """
+    os.makedirs(path, exist_ok=True)
+
+    parts = os.path.abspath(path).split(os.sep)
+    if PRIVATE_DIRECTORY not in parts:
+        return
+
+    root = os.sep.join(parts[: parts.index(PRIVATE_DIRECTORY) + 1])
+    ignore = os.path.join(root, ".gitignore")
+    if not os.path.exists(ignore):
+        with open(ignore, "w") as f:
+            f.write("*\n")
+
+
+def writable(project_path: str) -> bool:
+    """Whether the cache of a dataset can be written, checked without creating it.
+    Caches of read-only datasets are silently left untouched.
+
+    :param project_path: path to the root of the dataset
+    :type project_path: str
+    :rtype: bool
+    """
+    path = os.path.abspath(cache_path(project_path))
+    while not os.path.exists(path) and os.path.dirname(path) != path:
+        path = os.path.dirname(path)
+
+    return os.access(path, os.W_OK)
+
+
+def _merge_stats(stats: dict, counts: dict) -> dict:
+    for cache, count in counts.items():
+        total = stats.setdefault(cache, {"hits": 0, "misses": 0})
+        total["hits"] += count["hits"]
+        total["misses"] += count["misses"]
+
+    return stats
+
+
+def read_stats(project_path: str) -> dict:
+    """Read the statistics of the cache of a dataset,
+    including the hits and misses of the current process that are not saved yet.
+
+    :param project_path: path to the root of the dataset
+    :type project_path: str
+    :return: ``{cache name: {"hits": int, "misses": int}}``
+    :rtype: dict
+    """
+    path = cache_path(project_path, STATS_FILE)
+
+    try:
+        with open(path, "r") as f:
+            stats = json.load(f)
+    except (OSError, ValueError):
+        stats = {}
+
+    return _merge_stats(
+        stats, _pending_stats.get(os.path.abspath(project_path), {})
+    )
+
+
+def record(project_path: str, cache: str, hit: bool, count: int = 1):
+    """Count hits or misses for one of the caches of a dataset.
+
+    Counts are kept in memory, and only saved along with misses
+    (which write to the cache anyway), so that reading from the cache
+    never modifies the dataset. Hits of processes that never miss are not saved.
+    Failures (e.g. read-only datasets) are silently ignored.
+
+    :param project_path: path to the root of the dataset
+    :type project_path: str
+    :param cache: name of the cache
+    :type cache: str
+    :param hit: whether the cache was hit
+    :type hit: bool
+    :param count: amount of hits or misses to count, defaults to 1
+    :type count: int, optional
+    """
+    if count <= 0:
+        return
+
+    pending = _pending_stats.setdefault(os.path.abspath(project_path), {})
+    counts = pending.setdefault(cache, {"hits": 0, "misses": 0})
+    counts["hits" if hit else "misses"] += count
+
+    if not hit:
+        save_stats(project_path)
+
+
+def save_stats(project_path: str):
+    """Add the hits and misses counted by the current process
+    to the statistics of the cache of a dataset.
+
+    :param project_path: path to the root of the dataset
+    :type project_path: str
+    """
+    pending = _pending_stats.get(os.path.abspath(project_path))
+    if not pending or not writable(project_path):
+        return
+
+    path = cache_path(project_path, STATS_FILE)
+
+    def write(tmp):
+        with open(tmp, "w") as f:
+            json.dump(stats, f, indent=4)
+
+    try:
+        makedirs(cache_path(project_path))
+
+        # concurrent updates would lose counts
+        with lock_file(cache_path(project_path, "stats.lock")):
+            try:
+                with open(path, "r") as f:
+                    stats = json.load(f)
+            except (OSError, ValueError):
+                stats = {}
+
+            _merge_stats(stats, pending)
+            write_atomic(path, write)
+    except OSError:
+        return
+
+    pending.clear()
+
+
+def write_atomic(path: str, write):
+    """Write ``path`` through a temporary file, so that readers
+    never see a partially written file.
+
+    :param path: destination
+    :type path: str
+    :param write: function writing the contents to the path it is given
+    :type write: Callable
+    """
+    if os.path.dirname(path):
+        makedirs(os.path.dirname(path))
+
+    # the extension is kept, e.g. for pandas to infer the compression
+    root, ext = os.path.splitext(path)
+    tmp = "{}.{}.tmp{}".format(root, os.getpid(), ext)
+
+    try:
+        write(tmp)
+        os.replace(tmp, path)
+    finally:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+
+
+def load_pickle(path: str):
+    """Load a pickled cache entry, returning None if it is missing or unreadable."""
+    if not os.path.exists(path):
+        return None
+
+    try:
+        return pd.read_pickle(path)
+    except Exception:
+        return None
+
+
+def clear(project_path: str):
+    """Remove all cached data of a dataset.
+
+    :param project_path: path to the root of the dataset
+    :type project_path: str
+    """
+    import shutil
+
+    shutil.rmtree(cache_path(project_path), ignore_errors=True)
+    _pending_stats.pop(os.path.abspath(project_path), None)
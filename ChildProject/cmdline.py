@@ -2,6 +2,9 @@
 from ChildProject.projects import ChildProject
 from ChildProject.annotations import AnnotationManager
 from ChildProject.pipelines import *
+from ChildProject.storage import SEGMENTS_FORMATS
+from ChildProject import cache
+from ChildProject.parallel import ARGUMENTS as EXECUTOR_ARGUMENTS
 
 import argparse
 import os
@@ -9,6 +12,12 @@ import pandas as pd
 import sys
 
 parser = argparse.ArgumentParser()
+parser.add_argument(
+    "--no-cache",
+    help="do not read or write cached metadata and metrics (.childproject/cache)",
+    dest="no_cache",
+    action="store_true",
+)
 subparsers = parser.add_subparsers()
 
 
@@ -92,7 +101,13 @@ def perform_validation(project: ChildProject, require_success: bool = True, **ar
             type=int,
             default=0,
         ),
+        arg(
+            "--incremental",
+            help="only validate converted annotations that changed since they last passed validation (only applies to --annotations)",
+            action="store_true",
+        ),
     ]
+    + EXECUTOR_ARGUMENTS
 )
 def validate(args):
     """validate the consistency of the dataset returning detailed errors and warnings"""
@@ -129,7 +144,11 @@ def validate(args):
         annotations = annotations[annotations["set"].isin(sets)]
 
         annotations_errors, annotations_warnings = am.validate(
-            annotations=annotations, threads=args.threads
+            annotations=annotations,
+            threads=args.threads,
+            incremental=args.incremental,
+            backend=args.backend,
+            chunksize=args.chunksize,
         )
         errors.extend(annotations_errors)
         warnings.extend(annotations_warnings)
@@ -156,7 +175,19 @@ def validate(args):
             default="",
         ),
         arg("--threads", help="amount of threads to run on", type=int, default=0),
+        arg(
+            "--output-format",
+            help="storage format of the converted annotations (defaults to the current format of the set, or csv for new sets)",
+            choices=list(SEGMENTS_FORMATS.keys()),
+            default=None,
+        ),
+        arg(
+            "--journal",
+            help="append the imported annotations to metadata/annotations.journal.csv instead of rewriting the whole index",
+            action="store_true",
+        ),
     ]
+    + EXECUTOR_ARGUMENTS
     + [
         arg(
             "--{}".format(col.name),
@@ -190,9 +221,21 @@ def import_annotations(args):
         )
 
     am = AnnotationManager(project)
-    imported = am.import_annotations(annotations, args.threads)
+    imported = am.import_annotations(
+        annotations,
+        args.threads,
+        output_format=args.output_format,
+        backend=args.backend,
+        chunksize=args.chunksize,
+        journal=args.journal,
+    )
 
-    errors, warnings = am.validate(annotations=imported, threads=args.threads)
+    errors, warnings = am.validate(
+        annotations=imported,
+        threads=args.threads,
+        backend=args.backend,
+        chunksize=args.chunksize,
+    )
 
     if len(am.errors) > 0:
         print(
@@ -228,7 +271,19 @@ def import_annotations(args):
             type=int,
             default=1,
         ),
+        arg(
+            "--output-format",
+            help="storage format of the output set (defaults to the format of the left set)",
+            choices=list(SEGMENTS_FORMATS.keys()),
+            default=None,
+        ),
+        arg(
+            "--journal",
+            help="append the merged annotations to metadata/annotations.journal.csv instead of rewriting the whole index",
+            action="store_true",
+        ),
     ]
+    + EXECUTOR_ARGUMENTS
 )
 def merge_annotations(args):
     """merge segments sharing identical onset and offset from two sets of annotations"""
@@ -246,6 +301,10 @@ def merge_annotations(args):
         right_columns=args.right_columns.split(","),
         output_set=args.output_set,
         threads=args.threads,
+        output_format=args.output_format,
+        backend=args.backend,
+        chunksize=args.chunksize,
+        journal=args.journal,
     )
 
 
@@ -320,6 +379,96 @@ def rename_annotations(args):
     )
 
 
+@subcommand(
+    [
+        arg("source", help="project path"),
+        arg("--set", help="set to migrate", required=True),
+        arg(
+            "--format",
+            help="target storage format",
+            choices=list(SEGMENTS_FORMATS.keys()),
+            required=True,
+        ),
+        arg("--recursive", help="enable recursive mode", action="store_true"),
+    ]
+)
+def migrate_annotations(args):
+    """convert the converted annotations of a set into another storage format (csv, parquet or feather)"""
+
+    project = ChildProject(args.source)
+
+    perform_validation(project, require_success=True, ignore_recordings=True)
+
+    am = AnnotationManager(project)
+    am.read()
+    am.migrate_set(args.set, args.format, recursive=args.recursive)
+
+
+@subcommand(
+    [
+        arg("source", help="project path"),
+        arg("--set", help="set to consolidate", required=True),
+        arg("--recursive", help="enable recursive mode", action="store_true"),
+    ]
+)
+def consolidate_annotations(args):
+    """gather the converted annotations of a set into a single indexed parquet store"""
+
+    project = ChildProject(args.source)
+
+    perform_validation(project, require_success=True, ignore_recordings=True)
+
+    am = AnnotationManager(project)
+    am.read()
+    am.consolidate_set(args.set, recursive=args.recursive)
+
+
+@subcommand(
+    [
+        arg("source", help="project path"),
+        arg("--clear", help="remove all cached data", action="store_true"),
+    ]
+)
+def cache_stats(args):
+    """show (or clear) the contents of the cache of a dataset"""
+
+    path = cache.cache_path(args.source)
+
+    if args.clear:
+        cache.clear(args.source)
+        print("cleared {}".format(path))
+        return
+
+    files = (
+        [
+            os.path.join(root, f)
+            for root, dirs, filenames in os.walk(path)
+            for f in filenames
+            if f != cache.STATS_FILE
+        ]
+        if os.path.exists(path)
+        else []
+    )
+
+    print("\033[1mcache\033[0m: {}".format(path))
+    print(
+        "{} file(s), {:.2f} MB".format(
+            len(files), sum(os.path.getsize(f) for f in files) / 1024 ** 2
+        )
+    )
+
+    for name, counts in cache.read_stats(args.source).items():
+        total = counts["hits"] + counts["misses"]
+        print(
+            "{}: {} hit(s), {} miss(es) ({:.0%} hit rate)".format(
+                name,
+                counts["hits"],
+                counts["misses"],
+                counts["hits"] / total if total else 0,
+            )
+        )
+
+
 @subcommand([arg("source", help="source data path")])
 def overview(args):
     """prints an overview of the contents of a given dataset"""
@@ -380,15 +529,7 @@ def overview(args):
             annotations["annotation_filename"]
             .apply(
                 lambda annotation_filename: 1
-                if os.path.exists(
-                    os.path.join(
-                        project.path,
-                        "annotations",
-                        annotation_set,
-                        "converted",
-                        annotation_filename,
-                    )
-                )
+                if am.converted_exists(annotation_set, annotation_filename)
                 else 0
             )
             .sum()
@@ -515,4 +656,9 @@ def main():
     register_pipeline("metrics", MetricsPipeline)
 
     args = parser.parse_args()
+
+    if args.no_cache:
+        ChildProject.use_cache = False
+    del args.no_cache
+
     args.func(args)
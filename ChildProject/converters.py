@@ -404,6 +404,8 @@ class ItsConverter(AnnotationConverter):
                         "child_cry_vfx_len": int(child_cry_vfx_len * 1000),
                         "cries": cries,
                         "vfxs": vfxs,
+                        "cries_count": len(cries),
+                        "vfxs_count": len(vfxs),
                     }
                 )
 
@@ -0,0 +1,452 @@
+import numpy as np
+import pandas as pd
+from typing import Hashable, Iterable, Iterator, List, Tuple
+
+
+class IntervalIndex:
+    """Index of the intervals described by the rows of a dataframe
+    (e.g. the ``range_onset`` and ``range_offset`` of the index of annotations),
+    grouped by the values of one or more columns (e.g. ``recording_filename`` and ``set``).
+
+    Within each group, intervals are sorted by onset and offset, along with
+    the running maximum of their offsets, so that the intervals overlapping
+    a given range are found by binary search rather than by scanning the whole group.
+
+    >>> index = IntervalIndex(am.annotations, ["recording_filename", "set"])
+    >>> am.annotations.iloc[index.overlapping(("sound.wav", "vtc"), 0, 60000)]
+
+    :param df: dataframe of intervals
+    :type df: pd.DataFrame
+    :param by: columns defining the groups
+    :type by: List[str]
+    :param onset: column holding the onsets, defaults to "range_onset"
+    :type onset: str, optional
+    :param offset: column holding the offsets, defaults to "range_offset"
+    :type offset: str, optional
+    """
+
+    def __init__(
+        self,
+        df: pd.DataFrame,
+        by: List[str],
+        onset: str = "range_onset",
+        offset: str = "range_offset",
+    ):
+        self.by = list(by)
+        self.groups = {}
+
+        if not len(df):
+            self.positions = np.empty(0, dtype=np.int64)
+            self.onsets = np.empty(0, dtype=np.int64)
+            self.offsets = np.empty(0, dtype=np.int64)
+            self.max_offsets = np.empty(0, dtype=np.int64)
+            return
+
+        keys = df[self.by].reset_index(drop=True)
+        codes, uniques = pd.MultiIndex.from_frame(keys).factorize()
+
+        onsets = df[onset].to_numpy()
+        offsets = df[offset].to_numpy()
+
+        # sort by group, then by onset and offset; ties keep the order of the dataframe
+        order = np.lexsort((offsets, onsets, codes))
+        self.positions = order
+        self.onsets = onsets[order]
+        self.offsets = offsets[order]
+
+        codes = codes[order]
+        bounds = np.flatnonzero(np.diff(codes)) + 1
+        starts = np.concatenate([[0], bounds])
+        stops = np.concatenate([bounds, [len(codes)]])
+
+        self.max_offsets = np.empty_like(self.offsets)
+        for start, stop in zip(starts, stops):
+            key = uniques[codes[start]]
+            self.groups[key if len(self.by) > 1 else key[0]] = (start, stop)
+            self.max_offsets[start:stop] = np.maximum.accumulate(
+                self.offsets[start:stop]
+            )
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self.groups
+
+    def keys(self) -> List[Hashable]:
+        return list(self.groups.keys())
+
+    def intervals(self, key: Hashable) -> Tuple[np.ndarray, np.ndarray]:
+        """Sorted onsets and offsets of the intervals of a group.
+
+        :param key: value(s) of the ``by`` columns for this group
+        :type key: Hashable
+        :return: onsets and offsets (empty if the group does not exist)
+        :rtype: Tuple[np.ndarray, np.ndarray]
+        """
+        start, stop = self.groups.get(key, (0, 0))
+        return self.onsets[start:stop], self.offsets[start:stop]
+
+    def positions_of(self, key: Hashable) -> np.ndarray:
+        """Positions (in the input dataframe) of the intervals of a group,
+        sorted by onset and offset."""
+        start, stop = self.groups.get(key, (0, 0))
+        return self.positions[start:stop]
+
+    def overlapping(self, key: Hashable, onset: int, offset: int) -> np.ndarray:
+        """Positions (in the input dataframe) of the intervals of a group
+        that overlap ``[onset, offset)``, sorted by onset and offset.
+
+        :param key: value(s) of the ``by`` columns for this group
+        :type key: Hashable
+        :param onset: onset of the range
+        :type onset: int
+        :param offset: offset of the range
+        :type offset: int
+        :return: positions of the matching rows
+        :rtype: np.ndarray
+        """
+        start, stop = self.groups.get(key, (0, 0))
+
+        # intervals starting before the end of the range...
+        stop = start + np.searchsorted(self.onsets[start:stop], offset, side="left")
+        # ...and after the first one that could end after its beginning
+        start += np.searchsorted(self.max_offsets[start:stop], onset, side="right")
+
+        matches = self.offsets[start:stop] > onset
+        return self.positions[start:stop][matches]
+
+
+class IntervalSet:
+    """Sorted set of half-open intervals ``[start, stop)``, stored as two numeric arrays
+    (usually int64 timestamps in milliseconds).
+
+    Intervals are sorted by start and stop, but may overlap unless the set
+    is coalesced (see :meth:`coalesce`). All operations are vectorized.
+
+    >>> a = IntervalSet([0, 2000], [1000, 3000])
+    >>> b = IntervalSet([500], [2500])
+    >>> a.intersection(b)
+    IntervalSet([[500, 1000], [2000, 2500]])
+
+    :param starts: onsets of the intervals
+    :type starts: array-like
+    :param stops: offsets of the intervals
+    :type stops: array-like
+    """
+
+    def __init__(self, starts=(), stops=()):
+        starts = np.asarray(starts).ravel()
+        stops = np.asarray(stops).ravel()
+
+        if not len(starts) and not len(stops):
+            starts = starts.astype(np.int64)
+            stops = stops.astype(np.int64)
+
+        if starts.shape != stops.shape:
+            raise ValueError("starts and stops should have the same length")
+
+        if len(starts) > 1 and not _is_sorted(starts, stops):
+            order = np.lexsort((stops, starts))
+            starts, stops = starts[order], stops[order]
+
+        self.starts = starts
+        self.stops = stops
+
+    @classmethod
+    def from_segments(cls, segments: Iterable) -> "IntervalSet":
+        """Build a set from objects with ``start`` and ``stop`` attributes
+        (e.g. :class:`ChildProject.utils.Segment`)."""
+        segments = list(segments)
+        return cls(
+            [segment.start for segment in segments],
+            [segment.stop for segment in segments],
+        )
+
+    @classmethod
+    def from_dataframe(
+        cls,
+        df: pd.DataFrame,
+        onset: str = "segment_onset",
+        offset: str = "segment_offset",
+    ) -> "IntervalSet":
+        """Build a set from the onsets and offsets stored in two columns of a dataframe."""
+        return cls(df[onset].to_numpy(), df[offset].to_numpy())
+
+    def __len__(self) -> int:
+        return len(self.starts)
+
+    def __iter__(self) -> Iterator[Tuple[int, int]]:
+        return zip(self.starts.tolist(), self.stops.tolist())
+
+    def __eq__(self, other) -> bool:
+        return (
+            isinstance(other, IntervalSet)
+            and np.array_equal(self.starts, other.starts)
+            and np.array_equal(self.stops, other.stops)
+        )
+
+    def __repr__(self) -> str:
+        return "IntervalSet({})".format([list(interval) for interval in self])
+
+    def segments(self) -> Iterator:
+        """Iterate over the intervals as :class:`ChildProject.utils.Segment` objects."""
+        from .utils import Segment
+
+        return (Segment(start, stop) for start, stop in self)
+
+    def to_dataframe(
+        self, onset: str = "segment_onset", offset: str = "segment_offset"
+    ) -> pd.DataFrame:
+        return pd.DataFrame({onset: self.starts, offset: self.stops})
+
+    def is_coalesced(self) -> bool:
+        """Whether intervals are non-empty and neither overlap nor touch each other."""
+        return bool(
+            np.all(self.stops > self.starts)
+            and np.all(self.starts[1:] > self.stops[:-1])
+        )
+
+    def coalesce(self) -> "IntervalSet":
+        """Merge overlapping and adjacent intervals, and drop empty ones.
+
+        :return: coalesced set
+        :rtype: IntervalSet
+        """
+        keep = self.stops > self.starts
+        starts, stops = self.starts[keep], self.stops[keep]
+
+        if not len(starts):
+            return IntervalSet()
+
+        reach = np.maximum.accumulate(stops)
+        first = np.concatenate([[True], starts[1:] > reach[:-1]])
+        last = np.concatenate([first[1:], [True]])
+
+        return IntervalSet(starts[first], reach[last])
+
+    def length(self) -> int:
+        """Total duration covered by the intervals (overlaps are only counted once)."""
+        coalesced = self.coalesce()
+        return int((coalesced.stops - coalesced.starts).sum())
+
+    def clip(self, start: int, stop: int) -> "IntervalSet":
+        """Clip all intervals within ``[start, stop)``, dropping those left empty.
+
+        :param start: lower bound
+        :type start: int
+        :param stop: upper bound
+        :type stop: int
+        :return: clipped set
+        :rtype: IntervalSet
+        """
+        starts = np.clip(self.starts, start, stop)
+        stops = np.clip(self.stops, start, stop)
+        keep = stops > starts
+
+        return IntervalSet(starts[keep], stops[keep])
+
+    def overlaps(self, other: "IntervalSet") -> Tuple[np.ndarray, np.ndarray]:
+        """Find all pairs of overlapping intervals between two sets.
+
+        :param other: other set
+        :type other: IntervalSet
+        :return: positions of the intervals of each pair in ``self`` and in ``other``, sorted by the former then the latter
+        :rtype: Tuple[np.ndarray, np.ndarray]
+        """
+        return overlapping_pairs(
+            self.starts, self.stops, other.starts, other.stops, presorted=True
+        )
+
+    def intersection(self, other: "IntervalSet") -> "IntervalSet":
+        """Non-empty intersections of every interval of ``self``
+        with every interval of ``other``.
+        If both sets are coalesced, so is the output.
+
+        :param other: other set
+        :type other: IntervalSet
+        :return: intersection
+        :rtype: IntervalSet
+        """
+        left, right = self.overlaps(other)
+        starts = np.maximum(self.starts[left], other.starts[right])
+        stops = np.minimum(self.stops[left], other.stops[right])
+        keep = stops > starts
+
+        return IntervalSet(starts[keep], stops[keep])
+
+    def union(self, other: "IntervalSet") -> "IntervalSet":
+        """Portions covered by either set.
+
+        :param other: other set
+        :type other: IntervalSet
+        :return: coalesced union
+        :rtype: IntervalSet
+        """
+        return IntervalSet(
+            np.concatenate([self.starts, other.starts]),
+            np.concatenate([self.stops, other.stops]),
+        ).coalesce()
+
+    def complement(self, start: int = None, stop: int = None) -> "IntervalSet":
+        """Gaps between the intervals, within ``[start, stop)``.
+
+        :param start: lower bound, defaults to None (unbounded)
+        :type start: int, optional
+        :param stop: upper bound, defaults to None (unbounded)
+        :type stop: int, optional
+        :return: coalesced complement
+        :rtype: IntervalSet
+        """
+        coalesced = self.coalesce()
+        dtype = np.result_type(coalesced.starts, coalesced.stops)
+        unbounded = (
+            np.iinfo(dtype) if np.issubdtype(dtype, np.integer) else np.finfo(dtype)
+        )
+        lower = unbounded.min if start is None else start
+        upper = unbounded.max if stop is None else stop
+
+        gaps = IntervalSet(
+            np.concatenate([[lower], coalesced.stops]),
+            np.concatenate([coalesced.starts, [upper]]),
+        )
+        return gaps.clip(lower, upper)
+
+    def difference(self, other: "IntervalSet") -> "IntervalSet":
+        """Remove the portions covered by ``other`` from each interval of ``self``.
+        Intervals of ``self`` are not merged together.
+
+        :param other: other set
+        :type other: IntervalSet
+        :return: difference
+        :rtype: IntervalSet
+        """
+        return self.intersection(other.complement())
+
+
+def overlapping_pairs(
+    starts: np.ndarray,
+    stops: np.ndarray,
+    onsets: np.ndarray,
+    offsets: np.ndarray,
+    presorted: bool = False,
+    range_keys: np.ndarray = None,
+    interval_keys: np.ndarray = None,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Find all pairs of overlapping intervals between ranges ``[starts, stops)``
+    and intervals ``[onsets, offsets)`` (e.g. the ranges of annotations and their segments).
+
+    If keys are given (e.g. integer codes of the recordings), ranges are only paired
+    with intervals that have the same key; all keys are processed in one pass.
+
+    :param starts: onsets of the ranges
+    :type starts: np.ndarray
+    :param stops: offsets of the ranges
+    :type stops: np.ndarray
+    :param onsets: onsets of the intervals
+    :type onsets: np.ndarray
+    :param offsets: offsets of the intervals
+    :type offsets: np.ndarray
+    :param presorted: whether intervals are already sorted by key and onset, defaults to False
+    :type presorted: bool, optional
+    :param range_keys: integer key of each range, defaults to None
+    :type range_keys: np.ndarray, optional
+    :param interval_keys: integer key of each interval, defaults to None
+    :type interval_keys: np.ndarray, optional
+    :return: positions of the range and of the interval of each pair, sorted by the former then the latter
+    :rtype: Tuple[np.ndarray, np.ndarray]
+    """
+    starts, stops = np.asarray(starts), np.asarray(stops)
+    onsets, offsets = np.asarray(onsets), np.asarray(offsets)
+
+    if not len(starts) or not len(onsets):
+        empty = np.empty(0, dtype=np.int64)
+        return empty, empty
+
+    if range_keys is not None:
+        # lay the keys out one after the other on a single axis of ranks,
+        # so that intervals of different keys never overlap
+        values = np.concatenate([starts, stops, onsets, offsets])
+        values, ranks = np.unique(values, return_inverse=True)
+        ranks = ranks.reshape(-1).astype(np.int64)
+        span = len(values) + 1
+
+        keys = np.concatenate(
+            [range_keys, range_keys, interval_keys, interval_keys]
+        ).astype(np.int64)
+        starts, stops, onsets, offsets = np.split(
+            keys * span + ranks, np.cumsum([len(starts), len(stops), len(onsets)])
+        )
+
+    order = None
+    if not presorted:
+        order = np.argsort(onsets, kind="stable")
+        onsets, offsets = onsets[order], offsets[order]
+
+    # intervals that start before the end of each range...
+    last = np.searchsorted(onsets, stops, side="left")
+    # ...after the first one that could end after its beginning
+    first = np.searchsorted(np.fmax.accumulate(offsets), starts, side="right")
+    counts = np.maximum(last - first, 0)
+
+    left = np.repeat(np.arange(len(starts)), counts)
+    shifts = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+    right = np.repeat(first, counts) + shifts
+
+    matches = (offsets[right] > starts[left]) & (onsets[right] < stops[left])
+    left, right = left[matches], right[matches]
+
+    if order is not None:
+        right = order[right]
+        pairs = np.lexsort((right, left))
+        left, right = left[pairs], right[pairs]
+
+    return left, right
+
+
+def keyed_intersection(
+    sets: List[Tuple[np.ndarray, np.ndarray, np.ndarray]]
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Intersect several sets of intervals, separately for each key
+    (e.g. the annotations of several sets, for each recording).
+
+    Each set is given as ``(keys, starts, stops)`` arrays, keys being integer codes.
+    For each key, the output is the same as reducing :meth:`IntervalSet.intersection`
+    over the sets, but all keys are swept at once.
+
+    :param sets: ``(keys, starts, stops)`` of the intervals of each set
+    :type sets: List[Tuple[np.ndarray, np.ndarray, np.ndarray]]
+    :return: keys, starts and stops of the intersections, sorted by key, start and stop
+    :rtype: Tuple[np.ndarray, np.ndarray, np.ndarray]
+    """
+
+    def sort(keys, starts, stops):
+        order = np.lexsort((stops, starts, keys))
+        return keys[order], starts[order], stops[order]
+
+    keys, starts, stops = sort(*map(np.asarray, sets[0]))
+
+    for other in sets[1:]:
+        other_keys, other_starts, other_stops = sort(*map(np.asarray, other))
+
+        left, right = overlapping_pairs(
+            starts,
+            stops,
+            other_starts,
+            other_stops,
+            presorted=True,
+            range_keys=keys,
+            interval_keys=other_keys,
+        )
+
+        keys = keys[left]
+        starts = np.maximum(starts[left], other_starts[right])
+        stops = np.minimum(stops[left], other_stops[right])
+
+        keep = stops > starts
+        keys, starts, stops = sort(keys[keep], starts[keep], stops[keep])
+
+    return keys, starts, stops
+
+
+def _is_sorted(starts: np.ndarray, stops: np.ndarray) -> bool:
+    ascending = starts[1:] >= starts[:-1]
+    ties = starts[1:] == starts[:-1]
+    return bool(np.all(ascending) and np.all(stops[1:][ties] >= stops[:-1][ties]))
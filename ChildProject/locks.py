@@ -0,0 +1,163 @@
+import os
+import threading
+from contextlib import ExitStack, contextmanager
+from typing import Iterable
+from urllib.parse import quote
+
+try:
+    import fcntl
+except ImportError:
+    # e.g. on Windows, where locks are not enforced
+    fcntl = None
+
+# locks held by the current thread, as {path: [file descriptor, shared, depth]}
+_held = threading.local()
+
+
+@contextmanager
+def lock_file(path: str, shared: bool = False):
+    """Hold an advisory lock on ``path`` (created if it does not exist),
+    blocking until it is available. Locks are honored by all processes
+    using this function, including on other machines sharing the same
+    filesystem, provided it supports ``flock``.
+
+    Locks are reentrant within a thread: requesting a lock that the thread
+    already holds (exclusively, or shared for a shared request) does not block.
+
+    >>> with lock_file("metadata/.annotations.lock"):
+    ...     # exclusive access
+    ...     pass
+
+    :param path: path of the lock file
+    :type path: str
+    :param shared: acquire a shared (read) lock instead of an exclusive one, defaults to False
+    :type shared: bool, optional
+    """
+    path = os.path.abspath(path)
+    held = _held.__dict__.setdefault("locks", {})
+
+    if path in held:
+        lock = held[path]
+        if lock[1] and not shared:
+            raise RuntimeError(
+                "cannot upgrade the shared lock on '{}' to an exclusive lock".format(
+                    path
+                )
+            )
+
+        lock[2] += 1
+        try:
+            yield
+        finally:
+            lock[2] -= 1
+        return
+
+    try:
+        fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o666)
+    except OSError:
+        if not shared:
+            raise
+
+        # read-only datasets can still be read
+        yield
+        return
+
+    try:
+        if fcntl is not None:
+            fcntl.flock(fd, fcntl.LOCK_SH if shared else fcntl.LOCK_EX)
+
+        held[path] = [fd, shared, 1]
+        try:
+            yield
+        finally:
+            del held[path]
+    finally:
+        # closing the file releases the lock
+        os.close(fd)
+
+
+def append_atomic(path: str, data: bytes):
+    """Append ``data`` to ``path`` (created if it does not exist) with a single
+    write in append mode, so that concurrent appends are never interleaved.
+
+    :param path: destination
+    :type path: str
+    :param data: contents to append
+    :type data: bytes
+    """
+    fd = os.open(path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o666)
+    try:
+        view = memoryview(data)
+        while len(view):
+            view = view[os.write(fd, view) :]
+    finally:
+        os.close(fd)
+
+
+class LockManager:
+    """Locks of a dataset, stored as files under ``.childproject/locks``
+    (which is excluded from version control).
+
+    The index of annotations has its own lock, which is only held while the index
+    is read or updated. Each set of annotations also has its own lock,
+    so that e.g. conversions into a set (which hold its lock shared) can run in
+    parallel across processes, while operations rewriting a whole set
+    (which hold its lock exclusively) wait for them to complete.
+
+    Locks of sets must always be acquired before the lock of the index.
+
+    >>> locks = LockManager("/path/to/dataset")
+    >>> with locks.sets(shared=["vtc", "alice"], exclusive=["alice_vtc"]):
+    ...     pass
+    >>> with locks.index():
+    ...     pass
+
+    :param path: path to the root of the dataset
+    :type path: str
+    """
+
+    DIRECTORY = ".childproject/locks"
+
+    def __init__(self, path: str):
+        self.path = path
+
+    def lock_path(self, name: str) -> str:
+        return os.path.join(self.path, self.DIRECTORY, name + ".lock")
+
+    def lock(self, name: str, shared: bool = False):
+        """Lock ``name``, see :func:`lock_file`."""
+        from .cache import makedirs
+
+        try:
+            makedirs(os.path.join(self.path, self.DIRECTORY))
+        except OSError:
+            # read-only datasets (shared locks are skipped)
+            pass
+
+        return lock_file(self.lock_path(name), shared)
+
+    def index(self, shared: bool = False):
+        """Lock the index of annotations (``metadata/annotations.csv``)."""
+        return self.lock("annotations", shared)
+
+    def set(self, annotation_set: str, shared: bool = False):
+        """Lock a set of annotations."""
+        return self.lock("set-" + quote(annotation_set, safe=""), shared)
+
+    @contextmanager
+    def sets(self, shared: Iterable[str] = (), exclusive: Iterable[str] = ()):
+        """Lock several sets of annotations, always in the same order
+        so that processes locking overlapping sets cannot deadlock.
+
+        :param shared: sets to lock shared
+        :type shared: Iterable[str], optional
+        :param exclusive: sets to lock exclusively (takes precedence over ``shared``)
+        :type exclusive: Iterable[str], optional
+        """
+        exclusive = set(exclusive)
+        with ExitStack() as stack:
+            for annotation_set in sorted(set(shared) | exclusive):
+                stack.enter_context(
+                    self.set(annotation_set, shared=annotation_set not in exclusive)
+                )
+            yield
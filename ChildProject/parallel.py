@@ -0,0 +1,225 @@
+import multiprocessing as mp
+from multiprocessing.pool import ThreadPool
+import sys
+import traceback
+from functools import partial
+from typing import Callable, Iterable, Iterator, List, Union
+
+BACKENDS = ["serial", "thread", "process"]
+
+# object shared with the tasks of the current worker process (see Executor)
+_target = None
+
+
+def _initialize(target):
+    global _target
+    _target = target
+
+
+class TaskError:
+    """Failure of a task, returned in place of its result
+    when errors are captured (see :meth:`Executor.imap`).
+
+    :param task: the task that failed
+    :param error: the exception raised by the task
+    :type error: Exception
+    """
+
+    def __init__(self, task, error: Exception):
+        self.task = task
+        self.type = type(error).__name__
+        self.message = str(error)
+        self.traceback = traceback.format_exc()
+
+    def __repr__(self):
+        return "TaskError({}: {})".format(self.type, self.message)
+
+    def __str__(self):
+        return "{}: {}".format(self.type, self.message)
+
+
+def _run(call: Union[str, Callable], args: tuple, capture_errors: bool, task):
+    if isinstance(call, str):
+        call = getattr(_target, call)
+
+    if not capture_errors:
+        return call(*args, task)
+
+    try:
+        return call(*args, task)
+    except Exception as e:
+        return TaskError(task, e)
+
+
+class Executor:
+    """Run tasks serially, in a pool of threads or in a pool of processes.
+
+    Tasks are processed by calling a function, or a method of a ``target`` object
+    that is shared by all tasks. With the process backend, the target is sent to
+    each worker once, when it starts, rather than along with every chunk of tasks.
+
+    >>> with Executor(threads=4, target=am) as executor:
+    ...     results = executor.map("validate_annotation", records)
+
+    :param threads: amount of workers, defaults to 1. If <= 0, all available CPU cores will be used.
+    :type threads: int, optional
+    :param backend: one of ``serial``, ``thread`` or ``process``, defaults to None (``serial`` if ``threads`` is 1, ``process`` otherwise)
+    :type backend: str, optional
+    :param chunksize: amount of tasks sent to a worker at once, defaults to None (automatically adjusted to the amount of tasks)
+    :type chunksize: int, optional
+    :param target: object shared with the tasks, defaults to None
+    :type target: object, optional
+    """
+
+    def __init__(
+        self,
+        threads: int = 1,
+        backend: str = None,
+        chunksize: int = None,
+        target=None,
+    ):
+        threads = int(threads)
+        self.threads = threads if threads > 0 else mp.cpu_count()
+
+        if backend is None:
+            backend = "serial" if self.threads == 1 else "process"
+
+        if backend not in BACKENDS:
+            raise ValueError(
+                "invalid backend '{}', should be any of {}".format(
+                    backend, ",".join(BACKENDS)
+                )
+            )
+
+        self.backend = backend
+        self.chunksize = int(chunksize) if chunksize else None
+        self.target = target
+        self.pool = None
+
+    def __enter__(self):
+        if self.backend == "thread":
+            self.pool = ThreadPool(processes=self.threads)
+        elif self.backend == "process":
+            self.pool = mp.Pool(
+                processes=self.threads, initializer=_initialize, initargs=(self.target,)
+            )
+
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def close(self):
+        if self.pool is not None:
+            self.pool.close()
+            self.pool.join()
+            self.pool = None
+
+    def imap(
+        self,
+        call: Union[str, Callable],
+        tasks: Iterable,
+        *args,
+        capture_errors: bool = False,
+    ) -> Iterator:
+        """Process each task with ``call(*args, task)``, yielding results in the order of the tasks.
+
+        :param call: function, or name of the method of the target
+        :type call: Union[str, Callable]
+        :param tasks: tasks
+        :type tasks: Iterable
+        :param args: additional arguments, passed before the task
+        :param capture_errors: if True, tasks raising an exception yield a :class:`TaskError` instead of interrupting the execution, defaults to False
+        :type capture_errors: bool, optional
+        :return: results
+        :rtype: Iterator
+        """
+        if isinstance(call, str) and self.backend != "process":
+            call = getattr(self.target, call)
+
+        function = partial(_run, call, args, capture_errors)
+
+        if self.backend == "serial":
+            return map(function, tasks)
+
+        if self.pool is None:
+            raise RuntimeError(
+                "the {} backend can only be used within a 'with' statement".format(
+                    self.backend
+                )
+            )
+
+        tasks = list(tasks)
+        chunksize = self.chunksize
+        if chunksize is None:
+            # same heuristic as multiprocessing.pool.Pool.map
+            chunksize, extra = divmod(len(tasks), self.threads * 4)
+            chunksize += 1 if extra or not chunksize else 0
+
+        return self.pool.imap(function, tasks, chunksize)
+
+    def map(
+        self,
+        call: Union[str, Callable],
+        tasks: Iterable,
+        *args,
+        capture_errors: bool = False,
+    ) -> List:
+        """Same as :meth:`imap`, but returns the list of all results."""
+        return list(self.imap(call, tasks, *args, capture_errors=capture_errors))
+
+
+def report_errors(results: List, describe: Callable = str) -> List:
+    """Print the tasks that failed (see ``capture_errors`` in :meth:`Executor.imap`) to stderr.
+
+    :param results: results of the tasks, including :class:`TaskError` instances
+    :type results: List
+    :param describe: function returning a description of a failed task, defaults to str
+    :type describe: Callable, optional
+    :return: results of the tasks that succeeded
+    :rtype: List
+    """
+    succeeded = []
+    for result in results:
+        if isinstance(result, TaskError):
+            print(
+                "an error occured while processing {}".format(describe(result.task)),
+                file=sys.stderr,
+            )
+            print(result.traceback, file=sys.stderr)
+        else:
+            succeeded.append(result)
+
+    return succeeded
+
+
+# command-line options controlling the execution of the tasks, as (flags, parameters) tuples
+ARGUMENTS = [
+    (
+        ["--backend"],
+        {
+            "help": "how tasks are run (by default, serially with one thread, and in separate processes otherwise)",
+            "choices": BACKENDS,
+            "default": None,
+        },
+    ),
+    (
+        ["--chunksize"],
+        {
+            "help": "amount of tasks sent to a worker at once (by default, adjusted to the amount of tasks)",
+            "type": int,
+            "default": None,
+        },
+    ),
+]
+
+
+def add_arguments(parser):
+    """Add the options controlling the execution of the tasks (``--backend`` and ``--chunksize``,
+    see :class:`Executor`) to a parser.
+
+    :param parser: parser
+    :type parser: argparse.ArgumentParser
+    """
+    for flags, parameters in ARGUMENTS:
+        parser.add_argument(*flags, **parameters)
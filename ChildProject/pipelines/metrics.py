@@ -1,18 +1,40 @@
 from abc import ABC, abstractmethod
 import argparse
+import ast
 import datetime
-import multiprocessing as mp
+import hashlib
+import json
 import numpy as np
+import os
 import pandas as pd
 from typing import Union, List
 
 import ChildProject
+from ChildProject import cache
+from ChildProject.parallel import Executor, add_arguments
 from ChildProject.pipelines.pipeline import Pipeline
 
 pipelines = {}
 
 
 class Metrics(ABC):
+    # ways of computing the metrics: "unit" runs _process_unit for each unit,
+    # other engines compute all units at once in _process_all
+    ENGINES = ["unit"]
+
+    # whether the metrics of each unit are cached into .childproject/cache/metrics
+    # (only if ChildProject.use_cache is also True)
+    use_cache = True
+
+    # columns of the index of annotations that the metrics depend on
+    CACHE_INDEX_COLUMNS = [
+        "set",
+        "recording_filename",
+        "annotation_filename",
+        "range_onset",
+        "range_offset",
+    ]
+
     def __init__(
         self,
         project: ChildProject.projects.ChildProject,
@@ -22,9 +44,24 @@ class Metrics(ABC):
         to_time: str = None,
         rec_cols: str = None,
         child_cols: str = None,
+        threads: int = 1,
+        backend: str = None,
+        chunksize: int = None,
+        engine: str = "unit",
     ):
 
+        if engine not in self.ENGINES:
+            raise ValueError(
+                "unsupported engine '{}', use one of: {}".format(
+                    engine, ", ".join(self.ENGINES)
+                )
+            )
+
+        self.engine = engine
         self.project = project
+        self.threads = int(threads)
+        self.backend = backend
+        self.chunksize = chunksize
         self.am = ChildProject.annotations.AnnotationManager(self.project)
 
         #necessary columns to construct the metrics
@@ -81,6 +118,7 @@ class Metrics(ABC):
         
         self.by = by
         self.segments = pd.DataFrame()
+        self.cache_hits = 0
 
         self.recordings = Pipeline.recordings_from_list(recordings)
 
@@ -89,13 +127,261 @@ class Metrics(ABC):
 
     def __init_subclass__(cls, **kwargs):
         super().__init_subclass__(**kwargs)
+
+        # _process_all is only reachable through the engines a class declares
+        if set(cls.ENGINES) - {"unit"} and cls._process_all is Metrics._process_all:
+            raise TypeError(
+                "{} declares the engines {} "
+                "but does not implement _process_all".format(
+                    cls.__name__, ", ".join(cls.ENGINES)
+                )
+            )
+
         pipelines[cls.SUBCOMMAND] = cls
 
     @abstractmethod
-    def extract(self):
+    def _process_unit(self, unit: str):
         pass
 
-    def retrieve_segments(self, sets: List[str], unit: str):
+    def _process_all(self, units: np.ndarray, split: bool = False):
+        """compute the metrics of all ``units`` at once (engines other than ``unit``),
+        returning the same table as :meth:`_results_table`, or the results
+        :meth:`_process_unit` would return for each unit if ``split`` is True.
+        Subclasses declaring other engines than ``unit`` must implement it."""
+        raise NotImplementedError
+
+    def _units(self) -> np.ndarray:
+        recordings = self.project.get_recordings_from_list(self.recordings)
+        return recordings[self.by].unique()
+
+    def _process_units(self, units: np.ndarray = None) -> list:
+        """run :meth:`_process_unit` for every unit (or each of ``units``), in parallel
+        depending on ``threads``, ``backend`` and ``chunksize``"""
+        if units is None:
+            units = self._units()
+
+        with Executor(
+            self.threads, self.backend, self.chunksize, target=self
+        ) as executor:
+            return executor.map("_process_unit", units)
+
+    def _results_table(self, results: list) -> pd.DataFrame:
+        """table of the metrics of several units, given the results of :meth:`_process_unit`"""
+        return pd.DataFrame(results)
+
+    def _compute(self, units: np.ndarray) -> pd.DataFrame:
+        """compute the metrics of ``units`` with the selected engine,
+        retrieving the metrics of the units that did not change from the cache"""
+        # the metrics of subclasses that do not declare the sets they read
+        # cannot be invalidated when these change, so they are not cached
+        if not (
+            self.use_cache
+            and self.project.use_cache
+            and "sets" in self._cache_parameters()
+        ):
+            if self.engine == "unit":
+                return self._results_table(self._process_units(units))
+
+            return self._process_all(units)
+
+        keys = self._cache_keys(units)
+        paths = [
+            cache.cache_path(self.project.path, "metrics", key + ".pkl")
+            for key in keys
+        ]
+        results = [cache.load_pickle(path) for path in paths]
+        missing = [i for i, result in enumerate(results) if result is None]
+
+        self.cache_hits = len(units) - len(missing)
+        print(
+            "metrics of {} unit(s) out of {} retrieved from the cache".format(
+                self.cache_hits, len(units)
+            )
+        )
+        cache.record(self.project.path, "metrics", True, self.cache_hits)
+
+        if missing:
+            if self.engine == "unit":
+                computed = self._process_units(units[missing])
+            else:
+                computed = self._process_all(units[missing], split=True)
+
+            writable = cache.writable(self.project.path)
+            for i, result in zip(missing, computed):
+                results[i] = result
+
+                if not writable:
+                    continue
+
+                try:
+                    cache.write_atomic(
+                        paths[i], lambda tmp: pd.to_pickle(result, tmp)
+                    )
+                except OSError:
+                    # e.g. full disks
+                    pass
+
+            # saves the statistics once (runs without misses leave them untouched)
+            cache.record(self.project.path, "metrics", False, len(missing))
+
+        return self._results_table(results)
+
+    def _cache_parameters(self) -> dict:
+        """parameters the metrics depend on. Subclasses must add the annotation sets
+        the metrics are computed from, as ``sets``, and their own parameters;
+        metrics of subclasses that do not are never cached"""
+        return {
+            "metrics": type(self).__name__,
+            "by": self.by,
+            "from_time": self.from_time,
+            "to_time": self.to_time,
+            "rec_cols": sorted(self.rec_cols or []),
+            "child_cols": sorted(self.child_cols or []),
+            "engine": self.engine,
+        }
+
+    def _cache_keys(self, units: np.ndarray) -> List[str]:
+        """key of the metrics of each unit in the cache, which hashes the parameters
+        of the metrics, the version of the package, the rows of the metadata of the unit,
+        the entries of the index for its annotations and the contents of their converted files.
+
+        :param units: units
+        :type units: np.ndarray
+        :return: hexadecimal digest for each unit
+        :rtype: List[str]
+        """
+        parameters = self._cache_parameters()
+        salt = json.dumps(
+            [ChildProject.__version__, parameters], sort_keys=True, default=str
+        )
+
+        recordings = self.project.recordings
+        recordings = recordings[recordings[self.by].isin(units)]
+
+        children = self.project.children
+        children = (
+            pd.Series(
+                self._row_hashes(children), index=children["child_id"].astype(str)
+            )
+            .groupby(level=0)
+            .agg(" ".join)
+        )
+
+        metadata = pd.Series(
+            self._row_hashes(recordings)
+            + ":"
+            + recordings["child_id"].astype(str).map(children).fillna("").values,
+            index=recordings[self.by].values,
+        )
+
+        annotations = self.am.annotations
+        annotations = annotations[
+            annotations[self.by].isin(units)
+            & annotations["set"].isin(parameters["sets"])
+        ]
+        annotations = pd.Series(
+            self._row_hashes(annotations[self.CACHE_INDEX_COLUMNS])
+            + ":"
+            + self._file_hashes(annotations),
+            index=annotations[self.by].values,
+        )
+
+        metadata = metadata.groupby(level=0, sort=False).agg(" ".join)
+        # the order of the index does not matter
+        annotations = annotations.groupby(level=0, sort=False).agg(
+            lambda x: " ".join(sorted(x))
+        )
+
+        return [
+            hashlib.sha1(
+                "{}\n{}\n{}".format(
+                    salt, metadata.get(unit, ""), annotations.get(unit, "")
+                ).encode("utf-8")
+            ).hexdigest()
+            for unit in units
+        ]
+
+    @staticmethod
+    def _row_hashes(table: pd.DataFrame) -> np.ndarray:
+        """hash of each row of ``table`` (including the names of its columns)"""
+        # the order of the columns does not matter
+        table = table[sorted(table.columns, key=str)]
+        columns = hashlib.sha1(repr(list(table.columns)).encode("utf-8")).hexdigest()
+        rows = pd.util.hash_pandas_object(table, index=False).values
+        return np.char.add(columns[:16], rows.astype(str)).astype(object)
+
+    def _file_hashes(self, annotations: pd.DataFrame) -> np.ndarray:
+        """content hash of the converted file of each annotation.
+        Hashes are recorded in ``.childproject/cache/metrics/files.json``,
+        and only computed again for files whose size or mtime changed."""
+        manifest_path = cache.cache_path(self.project.path, "metrics", "files.json")
+        try:
+            with open(manifest_path, "r") as f:
+                manifest = json.load(f)
+        except (OSError, ValueError):
+            manifest = {}
+
+        fingerprints = {}
+        hashes = []
+        for annotation in annotations[["set", "annotation_filename"]].to_dict(
+            orient="records"
+        ):
+            path = os.path.relpath(
+                self.am._converted_source(annotation), self.project.path
+            )
+            if path not in fingerprints:
+                fingerprints[path] = self.am._fingerprint(
+                    annotation, manifest.get(path)
+                )
+
+            fingerprint = fingerprints[path]
+            hashes.append(fingerprint["hash"] if fingerprint else "missing")
+
+        if any(manifest.get(path) != f for path, f in fingerprints.items()):
+            manifest.update(
+                {path: f for path, f in fingerprints.items() if f is not None}
+            )
+
+            def write(path):
+                with open(path, "w") as f:
+                    json.dump(manifest, f)
+
+            if cache.writable(self.project.path):
+                try:
+                    cache.write_atomic(manifest_path, write)
+                except OSError:
+                    pass
+
+        return np.array(hashes, dtype=object)
+
+    def extract(self, units: np.ndarray = None):
+        """compute the metrics
+
+        :param units: units to compute the metrics of, defaults to None (all units)
+        :type units: np.ndarray, optional
+        :return: metrics, indexed by unit
+        :rtype: pd.DataFrame
+        """
+        self.metrics = self._compute(
+            self._units() if units is None else np.asarray(units)
+        )
+        self.metrics.set_index(self.by, inplace=True)
+        return self.metrics
+
+    def retrieve_segments(
+        self, sets: List[str], unit: str, columns: List[str] = None
+    ):
+        """retrieve the annotations of ``sets`` for ``unit`` and their segments.
+
+        :param sets: annotation sets
+        :type sets: List[str]
+        :param unit: unit (e.g. recording) to retrieve annotations for
+        :type unit: str
+        :param columns: columns of the segments to load (see :meth:`~ChildProject.annotations.AnnotationManager.get_segments`), defaults to None (all columns)
+        :type columns: List[str], optional
+        :return: annotations and segments
+        :rtype: Tuple[pd.DataFrame, pd.DataFrame]
+        """
         annotations = self.am.annotations[self.am.annotations[self.by] == unit]
         annotations = annotations[annotations["set"].isin(sets)]
 
@@ -105,7 +391,7 @@ class Metrics(ABC):
             )
 
         try:
-            segments = self.am.get_segments(annotations)
+            segments = self.am.get_segments(annotations, columns=columns)
         except Exception as e:
             print(str(e))
             return pd.DataFrame(), pd.DataFrame()
@@ -119,6 +405,153 @@ class Metrics(ABC):
 
         return annotations, segments
 
+    def retrieve_all_segments(
+        self, sets: List[str], units: np.ndarray, columns: List[str] = None
+    ):
+        """retrieve the annotations of ``sets`` for all ``units`` and their segments at once.
+        Segments only include the ``by`` and ``set`` columns of their annotation,
+        in addition to ``columns``. Unlike :meth:`retrieve_segments`, errors are raised.
+
+        :param sets: annotation sets
+        :type sets: List[str]
+        :param units: units (e.g. recordings) to retrieve annotations for
+        :type units: np.ndarray
+        :param columns: columns of the segments to load (see :meth:`~ChildProject.annotations.AnnotationManager.get_segments`), defaults to None (all columns)
+        :type columns: List[str], optional
+        :return: annotations and segments
+        :rtype: Tuple[pd.DataFrame, pd.DataFrame]
+        """
+        annotations = self.am.annotations[self.am.annotations[self.by].isin(units)]
+        annotations = annotations[annotations["set"].isin(sets)]
+
+        if self.from_time and self.to_time:
+            annotations = self.am.get_within_time_range(
+                annotations, self.from_time, self.to_time, errors="coerce"
+            )
+
+        # the metadata of the annotations is repeated for each segment
+        required = [
+            self.by,
+            "recording_filename",
+            "set",
+            "annotation_filename",
+            "raw_filename",
+            "range_onset",
+            "range_offset",
+        ]
+        segments = self.am.get_segments(
+            annotations[list(dict.fromkeys(required))], columns=columns
+        )
+
+        # prevent overflows
+        segments["duration"] = (
+            (segments["segment_offset"] / 1000 - segments["segment_onset"] / 1000)
+            .astype(float)
+            .fillna(0)
+        )
+
+        return annotations, segments
+
+    def _annotated_duration(
+        self, annotations: pd.DataFrame, units: pd.Index
+    ) -> np.ndarray:
+        """total duration of ``annotations`` for each unit, in seconds"""
+        return (
+            (annotations["range_offset"] - annotations["range_onset"])
+            .groupby(annotations[self.by].values)
+            .sum()
+            .reindex(units, fill_value=0)
+            .values
+            / 1000
+        )
+
+    def _child_ids(self, units: pd.Index) -> np.ndarray:
+        """child_id of the first recording of each unit"""
+        return (
+            self.project.recordings.drop_duplicates(self.by)
+            .set_index(self.by, drop=False)["child_id"]
+            .reindex(units)
+            .values
+        )
+
+    def _add_unit_columns(self, columns: dict, units: pd.Index):
+        """add the columns of children.csv (``child_cols``) and recordings.csv (``rec_cols``)
+        of all ``units`` to ``columns``, given their ``child_id`` column,
+        as :meth:`_process_unit` does for each unit"""
+        if self.child_cols:
+            children = self.project.children.drop_duplicates("child_id").set_index(
+                "child_id", drop=False
+            )
+            for label in self.child_cols:
+                columns[label] = children[label].reindex(columns["child_id"]).values
+
+        if self.rec_cols:
+            recordings = self.project.recordings
+            first = recordings.drop_duplicates(self.by).set_index(self.by, drop=False)
+            for label in self.rec_cols:
+                # columns that do not have a unique value for a unit are left as NA
+                unique = recordings.groupby(self.by)[label].nunique(dropna=False) == 1
+                columns[label] = (
+                    first[label]
+                    .where(unique.reindex(first.index, fill_value=False), "NA")
+                    .reindex(units)
+                    .values
+                )
+
+    @staticmethod
+    def _get_column(table: pd.DataFrame, *key) -> np.ndarray:
+        """values of the column ``key`` of ``table``, all NaN if there is no such column"""
+        if key in table.columns:
+            return table[key].values
+
+        return np.full(len(table), np.nan)
+
+    def _metrics_table(
+        self, units: pd.Index, columns: dict, assigned: dict, split: bool = False
+    ):
+        """build the table that :meth:`_results_table` would return from the
+        columns of all units, where ``assigned[column]`` tells for which units
+        :meth:`_process_unit` would have set the column.
+
+        :param units: units
+        :type units: pd.Index
+        :param columns: values of each column for every unit, in the order in which :meth:`_process_unit` sets them
+        :type columns: dict
+        :param assigned: boolean mask of the units for which each column is set
+        :type assigned: dict
+        :param split: return the results of :meth:`_process_unit` for each unit instead, defaults to False
+        :type split: bool, optional
+        """
+        if split:
+            names = [name for name in columns if name != self.by]
+            values = {name: np.asarray(columns[name]) for name in names}
+
+            results = []
+            for i, unit in enumerate(units):
+                metrics = {self.by: unit}
+                for name in names:
+                    if assigned[name][i]:
+                        metrics[name] = values[name][i]
+                results.append(metrics)
+
+            return results
+
+        names = [
+            name for name in columns if name != self.by and assigned[name].any()
+        ]
+
+        # records are turned into a table with columns ordered by first appearance
+        first = [np.argmax(assigned[name]) for name in names]
+        order = sorted(range(len(names)), key=lambda i: (first[i], i))
+
+        table = {self.by: np.asarray(units, dtype=object)}
+        for i in order:
+            values = np.asarray(columns[names[i]], dtype=object).copy()
+            values[~assigned[names[i]]] = np.nan
+            table[names[i]] = values
+
+        return pd.DataFrame(table).infer_objects()
+
 
 class LenaMetrics(Metrics):
     """LENA metrics extractor. 
@@ -144,9 +577,28 @@ class LenaMetrics(Metrics):
     :type by: str, optional
     :param threads: amount of threads to run on, defaults to 1
     :type threads: int, optional
+    :param backend: how to run the tasks (serial, thread or process), defaults to None (see :class:`~ChildProject.parallel.Executor`)
+    :type backend: str, optional
+    :param chunksize: amount of units sent to a worker at once, defaults to None
+    :type chunksize: int, optional
+    :param engine: ``grouped`` to load the segments of all units at once and compute all metrics with grouped aggregations, or ``unit`` to compute the metrics of each unit separately (slower, but only the segments of one unit are held in memory at a time). Both produce the same output. Defaults to ``grouped``.
+    :type engine: str, optional
     """
 
     SUBCOMMAND = "lena"
+    ENGINES = ["unit", "grouped"]
+
+    # columns of the segments needed to compute the metrics
+    COLUMNS = [
+        "speaker_type",
+        "lena_speaker",
+        "words",
+        "utterances_count",
+        "utterances_length",
+        "child_cry_vfx_len",
+        "cries_count",
+        "vfxs_count",
+    ]
 
     def __init__(
         self,
@@ -160,13 +612,27 @@ class LenaMetrics(Metrics):
         child_cols: str = None,
         by: str = "recording_filename",
         threads: int = 1,
+        backend: str = None,
+        chunksize: int = None,
+        engine: str = "grouped",
     ):
 
-        super().__init__(project, by, recordings, from_time, to_time, rec_cols, child_cols)
+        super().__init__(
+            project,
+            by,
+            recordings,
+            from_time,
+            to_time,
+            rec_cols,
+            child_cols,
+            threads=threads,
+            backend=backend,
+            chunksize=chunksize,
+            engine=engine,
+        )
 
         self.set = set
         self.types = types
-        self.threads = int(threads)
 
         if self.set not in self.am.annotations["set"].values:
             raise ValueError(
@@ -174,11 +640,48 @@ class LenaMetrics(Metrics):
                 "check spelling and make sure the set was properly imported."
             )
 
-    def _process_unit(self, unit: str):
-        import ast
+    def _cache_parameters(self) -> dict:
+        parameters = super()._cache_parameters()
+        parameters.update(sets=[self.set], types=list(self.types))
+        return parameters
+
+    def _retrieve_its(self, retrieve, units):
+        """retrieve the annotations and segments of ``units`` with ``retrieve``
+        (:meth:`retrieve_segments` or :meth:`retrieve_all_segments`)"""
+        annotations, its = retrieve([self.set], units, columns=self.COLUMNS)
+
+        if len(its) and not all(
+            column in its.columns and its[column].notnull().all()
+            for column in ["cries_count", "vfxs_count"]
+        ):
+            # sets converted before the counts were stored
+            annotations, its = retrieve(
+                [self.set], units, columns=self.COLUMNS + ["cries", "vfxs"]
+            )
+
+        return annotations, its
+
+    @staticmethod
+    def _count_entries(its: pd.DataFrame, column: str) -> np.ndarray:
+        """amount of cries (or vfxs) of each segment, from the ``cries_count``
+        (or ``vfxs_count``) column, or from the list itself when it is missing"""
+        if column + "_count" in its.columns:
+            counts = its[column + "_count"].values.astype(float)
+        else:
+            counts = np.full(len(its), np.nan)
+
+        missing = np.isnan(counts)
+        if missing.any():
+            counts[missing] = [
+                len(ast.literal_eval(entries) if isinstance(entries, str) else entries)
+                for entries in its[column].values[missing]
+            ]
 
+        return counts
+
+    def _process_unit(self, unit: str):
         metrics = {self.by: unit}
-        annotations, its = self.retrieve_segments([self.set], unit)
+        annotations, its = self._retrieve_its(self.retrieve_segments, unit)
 
         speaker_types = ["FEM", "MAL", "CHI", "OCH"]
         adults = ["FEM", "MAL"]
@@ -246,8 +749,8 @@ class LenaMetrics(Metrics):
             ]
 
         chi = its[its["speaker_type"] == "CHI"]
-        cries = chi["cries"].apply(lambda x: len(ast.literal_eval(x))).sum()
-        vfxs = chi["vfxs"].apply(lambda x: len(ast.literal_eval(x))).sum()
+        cries = self._count_entries(chi, "cries").sum()
+        vfxs = self._count_entries(chi, "vfxs").sum()
         utterances = chi["utterances_count"].sum()
 
         metrics["lp_n"] = utterances / (utterances + cries + vfxs)
@@ -286,23 +789,131 @@ class LenaMetrics(Metrics):
 
         return metrics
 
-    def extract(self):
-        recordings = self.project.get_recordings_from_list(self.recordings)
+    def _process_all(self, units: np.ndarray, split: bool = False):
+        units = pd.Index(units)
+
+        try:
+            annotations, its = self._retrieve_its(self.retrieve_all_segments, units)
+        except Exception as e:
+            # leave it to each unit to report its own errors
+            print(str(e))
+            results = self._process_units(units)
+            return results if split else self._results_table(results)
+
+        speaker_types = ["FEM", "MAL", "CHI", "OCH"]
+        adults = ["FEM", "MAL"]
+
+        columns = {}
+        assigned = {}
+
+        if "speaker_type" not in its.columns:
+            return self._metrics_table(units, columns, assigned, split)
+
+        its = its[
+            (its["speaker_type"].isin(speaker_types))
+            | (its["lena_speaker"].isin(self.types))
+        ]
+        processed = units.isin(its[self.by].unique())
+
+        if not processed.any():
+            return self._metrics_table(units, columns, assigned, split)
 
-        if self.threads == 1:
-            self.metrics = pd.DataFrame(
-                [self._process_unit(unit) for unit in recordings[self.by].unique()]
+        unit_duration = self._annotated_duration(annotations, units)
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            rate = 3600 / unit_duration
+
+            # one row per unit, one column per (aggregate, speaker)
+            its_agg = (
+                its.groupby([self.by, "speaker_type"])
+                .agg(
+                    voc_ph=("duration", "count"),
+                    voc_dur_ph=("duration", "sum"),
+                    avg_voc_dur=("duration", "mean"),
+                    wc_ph=("words", "sum"),
+                )
+                .unstack("speaker_type")
+                .reindex(units)
             )
-        else:
-            with mp.Pool(
-                processes=self.threads if self.threads >= 1 else mp.cpu_count()
-            ) as pool:
-                self.metrics = pd.DataFrame(
-                    pool.map(self._process_unit, recordings[self.by].unique())
+
+            for speaker in speaker_types:
+                has_speaker = self._get_column(its_agg, "voc_ph", speaker) > 0
+
+                for name, column, scale in [
+                    ("voc_{}_ph", "voc_ph", rate),
+                    ("voc_dur_{}_ph", "voc_dur_ph", rate),
+                    ("avg_voc_dur_{}", "avg_voc_dur", 1),
+                    ("wc_{}_ph", "wc_ph", rate),
+                ]:
+                    if column == "wc_ph" and speaker not in adults:
+                        continue
+
+                    name = name.format(speaker.lower())
+                    columns[name] = scale * self._get_column(its_agg, column, speaker)
+                    assigned[name] = has_speaker
+
+            if len(self.types):
+                its_agg = (
+                    its.groupby([self.by, "lena_speaker"])
+                    .agg(
+                        voc_ph=("duration", "count"),
+                        voc_dur_ph=("duration", "sum"),
+                        avg_voc_dur=("duration", "mean"),
+                    )
+                    .unstack("lena_speaker")
+                    .reindex(units)
                 )
 
-        self.metrics.set_index(self.by, inplace=True)
-        return self.metrics
+            for lena_type in self.types:
+                has_type = self._get_column(its_agg, "voc_ph", lena_type) > 0
+
+                for name, column, scale in [
+                    ("voc_{}_ph", "voc_ph", rate),
+                    ("voc_dur_{}_ph", "voc_dur_ph", rate),
+                    ("avg_voc_dur_{}", "avg_voc_dur", 1),
+                ]:
+                    name = name.format(lena_type.lower())
+                    columns[name] = scale * self._get_column(
+                        its_agg, column, lena_type
+                    )
+                    assigned[name] = has_type
+
+            chi = its[its["speaker_type"] == "CHI"]
+            chi = (
+                pd.DataFrame(
+                    {
+                        "utterances_count": chi["utterances_count"].values,
+                        "utterances_length": chi["utterances_length"].values,
+                        "child_cry_vfx_len": chi["child_cry_vfx_len"].values,
+                        "cries": self._count_entries(chi, "cries"),
+                        "vfxs": self._count_entries(chi, "vfxs"),
+                    }
+                )
+                .groupby(chi[self.by].values)
+                .sum()
+                .reindex(units, fill_value=0)
+            )
+
+            utterances = chi["utterances_count"].values
+            columns["lp_n"] = utterances / (
+                utterances + chi["cries"].values + chi["vfxs"].values
+            )
+            columns["lp_dur"] = chi["utterances_length"].values / (
+                chi["child_cry_vfx_len"].values + chi["utterances_length"].values
+            )
+
+            words = its.groupby(self.by)["words"].sum().reindex(units).values
+            columns["wc_adu_ph"] = words * 3600 / unit_duration
+
+        columns["child_id"] = self._child_ids(units)
+        columns["duration"] = unit_duration
+        self._add_unit_columns(columns, units)
+
+        for name in columns:
+            if name not in assigned:
+                assigned[name] = processed
+
+        return self._metrics_table(units, columns, assigned, split)
 
     @staticmethod
     def add_parser(subparsers, subcommand):
@@ -333,6 +944,13 @@ class LenaMetrics(Metrics):
         parser.add_argument(
             "--threads", help="amount of threads to run on", default=1, type=int
         )
+        parser.add_argument(
+            "--engine",
+            help="compute the metrics of all units at once (grouped), or of each unit separately (unit)",
+            choices=LenaMetrics.ENGINES,
+            default="grouped",
+        )
+        add_arguments(parser)
 
 
 class AclewMetrics(Metrics):
@@ -365,9 +983,16 @@ class AclewMetrics(Metrics):
     :type by: str, optional
     :param threads: amount of threads to run on, defaults to 1
     :type threads: int, optional
+    :param backend: how to run the tasks (serial, thread or process), defaults to None (see :class:`~ChildProject.parallel.Executor`)
+    :type backend: str, optional
+    :param chunksize: amount of units sent to a worker at once, defaults to None
+    :type chunksize: int, optional
+    :param engine: ``unit`` to compute the metrics of each unit separately, or ``grouped`` to load the segments of all units at once and compute all metrics with grouped aggregations (faster, but all segments are held in memory). Both produce the same output. Defaults to ``unit``.
+    :type engine: str, optional
     """
 
     SUBCOMMAND = "aclew"
+    ENGINES = ["unit", "grouped"]
 
     def __init__(
         self,
@@ -382,14 +1007,28 @@ class AclewMetrics(Metrics):
         child_cols: str = None,
         by: str = "recording_filename",
         threads: int = 1,
+        backend: str = None,
+        chunksize: int = None,
+        engine: str = "unit",
     ):
 
-        super().__init__(project, by, recordings, from_time, to_time, rec_cols, child_cols)
+        super().__init__(
+            project,
+            by,
+            recordings,
+            from_time,
+            to_time,
+            rec_cols,
+            child_cols,
+            threads=threads,
+            backend=backend,
+            chunksize=chunksize,
+            engine=engine,
+        )
 
         self.vtc = vtc
         self.alice = alice
         self.vcm = vcm
-        self.threads = int(threads)
         
         if self.vtc not in self.am.annotations["set"].values:
             raise ValueError(
@@ -403,10 +1042,17 @@ class AclewMetrics(Metrics):
         if self.vcm not in self.am.annotations["set"].values:
             print(f"The VCM set ('{self.vcm}') was not found in the index.")
 
+    def _cache_parameters(self) -> dict:
+        parameters = super()._cache_parameters()
+        parameters.update(sets=[self.vtc, self.alice, self.vcm])
+        return parameters
+
     def _process_unit(self, unit: str):
         metrics = {self.by: unit}
         annotations, segments = self.retrieve_segments(
-            [self.vtc, self.alice, self.vcm], unit
+            [self.vtc, self.alice, self.vcm],
+            unit,
+            columns=["speaker_type", "words", "syllables", "phonemes", "vcm_type"],
         )
 
         speaker_types = ["FEM", "MAL", "CHI", "OCH"]
@@ -563,23 +1209,168 @@ class AclewMetrics(Metrics):
         
         return metrics
 
-    def extract(self):
-        recordings = self.project.get_recordings_from_list(self.recordings)
+    def _process_all(self, units: np.ndarray, split: bool = False):
+        units = pd.Index(units)
 
-        if self.threads == 1:
-            self.metrics = pd.DataFrame(
-                [self._process_unit(unit) for unit in recordings[self.by].unique()]
+        try:
+            annotations, segments = self.retrieve_all_segments(
+                [self.vtc, self.alice, self.vcm],
+                units,
+                columns=["speaker_type", "words", "syllables", "phonemes", "vcm_type"],
             )
-        else:
-            with mp.Pool(
-                processes=self.threads if self.threads >= 1 else mp.cpu_count()
-            ) as pool:
-                self.metrics = pd.DataFrame(
-                    pool.map(self._process_unit, recordings[self.by].unique())
+        except Exception as e:
+            # leave it to each unit to report its own errors
+            print(str(e))
+            results = self._process_units(units)
+            return results if split else self._results_table(results)
+
+        speaker_types = ["FEM", "MAL", "CHI", "OCH"]
+        adults = ["FEM", "MAL"]
+
+        columns = {}
+        assigned = {}
+
+        if "speaker_type" not in segments.columns:
+            return self._metrics_table(units, columns, assigned, split)
+
+        segments = segments[segments["speaker_type"].isin(speaker_types)]
+        processed = units.isin(segments[self.by].unique())
+
+        if not processed.any():
+            return self._metrics_table(units, columns, assigned, split)
+
+        unit_duration = self._annotated_duration(
+            annotations[annotations["set"] == self.vtc], units
+        )
+
+        aggregations = dict(
+            voc_ph=("duration", "count"),
+            voc_dur_ph=("duration", "sum"),
+            avg_voc_dur=("duration", "mean"),
+        )
+        for column in ["words", "syllables", "phonemes"]:
+            if column in segments.columns:
+                aggregations[column] = (column, "sum")
+
+        # one row per unit, one column per (aggregate, set, speaker)
+        stats = (
+            segments.groupby([self.by, "set", "speaker_type"])
+            .agg(**aggregations)
+            .unstack(["set", "speaker_type"])
+            .reindex(units)
+        )
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            rate = 3600 / unit_duration
+
+            for speaker in speaker_types:
+                has_speaker = self._get_column(stats, "voc_ph", self.vtc, speaker) > 0
+
+                for name, column, scale in [
+                    ("voc_{}_ph", "voc_ph", rate),
+                    ("voc_dur_{}_ph", "voc_dur_ph", rate),
+                    ("avg_voc_dur_{}", "avg_voc_dur", 1),
+                ]:
+                    name = name.format(speaker.lower())
+                    columns[name] = scale * self._get_column(
+                        stats, column, self.vtc, speaker
+                    )
+                    assigned[name] = has_speaker
+
+            alice = segments[segments["set"] == self.alice]
+            has_alice = units.isin(alice[self.by].unique())
+
+            if len(alice):
+                for speaker in adults:
+                    has_speaker = (
+                        self._get_column(stats, "voc_ph", self.alice, speaker) > 0
+                    )
+
+                    for metric, column in [
+                        ("wc", "words"),
+                        ("sc", "syllables"),
+                        ("pc", "phonemes"),
+                    ]:
+                        name = "{}_{}_ph".format(metric, speaker.lower())
+                        columns[name] = rate * self._get_column(
+                            stats, column, self.alice, speaker
+                        )
+                        assigned[name] = has_speaker
+
+                totals = alice.groupby(self.by)[["words", "syllables", "phonemes"]]
+                totals = totals.sum().reindex(units)
+
+                for metric, column in [
+                    ("wc", "words"),
+                    ("sc", "syllables"),
+                    ("pc", "phonemes"),
+                ]:
+                    name = "{}_adu_ph".format(metric)
+                    columns[name] = totals[column].values * 3600 / unit_duration
+                    assigned[name] = has_alice
+
+            vcm = segments[segments["set"] == self.vcm]
+            has_vcm = units.isin(vcm[self.by].unique())
+
+            if len(vcm):
+                vcm_stats = (
+                    vcm[vcm["speaker_type"] == "CHI"]
+                    .groupby([self.by, "vcm_type"])
+                    .agg(
+                        voc_chi_ph=("duration", "count"),
+                        voc_dur_chi_ph=("duration", "sum"),
+                        avg_voc_dur_chi=("duration", "mean"),
+                    )
+                    .unstack("vcm_type")
+                    .reindex(units)
                 )
 
-        self.metrics.set_index(self.by, inplace=True)
-        return self.metrics
+                rates = {}
+                for vcm_type, prefix in [("Y", "cry"), ("C", "can"), ("N", "non_can")]:
+                    count = self._get_column(vcm_stats, "voc_chi_ph", vcm_type)
+                    has_type = has_vcm & (count > 0)
+
+                    for column in ["voc_chi_ph", "voc_dur_chi_ph"]:
+                        name = "{}_{}".format(prefix, column)
+                        rates[name] = rate * np.nan_to_num(
+                            self._get_column(vcm_stats, column, vcm_type)
+                        )
+                        columns[name] = rates[name]
+                        assigned[name] = has_vcm
+
+                    name = "avg_{}_voc_dur_chi".format(prefix)
+                    columns[name] = rate * self._get_column(
+                        vcm_stats, "avg_voc_dur_chi", vcm_type
+                    )
+                    assigned[name] = has_type
+
+                speech_voc = rates["can_voc_chi_ph"] + rates["non_can_voc_chi_ph"]
+                speech_dur = (
+                    rates["can_voc_dur_chi_ph"] + rates["non_can_voc_dur_chi_ph"]
+                )
+
+                cry_voc = rates["cry_voc_chi_ph"]
+                cry_dur = rates["cry_voc_dur_chi_ph"]
+
+                has_proportions = has_vcm & (speech_voc + cry_voc != 0)
+
+                columns["lp_n"] = speech_voc / (speech_voc + cry_voc)
+                columns["cp_n"] = rates["can_voc_chi_ph"] / speech_voc
+                columns["lp_dur"] = speech_dur / (speech_dur + cry_dur)
+                columns["cp_dur"] = rates["can_voc_dur_chi_ph"] / speech_dur
+
+                for name in ["lp_n", "cp_n", "lp_dur", "cp_dur"]:
+                    assigned[name] = has_proportions
+
+        columns["child_id"] = self._child_ids(units)
+        columns["duration"] = unit_duration
+        self._add_unit_columns(columns, units)
+
+        for name in columns:
+            if name not in assigned:
+                assigned[name] = processed
+
+        return self._metrics_table(units, columns, assigned, split)
 
     @staticmethod
     def add_parser(subparsers, subcommand):
@@ -590,6 +1381,13 @@ class AclewMetrics(Metrics):
         parser.add_argument(
             "--threads", help="amount of threads to run on", default=1, type=int
         )
+        parser.add_argument(
+            "--engine",
+            help="compute the metrics of each unit separately (unit), or of all units at once (grouped)",
+            choices=AclewMetrics.ENGINES,
+            default="unit",
+        )
+        add_arguments(parser)
 
 
 class PeriodMetrics(Metrics):
@@ -630,9 +1428,16 @@ class PeriodMetrics(Metrics):
     :type by: str, optional
     :param threads: amount of threads to run on, defaults to 1
     :type threads: int, optional
+    :param backend: how to run the tasks (serial, thread or process), defaults to None (see :class:`~ChildProject.parallel.Executor`)
+    :type backend: str, optional
+    :param chunksize: amount of units sent to a worker at once, defaults to None
+    :type chunksize: int, optional
+    :param engine: ``grouped`` to load the segments of all units at once and bin them in one pass, or ``unit`` to process each unit separately (only the segments of one unit are held in memory at a time). Both produce the same output. Defaults to ``grouped``.
+    :type engine: str, optional
     """
 
     SUBCOMMAND = "period"
+    ENGINES = ["unit", "grouped"]
 
     def __init__(
         self,
@@ -647,12 +1452,26 @@ class PeriodMetrics(Metrics):
         child_cols: str = None,
         by: str = "recording_filename",
         threads: int = 1,
+        backend: str = None,
+        chunksize: int = None,
+        engine: str = "grouped",
     ):
 
-        super().__init__(project, by, recordings, from_time, to_time, rec_cols, child_cols)
+        super().__init__(
+            project,
+            by,
+            recordings,
+            from_time,
+            to_time,
+            rec_cols,
+            child_cols,
+            threads=threads,
+            backend=backend,
+            chunksize=chunksize,
+            engine=engine,
+        )
 
         self.set = set
-        self.threads = int(threads)
 
         self.period = period
         self.period_origin = period_origin
@@ -673,153 +1492,163 @@ class PeriodMetrics(Metrics):
             closed="left",
         )
 
-    def _process_unit(self, unit: str):
-        annotations, segments = self.retrieve_segments([self.set], unit)
+    def _period_metrics(
+        self, units: pd.Index, annotations: pd.DataFrame, segments: pd.DataFrame
+    ) -> pd.DataFrame:
+        """compute the metrics of every time bin for all ``units`` at once,
+        given their annotations and segments"""
+        day = 86400
+        origin = self.periods[0]
+
+        # bounds of the bins, in seconds (and nanoseconds) since the first one
+        edges = np.append((self.periods - origin).total_seconds().values, day)
+        edges_ns = (self.periods - origin).values.astype(np.int64)
+        n_bins = len(self.periods)
+
+        if not len(segments):
+            return pd.DataFrame()
 
         # retrieve timestamps for each vocalization, ignoring the day of occurence
         segments = self.am.get_segments_timestamps(segments, ignore_date=True)
 
         # dropping segments for which no time information is available
-        segments.dropna(subset=["onset_time"], inplace=True)
+        segments = segments.dropna(subset=["onset_time"])
 
-        # update the timestamps so that all vocalizations appear
-        # to happen on the same day
-        segments["onset_time"] -= pd.to_timedelta(
-            86400
-            * ((segments["onset_time"] - self.periods[0]).dt.total_seconds() // 86400),
-            unit="s",
-        )
-
-        if len(segments) == 0:
+        units = units[units.isin(segments[self.by].unique())]
+        if not len(units):
             return pd.DataFrame()
 
-        # calculate length of available annotations within each bin.
-        # this is necessary in order to calculate correct rates
-        bins = np.array(
-            [dt.total_seconds() for dt in self.periods - self.periods[0]] + [86400]
-        )
+        # bin of each vocalization, as if all of them happened on the same day
+        onsets = (segments["onset_time"] - origin).values.astype(np.int64)
+        bins = np.searchsorted(edges_ns, onsets % (day * 10 ** 9), side="right") - 1
+        keys = units.get_indexer(segments[self.by]) * n_bins + bins
+        size = len(units) * n_bins
 
         # retrieve the timestamps for all annotated portions of the recordings
         annotations = self.am.get_segments_timestamps(
             annotations, ignore_date=True, onset="range_onset", offset="range_offset"
         )
+        annotations = annotations.dropna(subset=["onset_time", "offset_time"])
+        annotations = annotations[annotations[self.by].isin(units)]
+
+        # whole seconds elapsed since the first time bin
+        onset = (annotations["onset_time"] - origin).values.astype(np.int64) // 10 ** 9
+        offset = (annotations["offset_time"] - origin).values.astype(np.int64)
+        offset //= 10 ** 9
+
+        # split annotations into portions each within a 0-24h range
+        first_day = onset // day
+        portions = np.maximum((offset - 1) // day - first_day + 1, 0)
+        rows = np.repeat(np.arange(len(annotations)), portions)
+        days = first_day[rows] + (
+            np.arange(len(rows)) - np.repeat(np.cumsum(portions) - portions, portions)
+        )
+        starts = np.maximum(onset[rows], days * day) - days * day
+        stops = np.minimum(offset[rows], (days + 1) * day) - days * day
+        codes = units.get_indexer(annotations[self.by])[rows] * n_bins
 
-        # calculate time elapsed since the first time bin
-        annotations["onset_time"] = (
-            annotations["onset_time"]
-            .apply(lambda dt: (dt - self.periods[0]).total_seconds())
-            .astype(int)
+        # calculate length of available annotations within each bin.
+        # this is necessary in order to calculate correct rates.
+        # each portion covers the bin of its start up to the bin of its stop,
+        # and all the bins in-between, which are added through a difference array
+        first = np.searchsorted(edges, starts, side="right") - 1
+        last = np.searchsorted(edges, stops, side="left") - 1
+        single = first == last
+
+        durations = np.bincount(
+            codes + first,
+            weights=np.where(single, stops, edges[first + 1]) - starts,
+            minlength=size,
         )
-        annotations["offset_time"] = (
-            annotations["offset_time"]
-            .apply(lambda dt: (dt - self.periods[0]).total_seconds())
-            .astype(int)
+        durations += np.bincount(
+            codes[~single] + last[~single],
+            weights=stops[~single] - edges[last[~single]],
+            minlength=size,
         )
 
-        # split annotations to intervals each within a 0-24h range
-        annotations["stops"] = annotations.apply(
-            lambda row: [row["onset_time"]]
-            + list(
-                86400
-                * np.arange(
-                    (row["onset_time"] // 86400) + 1,
-                    (row["offset_time"] // 86400) + 1,
-                    1,
-                )
-            )
-            + [row["offset_time"]],
-            axis=1,
+        covered = np.bincount(
+            codes[~single] + first[~single] + 1, minlength=size + 1
+        ) - np.bincount(codes[~single] + last[~single], minlength=size + 1)
+        durations += np.cumsum(covered)[:size] * np.tile(np.diff(edges), len(units))
+
+        # portions end 0.1ms before their offset
+        durations -= 1e-4 * np.bincount(codes + last, minlength=size)
+
+        metrics = pd.DataFrame(
+            index=pd.DatetimeIndex(np.tile(self.periods, len(units)))
         )
 
-        annotations = annotations.explode("stops")
-        annotations["onset"] = annotations["stops"]
-        annotations["offset"] = annotations["stops"].shift(-1)
+        speaker_types = ["FEM", "MAL", "CHI", "OCH"]
 
-        annotations.dropna(subset=["offset"], inplace=True)
-        annotations["onset"] = annotations["onset"].astype(int) % 86400
-        annotations["offset"] = (annotations["offset"] - 1e-4) % 86400
+        with np.errstate(divide="ignore", invalid="ignore"):
+            for speaker in speaker_types:
+                vocs = (segments["speaker_type"] == speaker).values
 
-        durations = [
-            (
-                annotations["offset"].clip(bins[i], bins[i + 1])
-                - annotations["onset"].clip(bins[i], bins[i + 1])
-            ).sum()
-            for i, t in enumerate(bins[:-1])
-        ]
+                count = np.bincount(keys[vocs], minlength=size)
+                total = np.bincount(
+                    keys[vocs],
+                    weights=segments["duration"].values[vocs],
+                    minlength=size,
+                )
 
-        durations = pd.Series(durations, index=self.periods)
-        metrics = pd.DataFrame(index=self.periods)
+                metrics["voc_{}_ph".format(speaker.lower())] = (
+                    count * 3600 / durations
+                )
+                metrics["voc_dur_{}_ph".format(speaker.lower())] = (
+                    total * 3600 / durations
+                )
+                metrics["avg_voc_dur_{}".format(speaker.lower())] = total / count
 
-        grouper = pd.Grouper(key="onset_time", freq=self.period, closed="left")
+        #add duration and child_id to dataframe as they are always given
+        metrics["duration"] = (durations * 1000).astype(int)
+        metrics[self.by] = np.repeat(units.values, n_bins)
 
-        speaker_types = ["FEM", "MAL", "CHI", "OCH"]
-        adults = ["FEM", "MAL"]
+        # get child_id and the columns of children.csv and recordings.csv asked
+        columns = {"child_id": self._child_ids(units)}
+        self._add_unit_columns(columns, units)
 
-        for speaker in speaker_types:
-            vocs = segments[segments["speaker_type"] == speaker].groupby(grouper)
+        for label, values in columns.items():
+            metrics[label] = pd.Series(
+                np.repeat(values, n_bins), index=metrics.index
+            ).infer_objects()
 
-            vocs = vocs.agg(
-                voc_ph=("segment_onset", "count"),
-                voc_dur_ph=("duration", "sum"),
-                avg_voc_dur=("duration", "mean"),
-            )
+        return metrics
 
-            metrics["voc_{}_ph".format(speaker.lower())] = (
-                vocs["voc_ph"].reindex(self.periods, fill_value=0) * 3600 / durations
-            )
-            metrics["voc_dur_{}_ph".format(speaker.lower())] = (
-                vocs["voc_dur_ph"].reindex(self.periods, fill_value=0)
-                * 3600
-                / durations
-            )
-            metrics["avg_voc_dur_{}".format(speaker.lower())] = vocs[
-                "avg_voc_dur"
-            ].reindex(self.periods)
+    def _cache_parameters(self) -> dict:
+        parameters = super()._cache_parameters()
+        parameters.update(
+            sets=[self.set], period=self.period, period_origin=self.period_origin
+        )
+        return parameters
+
+    def _process_unit(self, unit: str):
+        annotations, segments = self.retrieve_segments(
+            [self.set], unit, columns=["speaker_type"]
+        )
+        return self._period_metrics(pd.Index([unit]), annotations, segments)
+
+    def _process_all(self, units: np.ndarray, split: bool = False):
+        annotations, segments = self.retrieve_all_segments(
+            [self.set], units, columns=["speaker_type"]
+        )
+        metrics = self._period_metrics(pd.Index(units), annotations, segments)
+
+        if split:
+            if not len(metrics):
+                return [metrics] * len(units)
+
+            return [metrics[metrics[self.by] == unit] for unit in units]
 
-        #add duration and child_id to dataframe as they are always given
-        metrics["duration"] = (durations * 1000).astype(int)
-        metrics[self.by] = unit
-        metrics["child_id"] = self.project.recordings[
-            self.project.recordings[self.by] == unit
-        ]["child_id"].iloc[0]
-        
-        #get and add to dataframe children.csv columns asked
-        if self.child_cols:
-            for label in self.child_cols:
-                metrics[label]=self.project.children[
-                        self.project.children["child_id"] == metrics["child_id"].iloc[0]
-                ][label].iloc[0]
-                
-        #get and add to dataframe recordings.csv columns asked
-        if self.rec_cols:
-            for label in self.rec_cols:
-                #for every unit drop the duplicates for that column
-                value=self.project.recordings[
-                        self.project.recordings[self.by] == unit
-                ][label].drop_duplicates()
-                #check that there is only one row remaining (ie this column has a unique value for that unit)
-                if len(value) == 1:
-                    metrics[label]=value.iloc[0]
-                #otherwise, leave the column as NA
-                else:
-                    metrics[label]="NA"
-        
         return metrics
 
-    def extract(self):
-        recordings = self.project.get_recordings_from_list(self.recordings)
+    def _results_table(self, results: list) -> pd.DataFrame:
+        results = [metrics for metrics in results if len(metrics)]
+        return pd.concat(results) if results else pd.DataFrame()
 
-        if self.threads == 1:
-            self.metrics = pd.concat(
-                [self._process_unit(unit) for unit in recordings[self.by].unique()]
-            )
-        else:
-            with mp.Pool(
-                processes=self.threads if self.threads >= 1 else mp.cpu_count()
-            ) as pool:
-                self.metrics = pd.concat(
-                    pool.map(self._process_unit, recordings[self.by].unique())
-                )
+    def extract(self, units: np.ndarray = None):
+        self.metrics = self._compute(
+            self._units() if units is None else np.asarray(units)
+        )
 
         if len(self.metrics):
             self.metrics["period"] = self.metrics.index.strftime("%H:%M:%S")
@@ -847,13 +1676,37 @@ class PeriodMetrics(Metrics):
         parser.add_argument(
             "--threads", help="amount of threads to run on", default=1, type=int
         )
+        parser.add_argument(
+            "--engine",
+            help="bin the segments of all units at once (grouped), or of each unit separately (unit)",
+            choices=PeriodMetrics.ENGINES,
+            default="grouped",
+        )
+        add_arguments(parser)
 
 
 class MetricsPipeline(Pipeline):
     def __init__(self):
         self.metrics = []
 
-    def run(self, path, destination, pipeline, func=None, **kwargs):
+    def run(self, path, destination, pipeline, func=None, update=None, **kwargs):
+        """compute metrics from the annotations of a dataset
+
+        The fingerprint of the inputs of each unit is saved along with the output
+        (``<destination>.fingerprints.json``), so that ``update`` can later
+        recompute the metrics of the units whose annotations or metadata changed only.
+
+        :param path: path to the dataset
+        :type path: str
+        :param destination: output CSV file
+        :type destination: str
+        :param pipeline: metrics pipeline (e.g. aclew, lena or period)
+        :type pipeline: str
+        :param update: path to the output of a previous run, with the same options, to update. Only units with new or changed annotations or metadata are computed again, and their metrics replace those of the previous run. Defaults to None.
+        :type update: str, optional
+        :return: metrics
+        :rtype: pd.DataFrame
+        """
         self.project = ChildProject.projects.ChildProject(path)
         self.project.read()
 
@@ -861,13 +1714,100 @@ class MetricsPipeline(Pipeline):
             raise NotImplementedError(f"invalid pipeline '{pipeline}'")
 
         metrics = pipelines[pipeline](self.project, **kwargs)
-        metrics.extract()
 
-        self.metrics = metrics.metrics
-        self.metrics.to_csv(destination)
+        units = metrics._units()
+        fingerprints = {
+            str(unit): key for unit, key in zip(units, metrics._cache_keys(units))
+        }
+
+        if update is not None and not os.path.exists(update):
+            print("'{}' does not exist yet, computing all units".format(update))
+            update = None
+
+        if update is None:
+            metrics.extract(units)
+            self.metrics = metrics.metrics
+        else:
+            self.metrics, fingerprints = self.update(metrics, update, fingerprints)
+
+        def write_fingerprints(path):
+            with open(path, "w") as f:
+                json.dump({"by": metrics.by, "units": fingerprints}, f)
+
+        # the fingerprints are written last, so that units are computed again
+        # if the metrics could not be written
+        cache.write_atomic(destination, lambda path: self.metrics.to_csv(path))
+        cache.write_atomic(self.fingerprints_path(destination), write_fingerprints)
 
         return self.metrics
 
+    @staticmethod
+    def fingerprints_path(destination: str) -> str:
+        return "{}.fingerprints.json".format(destination)
+
+    def update(self, metrics: Metrics, existing: str, fingerprints: dict) -> tuple:
+        """update the metrics of a previous run, computing only the units
+        whose fingerprint changed (or that are missing from the previous run)
+
+        :param metrics: metrics pipeline
+        :type metrics: Metrics
+        :param existing: path to the output of the previous run
+        :type existing: str
+        :param fingerprints: current fingerprint of each unit to compute
+        :type fingerprints: dict
+        :return: updated metrics (without the units that are no longer selected), and the fingerprints of their units
+        :rtype: Tuple[pd.DataFrame, dict]
+        """
+        try:
+            with open(self.fingerprints_path(existing), "r") as f:
+                previous = json.load(f)
+        except (OSError, ValueError):
+            previous = {}
+
+        # former fingerprints are only relevant for the same units
+        if previous.get("by") != metrics.by:
+            previous = {}
+        previous = previous.get("units", {})
+
+        # the metrics of the units that are not computed again are kept as written
+        table = pd.read_csv(
+            existing,
+            index_col=metrics.by,
+            dtype=str,
+            keep_default_na=False,
+            na_values=[""],
+        )
+
+        units = metrics._units()
+        # units may have no rows (e.g. period metrics of units without annotations)
+        changed = [
+            unit for unit in units if previous.get(str(unit)) != fingerprints[str(unit)]
+        ]
+
+        print(
+            "{} unit(s) out of {} with new or changed annotations or metadata".format(
+                len(changed), len(units)
+            )
+        )
+
+        # units that are no longer selected (e.g. removed recordings) are dropped
+        table = table[table.index.isin([str(unit) for unit in units])]
+
+        if not changed:
+            return table, fingerprints
+
+        updated = metrics.extract(changed).copy()
+        updated.index = updated.index.astype(str)
+
+        # units keep their position, new units are appended
+        order = list(dict.fromkeys(list(table.index) + list(updated.index)))
+        table = pd.concat(
+            [table[~table.index.isin([str(unit) for unit in changed])], updated]
+        )
+        table = table.loc[[unit for unit in order if unit in table.index]]
+
+        return table, fingerprints
+
     @staticmethod
     def setup_parser(parser):
         parser.add_argument("path", help="path to the dataset")
@@ -915,3 +1855,9 @@ class MetricsPipeline(Pipeline):
             help="columns from children.csv to include in the outputted metrics (optional)",
             default=None,
         )
+
+        parser.add_argument(
+            "--update",
+            help="path to the output of a previous run with the same options (e.g. the destination itself); only units with new or changed annotations or metadata are computed again, the others are copied from it, and units that are no longer selected are dropped",
+            default=None,
+        )
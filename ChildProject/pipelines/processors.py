@@ -1,7 +1,6 @@
 from abc import ABC, abstractmethod
 import argparse
 import datetime
-import multiprocessing as mp
 import numpy as np
 import os, glob
 import sys
@@ -12,6 +11,7 @@ from typing import Union, List
 from yaml import dump
 
 import ChildProject
+from ChildProject.parallel import Executor, TaskError, add_arguments, report_errors
 from ChildProject.pipelines.pipeline import Pipeline
 
 pipelines = {}
@@ -25,11 +25,15 @@ class AudioProcessor(ABC):
         input_profile: str = None,
         threads: int = 1,
         recordings: Union[str, List[str], pd.DataFrame] = None,
+        backend: str = None,
+        chunksize: int = None,
     ):
 
         self.project = project
         self.name = name
         self.threads = int(threads)
+        self.backend = backend
+        self.chunksize = chunksize
         self.recordings = Pipeline.recordings_from_list(recordings)
 
         self.input_profile = input_profile
@@ -82,15 +86,28 @@ class AudioProcessor(ABC):
 
         os.makedirs(name=self.output_directory(), exist_ok=True)
 
-        if self.threads == 1:
-            self.converted = [
-                self.process_recording(recording)
-                for recording in recordings.to_dict("records")
-            ]
-        else:
-            with mp.Pool(processes=self.threads) as pool:
-                self.converted = pool.map(
-                    self.process_recording, recordings.to_dict("records")
+        with Executor(
+            self.threads, self.backend, self.chunksize, target=self
+        ) as executor:
+            self.converted = executor.map(
+                "process_recording", recordings.to_dict("records"), capture_errors=True
+            )
+
+        # failed recordings are reported as unsuccessful conversions
+        for i, result in enumerate(self.converted):
+            if isinstance(result, TaskError):
+                report_errors(
+                    [result], lambda task: "'{}'".format(task["recording_filename"])
+                )
+                self.converted[i] = pd.DataFrame(
+                    [
+                        {
+                            "original_filename": result.task["recording_filename"],
+                            "converted_filename": "",
+                            "success": False,
+                            "error": str(result),
+                        }
+                    ]
                 )
 
         previously_converted = self.read_metadata()
@@ -136,12 +153,16 @@ class BasicProcessor(AudioProcessor):
         recordings: Union[str, List[str], pd.DataFrame] = None,
         skip_existing: bool = False,
         input_profile: str = None,
+        backend: str = None,
+        chunksize: int = None,
     ):
 
         super().__init__(
             project,
             name,
             threads=threads,
+            backend=backend,
+            chunksize=chunksize,
             recordings=recordings,
             input_profile=input_profile,
         )
@@ -298,12 +319,16 @@ class VettingProcessor(AudioProcessor):
         threads: int = 1,
         recordings: Union[str, List[str], pd.DataFrame] = None,
         input_profile: str = None,
+        backend: str = None,
+        chunksize: int = None,
     ):
 
         super().__init__(
             project,
             name,
             threads=threads,
+            backend=backend,
+            chunksize=chunksize,
             recordings=recordings,
             input_profile=input_profile,
         )
@@ -388,12 +413,16 @@ class ChannelMapper(AudioProcessor):
         threads: int = 1,
         recordings: Union[str, List[str], pd.DataFrame] = None,
         input_profile: str = None,
+        backend: str = None,
+        chunksize: int = None,
     ):
 
         super().__init__(
             project,
             name,
             threads=threads,
+            backend=backend,
+            chunksize=chunksize,
             recordings=recordings,
             input_profile=input_profile,
         )
@@ -474,6 +503,8 @@ class AudioProcessingPipeline(Pipeline):
         processor: str,
         threads: int = 1,
         func=None,
+        backend: str = None,
+        chunksize: int = None,
         **kwargs,
     ):
         parameters = locals()
@@ -491,7 +522,14 @@ class AudioProcessingPipeline(Pipeline):
         if processor not in pipelines:
             raise NotImplementedError(f"invalid pipeline '{processor}'")
 
-        proc = pipelines[processor](self.project, name, threads=threads, **kwargs)
+        proc = pipelines[processor](
+            self.project,
+            name,
+            threads=threads,
+            backend=backend,
+            chunksize=chunksize,
+            **kwargs,
+        )
         proc.process(f"parameters_{date}.yml")
 
         print("exported audio to {}".format(proc.output_directory()))
@@ -527,6 +565,7 @@ class AudioProcessingPipeline(Pipeline):
             default=1,
             type=int,
         )
+        add_arguments(parser)
 
         parser.add_argument(
             "--input-profile",
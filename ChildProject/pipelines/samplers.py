@@ -1,7 +1,6 @@
 from abc import ABC, abstractmethod
 import argparse
 import datetime
-import multiprocessing as mp
 import numpy as np
 import os
 import pandas as pd
@@ -12,6 +11,8 @@ from typing import Union, List
 from yaml import dump
 
 import ChildProject
+from ChildProject.intervals import IntervalSet
+from ChildProject.parallel import Executor, add_arguments, report_errors
 from ChildProject.pipelines.pipeline import Pipeline
 
 pipelines = {}
@@ -31,6 +32,10 @@ class Sampler(ABC):
         self.annotation_set = ""
         self.target_speaker_type = []
 
+        self.threads = 1
+        self.backend = None
+        self.chunksize = None
+
         self.recordings = Pipeline.recordings_from_list(recordings)
 
         if exclude is None:
@@ -58,6 +63,17 @@ class Sampler(ABC):
     def _sample(self):
         pass
 
+    def _map(self, method: str, tasks, describe=str) -> list:
+        """call ``method`` for each task, in parallel depending on
+        ``threads``, ``backend`` and ``chunksize``. Failures are reported
+        (with ``describe(task)``) and their results left out."""
+        with Executor(
+            self.threads, self.backend, self.chunksize, target=self
+        ) as executor:
+            results = executor.map(method, tasks, capture_errors=True)
+
+        return report_errors(results, describe)
+
     @staticmethod
     @abstractmethod
     def add_parser(parsers):
@@ -68,7 +84,16 @@ class Sampler(ABC):
         self.remove_excluded()
         return self.segments
 
-    def retrieve_segments(self, recording_filename=None):
+    def retrieve_segments(self, recording_filename=None, columns: List[str] = None):
+        """retrieve the segments of the annotation set of the sampler.
+
+        :param recording_filename: if specified, only retrieve the segments of this recording, defaults to None
+        :type recording_filename: str, optional
+        :param columns: columns of the segments to load (see :meth:`~ChildProject.annotations.AnnotationManager.get_segments`), defaults to None (all columns)
+        :type columns: List[str], optional
+        :return: segments, or None if there are none
+        :rtype: pd.DataFrame
+        """
         am = ChildProject.annotations.AnnotationManager(self.project)
         annotations = am.annotations
         annotations = annotations[annotations["set"] == self.annotation_set]
@@ -82,7 +107,7 @@ class Sampler(ABC):
             return None
 
         try:
-            segments = am.get_segments(annotations)
+            segments = am.get_segments(annotations, columns=columns)
         except:
             return None
 
@@ -95,42 +120,16 @@ class Sampler(ABC):
         if len(self.excluded) == 0:
             return
 
-        from pyannote.core import Segment, Timeline
-
         segments = []
         for recording, _segments in self.segments.groupby("recording_filename"):
-            sampled = Timeline(
-                segments=[
-                    Segment(segment_onset, segment_offset)
-                    for segment_onset, segment_offset in _segments[
-                        ["segment_onset", "segment_offset"]
-                    ].values
-                ]
-            )
-
-            excl_segments = self.excluded.loc[
-                self.excluded["recording_filename"] == recording
-            ]
-            excl = Timeline(
-                segments=[
-                    Segment(segment_onset, segment_offset)
-                    for segment_onset, segment_offset in excl_segments[
-                        ["segment_onset", "segment_offset"]
-                    ].values
-                ]
+            sampled = IntervalSet.from_dataframe(_segments)
+            excl = IntervalSet.from_dataframe(
+                self.excluded.loc[self.excluded["recording_filename"] == recording]
             )
 
-            # sampled = sampled.extrude(sampled) # not released yet
-            extent_tl = Timeline([sampled.extent()], uri=sampled.uri)
-            truncating_support = excl.gaps(support=extent_tl)
-            sampled = sampled.crop(truncating_support, mode="intersection")
-
-            segments.append(
-                pd.DataFrame(
-                    [[recording, s.start, s.end] for s in sampled],
-                    columns=["recording_filename", "segment_onset", "segment_offset"],
-                )
-            )
+            sampled = sampled.difference(excl).to_dataframe()
+            sampled.insert(0, "recording_filename", recording)
+            segments.append(sampled)
 
         self.segments = pd.concat(segments)
 
@@ -308,6 +307,10 @@ class RandomVocalizationSampler(Sampler):
     :type recordings: Union[str, List[str], pd.DataFrame], optional
     :param threads: amount of threads to run on, defaults to 1
     :type threads: int, optional
+    :param backend: how to run the tasks (serial, thread or process), defaults to None (see :class:`~ChildProject.parallel.Executor`)
+    :type backend: str, optional
+    :param chunksize: amount of units sent to a worker at once, defaults to None
+    :type chunksize: int, optional
     """
 
     SUBCOMMAND = "random-vocalizations"
@@ -322,6 +325,8 @@ class RandomVocalizationSampler(Sampler):
         by: str = "recording_filename",
         recordings: Union[str, List[str], pd.DataFrame] = None,
         exclude: Union[str, pd.DataFrame] = None,
+        backend: str = None,
+        chunksize: int = None,
     ):
 
         super().__init__(project, recordings, exclude)
@@ -329,6 +334,8 @@ class RandomVocalizationSampler(Sampler):
         self.target_speaker_type = target_speaker_type
         self.sample_size = sample_size
         self.threads = threads
+        self.backend = backend
+        self.chunksize = chunksize
         self.by = by
 
     def _get_segments(self, recording):
@@ -358,13 +365,11 @@ class RandomVocalizationSampler(Sampler):
     def _sample(self):
         recordings = self.project.get_recordings_from_list(self.recordings)
 
-        if self.threads == 1:
-            self.segments = map(self._sample_unit, recordings.groupby(self.by))
-        else:
-            with mp.Pool(
-                processes=self.threads if self.threads >= 1 else mp.cpu_count()
-            ) as pool:
-                self.segments = pool.map(self._sample_unit, recordings.groupby(self.by))
+        self.segments = self._map(
+            "_sample_unit",
+            recordings.groupby(self.by),
+            lambda task: "{} '{}'".format(self.by, task[0]),
+        )
 
         self.segments = pd.concat(self.segments)
 
@@ -390,6 +395,7 @@ class RandomVocalizationSampler(Sampler):
         parser.add_argument(
             "--threads", help="amount of threads to run on", default=1, type=int
         )
+        add_arguments(parser)
         parser.add_argument(
             "--by",
             help="units to sample from (default behavior is to sample by recording)",
@@ -424,6 +430,10 @@ class EnergyDetectionSampler(Sampler):
     :type recordings: Union[str, List[str], pd.DataFrame], optional
     :param threads: amount of threads to run on, defaults to 1
     :type threads: int, optional
+    :param backend: how to run the tasks (serial, thread or process), defaults to None (see :class:`~ChildProject.parallel.Executor`)
+    :type backend: str, optional
+    :param chunksize: amount of units sent to a worker at once, defaults to None
+    :type chunksize: int, optional
     """
 
     SUBCOMMAND = "energy-detection"
@@ -443,6 +453,8 @@ class EnergyDetectionSampler(Sampler):
         by: str = "recording_filename",
         recordings: Union[str, List[str], pd.DataFrame] = None,
         exclude: Union[str, pd.DataFrame] = None,
+        backend: str = None,
+        chunksize: int = None,
     ):
 
         super().__init__(project, recordings, exclude)
@@ -454,6 +466,8 @@ class EnergyDetectionSampler(Sampler):
         self.low_freq = low_freq
         self.high_freq = high_freq
         self.threads = threads
+        self.backend = backend
+        self.chunksize = chunksize
         self.profile = profile
         self.by = by
 
@@ -540,22 +554,13 @@ class EnergyDetectionSampler(Sampler):
     def _sample(self):
         recordings = self.project.get_recordings_from_list(self.recordings)
 
-        if self.threads == 1:
-            windows = pd.concat(
-                [
-                    self.get_recording_windows(r)
-                    for r in recordings.to_dict(orient="records")
-                ]
+        windows = pd.concat(
+            self._map(
+                "get_recording_windows",
+                recordings.to_dict(orient="records"),
+                lambda task: "'{}'".format(task["recording_filename"]),
             )
-        else:
-            with mp.Pool(
-                processes=self.threads if self.threads >= 1 else mp.cpu_count()
-            ) as pool:
-                windows = pd.concat(
-                    pool.map(
-                        self.get_recording_windows, recordings.to_dict(orient="records")
-                    )
-                )
+        )
 
         windows = windows.set_index(self.by).merge(
             windows.groupby(self.by).agg(
@@ -622,6 +627,7 @@ class EnergyDetectionSampler(Sampler):
         parser.add_argument(
             "--threads", help="amount of threads to run on", default=1, type=int
         )
+        add_arguments(parser)
         parser.add_argument(
             "--profile",
             help="name of the profile of recordings to use (uses raw recordings if empty)",
@@ -663,6 +669,10 @@ class HighVolubilitySampler(Sampler):
     :type recordings: Union[str, List[str], pd.DataFrame], optional
     :param threads: amount of threads to run the sampler on
     :type threads: int
+    :param backend: how to run the tasks (serial, thread or process), defaults to None (see :class:`~ChildProject.parallel.Executor`)
+    :type backend: str, optional
+    :param chunksize: amount of units sent to a worker at once, defaults to None
+    :type chunksize: int, optional
     """
 
     SUBCOMMAND = "high-volubility"
@@ -679,6 +689,8 @@ class HighVolubilitySampler(Sampler):
         by: str = "recording_filename",
         recordings: Union[str, List[str], pd.DataFrame] = None,
         exclude: Union[str, pd.DataFrame] = None,
+        backend: str = None,
+        chunksize: int = None,
     ):
 
         super().__init__(project, recordings, exclude)
@@ -688,10 +700,15 @@ class HighVolubilitySampler(Sampler):
         self.windows_count = windows_count
         self.speakers = speakers
         self.threads = threads
+        self.backend = backend
+        self.chunksize = chunksize
         self.by = by
 
     def _segment_scores(self, recording):
-        segments = self.retrieve_segments(recording["recording_filename"])
+        segments = self.retrieve_segments(
+            recording["recording_filename"],
+            columns=["speaker_type", "lena_conv_turn_type", "utterances_count", "words"],
+        )
 
         if segments is None:
             print(
@@ -801,13 +818,11 @@ class HighVolubilitySampler(Sampler):
     def _sample(self):
         recordings = self.project.get_recordings_from_list(self.recordings)
 
-        if self.threads == 1:
-            self.segments = map(self._sample_unit, recordings.groupby(self.by))
-        else:
-            with mp.Pool(
-                processes=self.threads if self.threads >= 1 else mp.cpu_count()
-            ) as pool:
-                self.segments = pool.map(self._sample_unit, recordings.groupby(self.by))
+        self.segments = self._map(
+            "_sample_unit",
+            recordings.groupby(self.by),
+            lambda task: "{} '{}'".format(self.by, task[0]),
+        )
 
         self.segments = pd.concat(self.segments)
 
@@ -845,6 +860,7 @@ class HighVolubilitySampler(Sampler):
         parser.add_argument(
             "--threads", help="amount of threads to run on", default=1, type=int
         )
+        add_arguments(parser)
         parser.add_argument(
             "--by",
             help="units to sample from (default behavior is to sample by recording)",
@@ -874,6 +890,10 @@ class ConversationSampler(Sampler):
     :type recordings: Union[str, List[str], pd.DataFrame], optional
     :param exclude: portions to exclude, defaults to None
     :type exclude: Union[str, pd.DataFrame], optional
+    :param backend: how to run the tasks (serial, thread or process), defaults to None (see :class:`~ChildProject.parallel.Executor`)
+    :type backend: str, optional
+    :param chunksize: amount of units sent to a worker at once, defaults to None
+    :type chunksize: int, optional
     """
 
     SUBCOMMAND = "conversations"
@@ -889,6 +909,8 @@ class ConversationSampler(Sampler):
         by: str = "recording_filename",
         recordings: Union[str, List[str], pd.DataFrame] = None,
         exclude: Union[str, pd.DataFrame] = None,
+        backend: str = None,
+        chunksize: int = None,
     ):
 
         super().__init__(project, recordings, exclude)
@@ -897,10 +919,14 @@ class ConversationSampler(Sampler):
         self.count = count
         self.speakers = speakers
         self.threads = threads
+        self.backend = backend
+        self.chunksize = chunksize
         self.by = by
 
     def _retrieve_conversations(self, recording):
-        segments = self.retrieve_segments(recording["recording_filename"])
+        segments = self.retrieve_segments(
+            recording["recording_filename"], columns=["speaker_type"]
+        )
 
         if segments is None or "speaker_type" not in segments.columns:
             print(
@@ -963,13 +989,11 @@ class ConversationSampler(Sampler):
     def _sample(self):
         recordings = self.project.get_recordings_from_list(self.recordings)
 
-        if self.threads == 1:
-            self.segments = map(self._sample_unit, recordings.groupby(self.by))
-        else:
-            with mp.Pool(
-                processes=self.threads if self.threads >= 1 else mp.cpu_count()
-            ) as pool:
-                self.segments = pool.map(self._sample_unit, recordings.groupby(self.by))
+        self.segments = self._map(
+            "_sample_unit",
+            recordings.groupby(self.by),
+            lambda task: "{} '{}'".format(self.by, task[0]),
+        )
 
         self.segments = pd.concat(self.segments)
 
@@ -999,6 +1023,7 @@ class ConversationSampler(Sampler):
         parser.add_argument(
             "--threads", help="amount of threads to run on", default=1, type=int
         )
+        add_arguments(parser)
         parser.add_argument(
             "--by",
             help="units to sample from (default behavior is to sample by recording)",
@@ -3,7 +3,6 @@ import datetime
 import itertools
 import json
 import math
-import multiprocessing as mp
 import os
 import pandas as pd
 import shutil
@@ -16,6 +15,7 @@ from yaml import dump
 from pydub import AudioSegment
 
 import ChildProject
+from ChildProject.parallel import Executor, add_arguments
 from ChildProject.pipelines.pipeline import Pipeline
 from ChildProject.tables import assert_dataframe, assert_columns_presence
 
@@ -162,6 +162,8 @@ class ZooniversePipeline(Pipeline):
         chunks_min_amount: int = 1,
         profile: str = "",
         threads: int = 1,
+        backend: str = None,
+        chunksize: int = None,
         **kwargs
     ):
         """extract-audio chunks based on a list of segments and prepare them for upload
@@ -183,6 +185,10 @@ class ZooniversePipeline(Pipeline):
         :type profile: str
         :param threads: amount of threads to run-on, defaults to 0
         :type threads: int, optional
+        :param backend: how to split the recordings (serial, thread or process), defaults to None (see :class:`~ChildProject.parallel.Executor`)
+        :type backend: str, optional
+        :param chunksize: amount of recordings sent to a worker at once, defaults to None
+        :type chunksize: int, optional
         """
 
         parameters = locals()
@@ -220,11 +226,8 @@ class ZooniversePipeline(Pipeline):
         for _recording, _segments in self.segments.groupby("recording_filename"):
             segments.append(_segments.assign(recording_filename=_recording))
 
-        if threads == 1:
-            self.chunks = map(self._split_recording, segments)
-        else:
-            with mp.Pool(threads if threads > 0 else mp.cpu_count()) as pool:
-                self.chunks = pool.map(self._split_recording, segments)
+        with Executor(threads, backend, chunksize, target=self) as executor:
+            self.chunks = executor.map("_split_recording", segments)
 
         self.chunks = itertools.chain.from_iterable(self.chunks)
         self.chunks = pd.DataFrame(
@@ -531,6 +534,7 @@ class ZooniversePipeline(Pipeline):
         parser_extraction.add_argument(
             "--threads", help="how many threads to run on", default=0, type=int
         )
+        add_arguments(parser_extraction)
 
         parser_upload = subparsers.add_parser(
             "upload-chunks", help="upload chunks and updates chunk state"
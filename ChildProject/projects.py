@@ -15,6 +15,7 @@ from .tables import (
     assert_columns_presence,
 )
 from .utils import get_audio_duration, path_is_parent
+from . import cache
 
 
 class ChildProject:
@@ -37,10 +38,14 @@ class ChildProject:
     :type recordings: class:`pd.DataFrame`
     :param children: pandas dataframe representation of this dataset metadata/children.csv 
     :type children: class:`pd.DataFrame`
+    :param use_cache: (class attribute) whether parsed metadata are cached into .childproject/cache, defaults to True
+    :type use_cache: bool
     """
 
     REQUIRED_DIRECTORIES = ["recordings", "extra"]
 
+    use_cache = True
+
     CHILDREN_COLUMNS = [
         IndexColumn(
             name="experiment",
@@ -352,9 +357,67 @@ class ChildProject:
 
         return df
 
+    def _metadata_files(self) -> list:
+        files = [
+            os.path.join(self.path, "metadata/children.csv"),
+            os.path.join(self.path, "metadata/recordings.csv"),
+        ]
+
+        for table in ["children", "recordings"]:
+            files += sorted(
+                glob.glob(
+                    os.path.join(self.path, "metadata", table, "**/*.csv"),
+                    recursive=True,
+                )
+            )
+
+        return files
+
+    def _metadata_cache_key(self) -> str:
+        from . import __version__
+
+        return cache.hash_files(
+            self._metadata_files(),
+            root=self.path,
+            salt="{},{},{}".format(
+                __version__, self.enforce_dtypes, self.ignore_discarded
+            ),
+        )
+
     def read(self, verbose=False):
-        """Read the metadata
+        """Read the metadata.
+
+        Unless ``ChildProject.use_cache`` is False or ``verbose`` is True,
+        the parsed metadata are cached in ``.childproject/cache``
+        and reused as long as none of the metadata files have changed.
         """
+        use_cache = self.use_cache and not verbose
+
+        if use_cache:
+            key = self._metadata_cache_key()
+            cached = cache.load_pickle(
+                cache.cache_path(self.path, "metadata-{}.pkl".format(key))
+            )
+            cache.record(self.path, "metadata", cached is not None)
+
+            if cached is not None:
+                self.ct = IndexTable(
+                    "children",
+                    os.path.join(self.path, "metadata/children.csv"),
+                    self.CHILDREN_COLUMNS,
+                    enforce_dtypes=self.enforce_dtypes,
+                )
+                self.rt = IndexTable(
+                    "recordings",
+                    os.path.join(self.path, "metadata/recordings.csv"),
+                    self.RECORDINGS_COLUMNS,
+                    enforce_dtypes=self.enforce_dtypes,
+                )
+                self.ct.df, self.rt.df = cached
+                self.children = self.ct.df
+                self.recordings = self.rt.df
+                return
+
         self.ct = IndexTable(
             "children",
             os.path.join(self.path, "metadata/children.csv"),
@@ -392,6 +455,30 @@ class ChildProject:
         self.children = self.ct.df
         self.recordings = self.rt.df
 
+        if use_cache:
+            self._write_metadata_cache(key)
+
+    def _write_metadata_cache(self, key: str):
+        if not cache.writable(self.path):
+            return
+
+        path = cache.cache_path(self.path, "metadata-{}.pkl".format(key))
+
+        try:
+            cache.write_atomic(
+                path, lambda tmp: pd.to_pickle((self.ct.df, self.rt.df), tmp)
+            )
+        except OSError:
+            return
+
+        # only keep the latest version of the metadata
+        for previous in glob.glob(cache.cache_path(self.path, "metadata-*.pkl")):
+            if previous != path:
+                try:
+                    os.remove(previous)
+                except OSError:
+                    pass
+
     def validate(self, ignore_recordings: bool = False, profile: str = None) -> tuple:
         """Validate a dataset, returning all errors and warnings.
 
@@ -0,0 +1,405 @@
+import io
+import json
+import os
+import numpy as np
+import pandas as pd
+from typing import Dict, Iterable, List, Tuple
+
+SEGMENTS_FORMATS = {
+    "csv": ".csv",
+    "parquet": ".parquet",
+    "feather": ".feather",
+}
+
+# values interpreted as missing by pd.read_csv when keep_default_na is True
+DEFAULT_NA_VALUES = {
+    "",
+    "#N/A",
+    "#N/A N/A",
+    "#NA",
+    "-1.#IND",
+    "-1.#QNAN",
+    "-NaN",
+    "-nan",
+    "1.#IND",
+    "1.#QNAN",
+    "<NA>",
+    "N/A",
+    "NA",
+    "NULL",
+    "NaN",
+    "n/a",
+    "nan",
+    "null",
+}
+
+TIMESTAMP_COLUMNS = ["segment_onset", "segment_offset"]
+
+CONSOLIDATED_STORE = "_consolidated.parquet"
+STORE_METADATA_KEY = b"childproject"
+
+
+def segments_format(path: str) -> str:
+    """Guess the storage format of a converted annotation from its extension.
+
+    :param path: path to the converted annotation
+    :type path: str
+    :return: name of the format (one of the keys of ``SEGMENTS_FORMATS``)
+    :rtype: str
+    """
+    extension = os.path.splitext(str(path))[1].lower()
+
+    if extension == ".arrow":
+        return "feather"
+
+    for segments_format, _extension in SEGMENTS_FORMATS.items():
+        if extension == _extension:
+            return segments_format
+
+    raise ValueError(f"unsupported converted annotation format for '{path}'")
+
+
+def is_columnar(path: str) -> bool:
+    """Whether ``path`` points to a segments file stored in a columnar format."""
+    try:
+        return segments_format(path) != "csv"
+    except ValueError:
+        return False
+
+
+def _as_text(df: pd.DataFrame) -> pd.DataFrame:
+    # render every value the way the CSV backend would,
+    # so that both backends are parsed identically afterwards.
+    return pd.read_csv(
+        io.StringIO(df.to_csv(index=False)),
+        dtype=str,
+        keep_default_na=False,
+        na_values=[""],
+    )
+
+
+def write_segments(df: pd.DataFrame, path: str, categorical: List[str] = []):
+    """Store segments into ``path``, using the format matching its extension.
+
+    Columnar formats (parquet and feather) store onsets and offsets as int64,
+    ``categorical`` columns as categories and all other columns as text.
+
+    :param df: segments to store
+    :type df: pd.DataFrame
+    :param path: destination
+    :type path: str
+    :param categorical: columns to store as categories (columnar formats only), defaults to []
+    :type categorical: List[str], optional
+    """
+    output_format = segments_format(path)
+
+    if output_format == "csv":
+        df.to_csv(path, index=False)
+        return
+
+    df = _as_text(df)
+
+    for column in df.columns:
+        if column in TIMESTAMP_COLUMNS:
+            df[column] = df[column].astype(np.int64)
+        elif column in categorical:
+            df[column] = df[column].astype("category")
+
+    if output_format == "parquet":
+        df.to_parquet(path, index=False)
+    else:
+        df.to_feather(path)
+
+
+def read_segments(
+    path: str,
+    columns: List[str] = None,
+    keep_default_na: bool = True,
+    na_values: List[str] = None,
+    dtype: Dict[str, str] = None,
+) -> pd.DataFrame:
+    """Read segments from ``path``, using the format matching its extension.
+
+    Whatever the format, the output is the same as what ``pd.read_csv``
+    would return with the same ``keep_default_na`` and ``na_values`` flags
+    for the equivalent CSV file.
+
+    :param path: path to the converted annotation
+    :type path: str
+    :param columns: columns to read (those missing from the file are ignored), defaults to None (all columns)
+    :type columns: List[str], optional
+    :param keep_default_na: whether pandas default NA values should be considered as missing, defaults to True
+    :type keep_default_na: bool, optional
+    :param na_values: additional values to consider as missing, defaults to None
+    :type na_values: List[str], optional
+    :param dtype: dtype of some of the columns (as with ``pd.read_csv``), defaults to None (inferred)
+    :type dtype: Dict[str, str], optional
+    :return: segments
+    :rtype: pd.DataFrame
+    """
+    input_format = segments_format(path)
+
+    if input_format == "csv":
+        return pd.read_csv(
+            path,
+            usecols=None if columns is None else lambda column: column in columns,
+            keep_default_na=keep_default_na,
+            na_values=na_values,
+            dtype=dtype,
+        )
+
+    if columns is not None:
+        columns = [column for column in read_columns(path) if column in columns]
+
+    if input_format == "parquet":
+        df = pd.read_parquet(path, columns=columns)
+    else:
+        df = pd.read_feather(path, columns=columns)
+
+    return _parse_text(df, keep_default_na, na_values, dtype)
+
+
+def _parse_text(
+    df: pd.DataFrame,
+    keep_default_na: bool = True,
+    na_values: List[str] = None,
+    dtype: Dict[str, str] = None,
+) -> pd.DataFrame:
+    missing = set(na_values) if na_values else set()
+    if keep_default_na:
+        missing |= DEFAULT_NA_VALUES
+
+    dtype = dtype or {}
+
+    for column in df.columns:
+        if column in TIMESTAMP_COLUMNS:
+            continue
+
+        values = df[column].astype(object)
+        values = values.where(~values.isin(missing), np.nan)
+
+        if dtype.get(column) in (str, "str", object, "object"):
+            # same as pd.read_csv: text is kept as is, missing values are NaN
+            df[column] = values
+            continue
+
+        try:
+            values = pd.to_numeric(values)
+        except (ValueError, TypeError):
+            pass
+
+        if column in dtype:
+            values = values.astype(dtype[column])
+
+        df[column] = values
+
+    return df
+
+
+def read_columns(path: str) -> List[str]:
+    """Retrieve the columns of a converted annotation without loading it."""
+    input_format = segments_format(path)
+
+    if input_format == "csv":
+        return pd.read_csv(path, nrows=0).columns.tolist()
+
+    import pyarrow.parquet as pq
+    import pyarrow.feather as feather
+
+    if input_format == "parquet":
+        schema = pq.read_schema(path)
+    else:
+        schema = feather.read_table(path, memory_map=True).schema
+
+    return [name for name in schema.names if name != "__index_level_0__"]
+
+
+class SegmentsStore:
+    """Consolidated store of all the converted annotations of a set.
+
+    The store is a single parquet file with one row group per converted annotation.
+    Its footer holds an index mapping each ``annotation_filename`` to its row group,
+    its recording, its columns and the range of its segments, so that individual
+    annotations can be retrieved without scanning the whole file.
+
+    :param path: path to the store
+    :type path: str
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.file = None
+        self.index = {}
+
+    def __enter__(self):
+        self.open()
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def open(self):
+        import pyarrow.parquet as pq
+
+        self.file = pq.ParquetFile(self.path)
+        metadata = self.file.schema_arrow.metadata or {}
+        self.index = json.loads(metadata.get(STORE_METADATA_KEY, b"{}"))
+
+    def close(self):
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+
+    def __contains__(self, annotation_filename: str) -> bool:
+        return annotation_filename in self.index
+
+    def columns(self, annotation_filename: str) -> List[str]:
+        return self.index[annotation_filename]["columns"]
+
+    def read(
+        self,
+        annotation_filename: str,
+        columns: List[str] = None,
+        onset: int = None,
+        offset: int = None,
+        keep_default_na: bool = True,
+        na_values: List[str] = None,
+        dtype: Dict[str, str] = None,
+    ) -> pd.DataFrame:
+        """Read one converted annotation from the store.
+
+        :param annotation_filename: converted annotation to read
+        :type annotation_filename: str
+        :param columns: columns to read, defaults to None (all columns of the annotation)
+        :type columns: List[str], optional
+        :param onset: if specified, only return segments ending after ``onset``
+        :type onset: int, optional
+        :param offset: if specified, only return segments starting before ``offset``
+        :type offset: int, optional
+        :param keep_default_na: same as :func:`read_segments`, defaults to True
+        :type keep_default_na: bool, optional
+        :param na_values: same as :func:`read_segments`, defaults to None
+        :type na_values: List[str], optional
+        :param dtype: same as :func:`read_segments`, defaults to None
+        :type dtype: Dict[str, str], optional
+        :return: segments
+        :rtype: pd.DataFrame
+        """
+        import pyarrow.compute as pc
+
+        entry = self.index[annotation_filename]
+
+        if columns is None:
+            columns = entry["columns"]
+        else:
+            columns = [c for c in columns if c in entry["columns"]]
+
+        table = self.file.read_row_group(entry["row_group"], columns=columns)
+
+        if onset is not None and onset > entry["segment_onset"]:
+            table = table.filter(pc.greater(table["segment_offset"], onset))
+
+        if offset is not None and offset < entry["segment_offset"]:
+            table = table.filter(pc.less(table["segment_onset"], offset))
+
+        return _parse_text(table.to_pandas(), keep_default_na, na_values, dtype)
+
+    @staticmethod
+    def write(
+        path: str,
+        columns: List[str],
+        annotations: Iterable[Tuple[str, str, pd.DataFrame]],
+        source: "SegmentsStore" = None,
+    ):
+        """Write a store.
+
+        Parquet files cannot be modified in place, so updating a store means
+        writing a new one; annotations that did not change can however be copied
+        from the previous store (``source``) row group by row group, without
+        being parsed. Row groups are first spilled to a temporary file next to
+        ``path``, since the index of the store must be known before its first
+        row group is written: the memory usage is therefore bounded by the largest
+        annotation, at the cost of writing the store twice.
+
+        :param path: destination
+        :type path: str
+        :param columns: all the columns of the converted annotations
+        :type columns: List[str]
+        :param annotations: ``(annotation_filename, recording_filename, segments)`` tuples; ``segments`` may be None for annotations to copy from ``source``
+        :type annotations: Iterable[Tuple[str, str, pd.DataFrame]]
+        :param source: open store to copy annotations from, defaults to None
+        :type source: SegmentsStore, optional
+        """
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        schema = pa.schema(
+            [
+                (column, pa.int64() if column in TIMESTAMP_COLUMNS else pa.string())
+                for column in columns
+            ]
+        )
+
+        index = {}
+        spill = path + ".rows"
+
+        try:
+            with pq.ParquetWriter(spill, schema) as writer:
+                for annotation_filename, recording_filename, segments in annotations:
+                    if segments is None:
+                        entry = source.index[annotation_filename]
+                        index[annotation_filename] = dict(entry, row_group=len(index))
+
+                        table = source.file.read_row_group(entry["row_group"])
+                        # the columns of the new store may differ from the previous one
+                        table = pa.Table.from_arrays(
+                            [
+                                table.column(column)
+                                if column in table.column_names
+                                else pa.nulls(table.num_rows, field.type)
+                                for column, field in zip(columns, schema)
+                            ],
+                            schema=schema,
+                        )
+                        writer.write_table(table, row_group_size=max(1, table.num_rows))
+                        continue
+
+                    segments = _as_text(segments)
+
+                    index[annotation_filename] = {
+                        "row_group": len(index),
+                        "recording_filename": recording_filename,
+                        "columns": segments.columns.tolist(),
+                        "segment_onset": int(segments["segment_onset"].min())
+                        if len(segments)
+                        else 0,
+                        "segment_offset": int(segments["segment_offset"].max())
+                        if len(segments)
+                        else 0,
+                    }
+
+                    segments = segments.reindex(columns=columns)
+                    for column in TIMESTAMP_COLUMNS:
+                        segments[column] = segments[column].astype(np.int64)
+
+                    table = pa.Table.from_pandas(
+                        segments, schema=schema, preserve_index=False
+                    )
+                    writer.write_table(table, row_group_size=max(1, table.num_rows))
+
+            schema = schema.with_metadata({STORE_METADATA_KEY: json.dumps(index)})
+
+            rows = pq.ParquetFile(spill)
+            try:
+                with pq.ParquetWriter(path, schema) as writer:
+                    for row_group in range(rows.num_row_groups):
+                        table = rows.read_row_group(row_group)
+                        writer.write_table(
+                            table.replace_schema_metadata(schema.metadata),
+                            row_group_size=max(1, table.num_rows),
+                        )
+            finally:
+                rows.close()
+        finally:
+            if os.path.exists(spill):
+                os.remove(spill)
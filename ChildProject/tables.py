@@ -3,7 +3,9 @@ import os
 import re
 import datetime
 import numpy as np
-from typing import Union, Set, List
+from typing import Callable, Union, Set, List, Tuple
+
+from .storage import is_columnar, read_segments
 
 
 class MissingColumnsException(Exception):
@@ -31,10 +33,74 @@ def assert_columns_presence(name: str, df: pd.DataFrame, columns: Union[Set, Lis
         raise MissingColumnsException(name, missing)
 
 
+NA_VALUES = [
+    "-1.#IND",
+    "1.#QNAN",
+    "1.#IND",
+    "-1.#QNAN",
+    "#N/A N/A",
+    "#N/A",
+    "N/A",
+    "n/a",
+    "",
+    "#NA",
+    "NULL",
+    "null",
+    "NaN",
+    "-NaN",
+    "nan",
+    "-nan",
+    "",
+]
+
+
 def is_boolean(x):
     return x == "NA" or int(x) in [0, 1]
 
 
+def _factorize_str(values: pd.Series) -> Tuple[np.ndarray, List[str]]:
+    """encode the string representations of ``values`` (as given by str()),
+    so that checks need only be evaluated once per distinct value
+
+    :return: the codes of each value, and the distinct strings
+    """
+    if values.dtype.kind in "biu":
+        codes, uniques = pd.factorize(values)
+        return codes, np.asarray(uniques).astype(str).tolist()
+
+    if (
+        values.dtype.kind == "O"
+        and not values.isnull().any()
+        and pd.api.types.infer_dtype(values, skipna=False) == "string"
+    ):
+        codes, uniques = pd.factorize(values)
+        return codes, list(uniques)
+
+    if values.dtype.kind in "fO":
+        values = values.astype(str)
+    else:
+        values = values.astype(object).map(str)
+
+    codes, uniques = pd.factorize(values)
+    return codes, list(uniques)
+
+
+def _is_datetime(value, fmt: str) -> bool:
+    try:
+        datetime.datetime.strptime(value, fmt)
+    except:
+        return False
+
+    return True
+
+
+def _passes(function: Callable, value) -> bool:
+    try:
+        return function(value) == True
+    except:
+        return False
+
+
 class IndexColumn:
     def __init__(
         self,
@@ -69,6 +135,64 @@ class IndexColumn:
         return "IndexColumn(name = {})".format(self.name)
 
 
+def compact_dtypes(
+    df: pd.DataFrame,
+    columns: List[IndexColumn] = [],
+    categorical: List[str] = [],
+    timestamps: List[str] = [],
+) -> pd.DataFrame:
+    """Reduce the memory footprint of a dataframe.
+
+    Columns with a known set of values (``choices`` of their :class:`IndexColumn`)
+    and ``categorical`` columns are converted to categories. ``timestamps``
+    columns are converted to int32 (or int64 if needed) when they hold no missing values.
+
+    :param df: dataframe
+    :type df: pd.DataFrame
+    :param columns: description of the columns of the dataframe, defaults to []
+    :type columns: List[IndexColumn], optional
+    :param categorical: other columns to convert to categories, defaults to []
+    :type categorical: List[str], optional
+    :param timestamps: integer columns to downcast, defaults to []
+    :type timestamps: List[str], optional
+    :return: dataframe with compact dtypes
+    :rtype: pd.DataFrame
+    """
+    df = df.copy(deep=False)
+    choices = {column.name: column.choices for column in columns if column.choices}
+
+    for column in df.columns:
+        values = df[column]
+
+        if column in timestamps:
+            if values.dtype.kind not in "biuf" or values.isnull().any():
+                continue
+
+            if values.dtype.kind == "f" and not (values == values.round()).all():
+                continue
+
+            if len(values) and values.abs().max() < np.iinfo(np.int32).max:
+                df[column] = values.astype(np.int32)
+            else:
+                df[column] = values.astype(np.int64)
+
+        elif column in choices or column in categorical:
+            if isinstance(values.dtype, pd.CategoricalDtype) or values.dtype.kind != "O":
+                continue
+
+            # known values first: dataframes only holding known values share the same
+            # categories. Other values (and columns without choices) yield categories
+            # that depend on each dataframe, which must be unioned to be concatenated.
+            known = choices.get(column, [])
+            observed = pd.unique(values.dropna())
+            categories = list(known) + sorted(
+                set(observed) - set(known), key=lambda value: str(value)
+            )
+            df[column] = pd.Categorical(values, categories=categories)
+
+    return df
+
+
 class IndexTable:
     def __init__(self, name, path=None, columns=[], enforce_dtypes: bool = False):
         self.name = name
@@ -80,30 +204,18 @@ class IndexTable:
     def read(self):
         pd_flags = {
             "keep_default_na": False,
-            "na_values": [
-                "-1.#IND",
-                "1.#QNAN",
-                "1.#IND",
-                "-1.#QNAN",
-                "#N/A N/A",
-                "#N/A",
-                "N/A",
-                "n/a",
-                "",
-                "#NA",
-                "NULL",
-                "null",
-                "NaN",
-                "-NaN",
-                "nan",
-                "-nan",
-                "",
-            ],
+            "na_values": NA_VALUES,
             "parse_dates": False,
             "index_col": False,
         }
 
-        if self.enforce_dtypes:
+        if is_columnar(self.path):
+            self.df = read_segments(
+                self.path,
+                keep_default_na=pd_flags["keep_default_na"],
+                na_values=pd_flags["na_values"],
+            )
+        elif self.enforce_dtypes:
             dtype = {
                 column.name: column.dtype for column in self.columns if column.dtype
             }
@@ -159,73 +271,77 @@ class IndexTable:
                 )
             )
 
-        rows = self.df.to_dict(orient="index")
-        for line_number in rows:
-            row = rows[line_number]
-            for column_name in row.keys():
-                column_attr = columns.get(column_name)
+        line_numbers = self.df.index.values
+        failures = []
 
-                if column_attr is None:
-                    continue
+        for column_position, column_name in enumerate(self.df.columns):
+            column_attr = columns.get(column_name)
 
-                if callable(column_attr.function):
-                    try:
-                        ok = column_attr.function(str(row[column_name])) == True
-                    except:
-                        ok = False
+            if column_attr is None:
+                continue
 
-                    if not ok:
-                        message = "'{}' does not pass callable test for column '{}' on line {}".format(
-                            row[column_name], column_name, line_number
-                        )
-                        if column_attr.required and str(row[column_name]) != "NA":
-                            errors.append(self.msg(message))
-                        elif column_attr.required or str(row[column_name]) != "NA":
-                            warnings.append(self.msg(message))
-
-                elif (
-                    column_attr.choices
-                    and str(row[column_name]) not in column_attr.choices
-                ):
-                    message = "'{}' is not a permitted value for column '{}' on line {}, should be any of [{}]".format(
-                        row[column_name],
-                        column_name,
-                        line_number,
-                        ",".join(column_attr.choices),
-                    )
-                    if column_attr.required and str(row[column_name]) != "NA":
-                        errors.append(self.msg(message))
-                    elif column_attr.required or str(row[column_name]) != "NA":
-                        warnings.append(self.msg(message))
-
-                elif column_attr.datetime:
-                    try:
-                        dt = datetime.datetime.strptime(
-                            row[column_name], column_attr.datetime
-                        )
-                    except:
-                        message = "'{}' is not a proper date/time for column '{}' (expected {}) on line {}".format(
-                            row[column_name],
-                            column_name,
-                            column_attr.datetime,
-                            line_number,
-                        )
-                        if column_attr.required and str(row[column_name]) != "NA":
-                            errors.append(self.msg(message))
-                        elif column_attr.required or str(row[column_name]) != "NA":
-                            warnings.append(self.msg(message))
-                elif column_attr.regex:
-                    if not re.fullmatch(column_attr.regex, str(row[column_name])):
-                        message = "'{}' does not match the format required for '{}' on line {}, expected '{}'".format(
-                            row[column_name],
+            values = self.df[column_name]
+            codes, texts = _factorize_str(values)
+
+            if callable(column_attr.function):
+                ok = [_passes(column_attr.function, text) for text in texts]
+                ok = np.array(ok, dtype=bool)[codes]
+                message = "'{}' does not pass callable test for column '{}' on line {}"
+            elif column_attr.choices:
+                choices = set(column_attr.choices)
+                ok = np.array([text in choices for text in texts], dtype=bool)[codes]
+                message = "'{{}}' is not a permitted value for column '{{}}' on line {{}}, should be any of [{}]".format(
+                    ",".join(column_attr.choices)
+                    .replace("{", "{{")
+                    .replace("}", "}}")
+                )
+            elif column_attr.datetime:
+                # strptime is applied to the values themselves rather than their string representation
+                datetime_codes, uniques = pd.factorize(values)
+                ok = [_is_datetime(value, column_attr.datetime) for value in uniques]
+                ok = np.array(ok + [False], dtype=bool)[datetime_codes]
+                message = "'{{}}' is not a proper date/time for column '{{}}' (expected {}) on line {{}}".format(
+                    column_attr.datetime.replace("{", "{{").replace("}", "}}")
+                )
+            elif column_attr.regex:
+                regex = re.compile(column_attr.regex)
+                ok = [regex.fullmatch(text) is not None for text in texts]
+                ok = np.array(ok, dtype=bool)[codes]
+                message = "'{{}}' does not match the format required for '{{}}' on line {{}}, expected '{}'".format(
+                    column_attr.regex.replace("{", "{{").replace("}", "}}")
+                )
+            else:
+                continue
+
+            na = (np.array(texts, dtype=object) == "NA")[codes]
+            if column_attr.required:
+                error = ~ok & ~na
+                warning = ~ok & na
+            else:
+                error = np.zeros(len(ok), dtype=bool)
+                warning = ~ok & ~na
+
+            for position in np.flatnonzero(error | warning):
+                failures.append(
+                    (
+                        position,
+                        column_position,
+                        error[position],
+                        message.format(
+                            texts[codes[position]],
                             column_name,
-                            line_number,
-                            column_attr.regex,
-                        )
-                        if column_attr.required and str(row[column_name]) != "NA":
-                            errors.append(self.msg(message))
-                        elif column_attr.required or str(row[column_name]) != "NA":
-                            warnings.append(self.msg(message))
+                            line_numbers[position],
+                        ),
+                    )
+                )
+
+        # report failures in the order of the rows, then columns
+        failures.sort(key=lambda failure: (failure[0], failure[1]))
+        for _, _, error, message in failures:
+            if error:
+                errors.append(self.msg(message))
+            else:
+                warnings.append(self.msg(message))
 
         for c in self.columns:
             if not c.unique:
@@ -1,4 +1,6 @@
 import os
+from collections import OrderedDict
+from typing import Callable
 
 def path_is_parent(parent_path: str, child_path: str):
     # Smooth out relative path names, note: if you are concerned about symbolic links, you should use os.path.realpath too
@@ -24,26 +26,26 @@ class Segment:
 
 
 def intersect_ranges(xs, ys):
-    # Try to get the first range in each iterator:
-    try:
-        x, y = next(xs), next(ys)
-    except StopIteration:
-        return
-
-    while True:
-        # Yield the intersection of the two ranges, if it's not empty:
-        intersection = Segment(max(x.start, y.start), min(x.stop, y.stop))
-        if intersection.length() > 0:
-            yield intersection
-
-        # Try to increment the range with the earlier stopping value:
-        try:
-            if x.stop <= y.stop:
-                x = next(xs)
-            else:
-                y = next(ys)
-        except StopIteration:
-            return
+    """Intersections of two sequences of sorted :class:`Segment` objects.
+    Kept for compatibility; see :meth:`ChildProject.intervals.IntervalSet.intersection`.
+
+    Segments within each sequence are not merged: if they overlap, every pairwise
+    intersection is returned, whereas the former implementation depended on
+    the order of the segments. Coalesce the inputs beforehand
+    (:meth:`ChildProject.intervals.IntervalSet.coalesce`) to obtain the
+    intersection of their unions.
+
+    :param xs: first sequence of segments
+    :type xs: Iterable[Segment]
+    :param ys: second sequence of segments
+    :type ys: Iterable[Segment]
+    :return: non-empty intersections, sorted
+    :rtype: Iterator[Segment]
+    """
+    from .intervals import IntervalSet
+
+    xs, ys = IntervalSet.from_segments(xs), IntervalSet.from_segments(ys)
+    return xs.intersection(ys).segments()
 
 
 def get_audio_duration(filename):
@@ -59,3 +61,100 @@ def get_audio_duration(filename):
         pass
 
     return duration
+
+
+class SegmentsCache:
+    """Least-recently-used cache of parsed converted annotations,
+    bounded by the memory footprint of the cached dataframes.
+
+    Entries are keyed by the path of the file they were read from and
+    its modification time and size, so that files modified
+    behind the cache's back are never served from it.
+
+    :param capacity: maximum memory footprint of the cache, in bytes. 0 disables the cache.
+    :type capacity: int
+    """
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self.clear()
+
+    def clear(self):
+        import threading
+
+        self.entries = OrderedDict()
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+
+    def __getstate__(self):
+        # contents are not worth shipping to worker processes
+        return {"capacity": self.capacity}
+
+    def __setstate__(self, state):
+        self.__init__(state["capacity"])
+
+    def __len__(self):
+        return len(self.entries)
+
+    @staticmethod
+    def _stat(path: str):
+        stat = os.stat(path)
+        return (stat.st_mtime_ns, stat.st_size)
+
+    def get(self, path: str, key: tuple, load: Callable):
+        """Retrieve an entry from the cache, or load it and store it.
+        The returned dataframe is shared with the cache and must not be modified.
+
+        :param path: file the entry is read from
+        :type path: str
+        :param key: additional key components (e.g. the read options)
+        :type key: tuple
+        :param load: function returning the dataframe upon cache misses
+        :type load: Callable
+        """
+        if self.capacity <= 0:
+            self.misses += 1
+            return load()
+
+        path = os.path.abspath(path)
+        key = (path, self._stat(path)) + tuple(key)
+
+        with self.lock:
+            if key in self.entries:
+                self.hits += 1
+                self.entries.move_to_end(key)
+                return self.entries[key][0]
+
+            self.misses += 1
+
+        df = load()
+        size = int(df.memory_usage(deep=True).sum())
+
+        if size > self.capacity:
+            return df
+
+        with self.lock:
+            if key not in self.entries:
+                self.entries[key] = (df, size)
+                self.size += size
+
+            while self.size > self.capacity:
+                _, (_, _size) = self.entries.popitem(last=False)
+                self.size -= _size
+
+        return df
+
+    def invalidate(self, path: str):
+        """Drop all the entries read from ``path`` or from any file below ``path``.
+
+        :param path: file or directory
+        :type path: str
+        """
+        path = os.path.abspath(path)
+
+        with self.lock:
+            for key in list(self.entries.keys()):
+                if key[0] == path or path_is_parent(path, key[0]):
+                    self.size -= self.entries.pop(key)[1]
@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+"""Compare the grouped engine of AclewMetrics, which loads the segments of all units
+at once and aggregates them in one pass, with the per-unit engine,
+which retrieves the annotations and segments of each unit separately.
+
+usage: python benchmarks/aclew_metrics.py [--recordings 2000] [--segments 200] [--by recording_filename]
+"""
+import argparse
+import contextlib
+import os
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from ChildProject.annotations import AnnotationManager
+from ChildProject.pipelines.metrics import AclewMetrics
+from ChildProject.projects import ChildProject
+
+
+def setup(path: str, n_recordings: int, n_segments: int):
+    rng = np.random.default_rng(0)
+
+    os.makedirs(os.path.join(path, "metadata"))
+    n_children = max(n_recordings // 5, 1)
+    recordings = pd.DataFrame(
+        {
+            "experiment": "bench",
+            "child_id": rng.integers(0, n_children, n_recordings),
+            "recording_filename": ["{}.wav".format(i) for i in range(n_recordings)],
+            "recording_device_type": "lena",
+            "date_iso": "2022-01-01",
+            "start_time": rng.choice(["08:00", "09:30", "NA"], n_recordings),
+            "duration": 16 * 3600 * 1000,
+        }
+    )
+    recordings["session_id"] = recordings["child_id"].astype(str) + "_" + (
+        rng.integers(0, 2, n_recordings).astype(str)
+    )
+    recordings.to_csv(os.path.join(path, "metadata/recordings.csv"), index=False)
+
+    pd.DataFrame(
+        {
+            "experiment": "bench",
+            "child_id": np.arange(n_children),
+            "child_dob": "2021-01-01",
+            "child_sex": rng.choice(["f", "m"], n_children),
+        }
+    ).to_csv(os.path.join(path, "metadata/children.csv"), index=False)
+
+    annotations = []
+    for annotation_set in ["vtc", "alice", "vcm"]:
+        os.makedirs(os.path.join(path, "annotations", annotation_set, "converted"))
+
+    for i, recording in enumerate(recordings["recording_filename"]):
+        # some recordings have few vocalizations, or lack ALICE or VCM annotations
+        n = int(rng.integers(0, n_segments)) if i % 7 == 0 else n_segments
+        sets = ["vtc", "alice", "vcm"][: 1 + i % 3] if i % 5 == 0 else None
+        onsets = np.sort(rng.integers(0, 8 * 3600 * 1000, n))
+
+        segments = pd.DataFrame(
+            {
+                "segment_onset": onsets,
+                "segment_offset": onsets + rng.integers(100, 3000, n),
+                "speaker_type": rng.choice(["CHI", "FEM", "MAL", "OCH", "SPEECH"], n),
+            }
+        )
+
+        for annotation_set in sets or ["vtc", "alice", "vcm"]:
+            df = segments
+            if annotation_set == "alice":
+                df = segments[segments["speaker_type"].isin(["FEM", "MAL"])].copy()
+                df["words"] = rng.integers(0, 10, len(df))
+                df["syllables"] = df["words"] * 2
+                df["phonemes"] = df["words"] * 4
+            elif annotation_set == "vcm":
+                df = segments[segments["speaker_type"] == "CHI"].copy()
+                df["vcm_type"] = rng.choice(["C", "N", "Y", "J"], len(df))
+
+            df.to_csv(
+                os.path.join(
+                    path, "annotations", annotation_set, "converted", "{}.csv".format(i)
+                ),
+                index=False,
+            )
+            annotations.append(
+                {
+                    "set": annotation_set,
+                    "recording_filename": recording,
+                    "range_onset": 0,
+                    "range_offset": 8 * 3600 * 1000,
+                    "annotation_filename": "{}.csv".format(i),
+                }
+            )
+
+    annotations = pd.DataFrame(annotations)
+    annotations["time_seek"] = 0
+    annotations["raw_filename"] = "raw"
+    annotations["format"] = "csv"
+    annotations["imported_at"] = "2022-01-01 00:00:00"
+    annotations["package_version"] = "0.0.4"
+    annotations["error"] = np.nan
+
+    project = ChildProject(path)
+    project.read()
+    am = AnnotationManager(project)
+    am.annotations = annotations
+    am.write()
+    return project
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--recordings", type=int, default=2000)
+    parser.add_argument("--segments", type=int, default=200)
+    parser.add_argument(
+        "--by",
+        default="recording_filename",
+        choices=["recording_filename", "session_id", "child_id"],
+    )
+    args = parser.parse_args()
+
+    options = dict(
+        by=args.by,
+        rec_cols="date_iso,start_time,session_id",
+        child_cols="child_sex",
+    )
+
+    with tempfile.TemporaryDirectory() as tmp, open(os.devnull, "w") as devnull:
+        with contextlib.redirect_stdout(devnull):
+            project = setup(
+                os.path.join(tmp, "dataset"), args.recordings, args.segments
+            )
+
+        print(
+            "{} recordings x {} segments per set, by {}".format(
+                args.recordings, args.segments, args.by
+            )
+        )
+
+        for from_time, to_time in [(None, None), ("09:00", "12:00")]:
+            results = {}
+            elapsed = {}
+            for engine in ["unit", "grouped"]:
+                metrics = AclewMetrics(
+                    project,
+                    from_time=from_time,
+                    to_time=to_time,
+                    engine=engine,
+                    **options
+                )
+
+                start = time.perf_counter()
+                with contextlib.redirect_stdout(devnull):
+                    results[engine] = metrics.extract()
+                elapsed[engine] = time.perf_counter() - start
+
+            pd.testing.assert_frame_equal(results["unit"], results["grouped"])
+
+            print(
+                "time range {}-{}: per unit {:.2f}s, grouped {:.2f}s".format(
+                    from_time or "none",
+                    to_time or "none",
+                    elapsed["unit"],
+                    elapsed["grouped"],
+                )
+            )
+
+
+if __name__ == "__main__":
+    main()
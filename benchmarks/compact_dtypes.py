@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""Report the memory saved by compact dtypes (see ``get_segments(compact=True)``)
+on synthetic segments merged with the metadata of their annotations.
+
+usage: python benchmarks/compact_dtypes.py [--segments 1000000] [--recordings 200]
+"""
+import argparse
+
+import numpy as np
+import pandas as pd
+
+from ChildProject.annotations import AnnotationManager
+from ChildProject.tables import compact_dtypes
+
+
+def synthetic_segments(n_segments: int, n_recordings: int) -> pd.DataFrame:
+    rng = np.random.default_rng(0)
+
+    recordings = np.sort(rng.integers(0, n_recordings, n_segments))
+    onsets = rng.integers(0, 16 * 3600 * 1000, n_segments)
+
+    return pd.DataFrame(
+        {
+            "segment_onset": onsets,
+            "segment_offset": onsets + rng.integers(100, 3000, n_segments),
+            "speaker_type": rng.choice(["CHI", "FEM", "MAL", "OCH"], n_segments),
+            "vcm_type": rng.choice(["C", "N", "L", "Y", "NA"], n_segments),
+            "words": rng.integers(0, 10, n_segments).astype(float),
+            "set": rng.choice(["vtc", "alice", "vcm"], n_segments),
+            "recording_filename": np.char.add(
+                "recording_", recordings.astype(str)
+            ).astype(object),
+            "annotation_filename": np.char.add(
+                "recording_", recordings.astype(str)
+            ).astype(object),
+            "range_onset": 0,
+            "range_offset": 16 * 3600 * 1000,
+            "format": "vtc_rttm",
+            "imported_at": "2022-01-01 00:00:00",
+            "package_version": "0.0.4",
+        }
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--segments", type=int, default=1000000)
+    parser.add_argument("--recordings", type=int, default=200)
+    args = parser.parse_args()
+
+    segments = synthetic_segments(args.segments, args.recordings)
+    for column in ["speaker_type", "vcm_type", "set", "format"]:
+        segments[column] = segments[column].astype(object)
+
+    compact = compact_dtypes(
+        segments,
+        AnnotationManager.SEGMENTS_COLUMNS,
+        categorical=segments.columns[segments.dtypes == object],
+        timestamps=AnnotationManager.TIMESTAMP_COLUMNS,
+    )
+
+    before = segments.memory_usage(deep=True, index=False)
+    after = compact.memory_usage(deep=True, index=False)
+
+    print("{} segments, {} recordings".format(args.segments, args.recordings))
+    print("{:<22}{:>14}{:>14}{:>14}".format("column", "dtype", "bytes", "saved"))
+    for column in segments.columns:
+        print(
+            "{:<22}{:>14}{:>14}{:>14}".format(
+                column,
+                str(compact[column].dtype),
+                after[column],
+                before[column] - after[column],
+            )
+        )
+    print(
+        "total: {:.1f} MB -> {:.1f} MB".format(before.sum() / 1e6, after.sum() / 1e6)
+    )
+
+
+if __name__ == "__main__":
+    main()
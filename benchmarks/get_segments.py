@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""Compare AnnotationManager.get_segments with the former implementation,
+which copied and clipped the segments once per annotation, on many annotations
+sharing one converted file.
+
+usage: python benchmarks/get_segments.py [--annotations 5000] [--segments 20000]
+"""
+import argparse
+import contextlib
+import os
+import shutil
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from ChildProject.annotations import AnnotationManager
+from ChildProject.projects import ChildProject
+
+
+def legacy_get_segments(am: AnnotationManager, annotations: pd.DataFrame):
+    """per-annotation copies, as implemented before the vectorized engine"""
+    annotations = annotations.dropna(subset=["annotation_filename"])
+    annotations = annotations.drop(columns=["raw_filename"])
+
+    segments = []
+    for s, set_annotations in annotations.groupby("set"):
+        for annotation_filename, _annotations, df in am._read_converted(
+            s, set_annotations, prune=True, cache=True
+        ):
+            for annotation in _annotations.to_dict(orient="records"):
+                segs = df.copy()
+                segs = AnnotationManager.clip_segments(
+                    segs, annotation["range_onset"], annotation["range_offset"]
+                )
+
+                if not len(segs):
+                    continue
+
+                for c in annotation.keys():
+                    segs[c] = annotation[c]
+
+                segments.append(segs)
+
+    return pd.concat(segments)
+
+
+def setup(path: str, n_annotations: int, n_segments: int) -> AnnotationManager:
+    shutil.copytree("examples/valid_raw_data", path)
+    rng = np.random.default_rng(0)
+
+    duration = n_segments * 2000
+    onsets = np.sort(rng.integers(0, duration, n_segments))
+    segments = pd.DataFrame(
+        {
+            "segment_onset": onsets,
+            "segment_offset": onsets + rng.integers(100, 3000, n_segments),
+            "speaker_type": rng.choice(["CHI", "FEM", "MAL", "OCH"], n_segments),
+        }
+    )
+
+    converted = os.path.join(path, "annotations/bench/converted")
+    os.makedirs(converted)
+    segments.to_csv(os.path.join(converted, "sound.csv"), index=False)
+
+    # short portions of the recording (e.g. as produced by a sampler)
+    range_onsets = np.sort(rng.integers(0, duration - 60000, n_annotations))
+    annotations = pd.DataFrame(
+        {
+            "set": "bench",
+            "recording_filename": "sound.wav",
+            "time_seek": 0,
+            "range_onset": range_onsets,
+            "range_offset": range_onsets + 60000,
+            "raw_filename": "sound.rttm",
+            "format": "rttm",
+            "filter": "",
+            "annotation_filename": "sound.csv",
+            "imported_at": "2022-01-01 00:00:00",
+            "package_version": "0.0.4",
+            "error": "",
+            "merged_from": "",
+        }
+    )
+
+    project = ChildProject(path)
+    am = AnnotationManager(project)
+    am.annotations = annotations
+    return am
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--annotations", type=int, default=5000)
+    parser.add_argument("--segments", type=int, default=20000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp, open(os.devnull, "w") as devnull:
+        with contextlib.redirect_stdout(devnull):
+            am = setup(os.path.join(tmp, "dataset"), args.annotations, args.segments)
+
+        # warm up the cache of converted annotations
+        am.get_segments(am.annotations.head(1))
+
+        start = time.perf_counter()
+        legacy = legacy_get_segments(am, am.annotations)
+        legacy_elapsed = time.perf_counter() - start
+
+        start = time.perf_counter()
+        segments = am.get_segments(am.annotations)
+        elapsed = time.perf_counter() - start
+
+        pd.testing.assert_frame_equal(legacy, segments)
+
+    print(
+        "{} annotations x {} segments ({} output rows)".format(
+            args.annotations, args.segments, len(segments)
+        )
+    )
+    print("per-annotation copies: {:.2f}s".format(legacy_elapsed))
+    print("vectorized: {:.2f}s".format(elapsed))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""Measure how AnnotationManager.intersection scales with the amount of recordings,
+compared with the former implementation, which intersected the sets and copied
+the annotations of each recording once per common portion.
+
+usage: python benchmarks/intersection.py [--sets 50] [--recordings 5000] [--legacy 500]
+"""
+import argparse
+import time
+from functools import reduce
+
+import numpy as np
+import pandas as pd
+
+from ChildProject.annotations import AnnotationManager
+from ChildProject.intervals import IntervalIndex, IntervalSet
+
+
+def legacy_intersection(annotations: pd.DataFrame) -> pd.DataFrame:
+    """per recording and per portion, as implemented before the single sweep"""
+    stack = []
+    recordings = list(annotations["recording_filename"].unique())
+    sets = list(annotations["set"].unique())
+
+    by_recording = IntervalIndex(annotations, ["recording_filename"])
+    by_set = IntervalIndex(annotations, ["recording_filename", "set"])
+
+    for recording in recordings:
+        segments = reduce(
+            IntervalSet.intersection,
+            [IntervalSet(*by_set.intervals((recording, s))) for s in sets],
+        )
+
+        result = []
+        for start, stop in segments:
+            ann = annotations.iloc[by_recording.overlapping(recording, start, stop)].copy()
+            ann["range_onset"].clip(lower=start, upper=stop, inplace=True)
+            ann["range_offset"].clip(lower=start, upper=stop, inplace=True)
+            ann = ann[(ann["range_offset"] - ann["range_onset"]) > 0]
+            result.append(ann)
+
+        if len(result):
+            stack.append(pd.concat(result))
+
+    return pd.concat(stack) if len(stack) else pd.DataFrame()
+
+
+def setup(n_sets: int, n_recordings: int) -> pd.DataFrame:
+    rng = np.random.default_rng(0)
+
+    # each set annotates three disjoint portions of each recording (e.g. sampled chunks)
+    n = n_sets * n_recordings * 3
+    bounds = np.sort(rng.integers(0, 16 * 3600 * 1000, (n // 3, 6)), axis=1)
+    return pd.DataFrame(
+        {
+            "set": np.repeat(
+                ["set_{}".format(i) for i in range(n_sets)], n_recordings * 3
+            ),
+            "recording_filename": np.tile(
+                np.repeat(
+                    ["{}.wav".format(i) for i in range(n_recordings)], 3
+                ),
+                n_sets,
+            ),
+            "range_onset": bounds[:, 0::2].ravel(),
+            "range_offset": bounds[:, 1::2].ravel(),
+        }
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sets", type=int, default=50)
+    parser.add_argument("--recordings", type=int, default=5000)
+    parser.add_argument(
+        "--legacy",
+        type=int,
+        default=500,
+        help="largest amount of recordings for which the former implementation is run",
+    )
+    args = parser.parse_args()
+
+    sizes = [args.recordings // 8, args.recordings // 4, args.recordings // 2]
+    sizes = [size for size in sizes if size > 0] + [args.recordings]
+
+    print("{} sets".format(args.sets))
+    print("{:>12}{:>14}{:>12}{:>12}".format("recordings", "annotations", "sweep", "legacy"))
+    for size in sizes:
+        annotations = setup(args.sets, size)
+
+        start = time.perf_counter()
+        intersection = AnnotationManager.intersection(annotations)
+        elapsed = time.perf_counter() - start
+
+        legacy_elapsed = float("nan")
+        if size <= args.legacy:
+            start = time.perf_counter()
+            legacy = legacy_intersection(annotations)
+            legacy_elapsed = time.perf_counter() - start
+            pd.testing.assert_frame_equal(legacy, intersection)
+
+        print(
+            "{:>12}{:>14}{:>11.2f}s{:>11.2f}s".format(
+                size, len(annotations), elapsed, legacy_elapsed
+            )
+        )
+
+
+if __name__ == "__main__":
+    main()
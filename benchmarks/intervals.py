@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""Scaling of ChildProject.intervals.IntervalSet operations with the amount of intervals,
+compared with the former generator-based intersection of Segment objects.
+
+usage: python benchmarks/intervals.py [--sizes 1000 10000 100000 1000000]
+"""
+import argparse
+import time
+
+import numpy as np
+
+from ChildProject.intervals import IntervalSet
+from ChildProject.utils import Segment
+
+
+def legacy_intersect_ranges(xs, ys):
+    """generator-based intersection, as implemented before IntervalSet"""
+    try:
+        x, y = next(xs), next(ys)
+    except StopIteration:
+        return
+
+    while True:
+        intersection = Segment(max(x.start, y.start), min(x.stop, y.stop))
+        if intersection.length() > 0:
+            yield intersection
+
+        try:
+            if x.stop <= y.stop:
+                x = next(xs)
+            else:
+                y = next(ys)
+        except StopIteration:
+            return
+
+
+def random_set(rng, n: int) -> IntervalSet:
+    # non-overlapping intervals of 0 to 2s separated by 0 to 2s gaps
+    lengths = rng.integers(0, 2000, n)
+    gaps = rng.integers(0, 2000, n)
+    starts = np.cumsum(gaps + lengths) - lengths
+    return IntervalSet(starts, starts + lengths)
+
+
+def timeit(function, repeat: int = 3) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--sizes", type=int, nargs="+", default=[1000, 10000, 100000, 1000000]
+    )
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    operations = {
+        "intersection": lambda a, b: a.intersection(b),
+        "union": lambda a, b: a.union(b),
+        "difference": lambda a, b: a.difference(b),
+        "coalesce": lambda a, b: a.coalesce(),
+        "clip": lambda a, b: a.clip(a.starts[0], a.stops[-1] // 2),
+        "length": lambda a, b: a.length(),
+    }
+
+    print(
+        "{:>10} {:>18} ".format("intervals", "legacy intersect")
+        + " ".join("{:>12}".format(name) for name in operations)
+    )
+
+    for size in args.sizes:
+        a, b = random_set(rng, size), random_set(rng, size)
+
+        legacy = timeit(
+            lambda: list(legacy_intersect_ranges(a.segments(), b.segments())),
+            repeat=1,
+        )
+        assert [
+            (s.start, s.stop)
+            for s in legacy_intersect_ranges(a.segments(), b.segments())
+        ] == list(a.intersection(b))
+
+        timings = [timeit(lambda: operation(a, b)) for operation in operations.values()]
+
+        print(
+            "{:>10} {:>17.4f}s ".format(size, legacy)
+            + " ".join("{:>11.4f}s".format(t) for t in timings)
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+"""Compare the engines of LenaMetrics with the former implementation,
+which computed the metrics unit by unit and parsed the lists of cries
+and vfxs of every CHI segment to count them.
+
+Sets converted before cries_count and vfxs_count were stored by the ITS converter
+are also measured (``legacy set``): their lists are then counted without being parsed.
+
+usage: python benchmarks/lena_metrics.py [--recordings 500] [--segments 2000]
+"""
+import argparse
+import ast
+import contextlib
+import os
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from ChildProject.annotations import AnnotationManager
+from ChildProject.pipelines.metrics import LenaMetrics
+from ChildProject.projects import ChildProject
+
+
+class LegacyLenaMetrics(LenaMetrics):
+    """unit by unit, parsing the lists of cries and vfxs"""
+
+    SUBCOMMAND = "legacy-lena"
+    COLUMNS = [
+        c for c in LenaMetrics.COLUMNS if c not in ["cries_count", "vfxs_count"]
+    ] + ["cries", "vfxs"]
+
+    def _retrieve_its(self, retrieve, units):
+        return retrieve([self.set], units, columns=self.COLUMNS)
+
+    @staticmethod
+    def _count_entries(its, column):
+        return its[column].apply(lambda x: len(ast.literal_eval(x))).values
+
+
+def setup(path: str, n_recordings: int, n_segments: int):
+    rng = np.random.default_rng(0)
+
+    os.makedirs(os.path.join(path, "metadata"))
+    recordings = pd.DataFrame(
+        {
+            "experiment": "bench",
+            "child_id": rng.integers(0, max(n_recordings // 5, 1), n_recordings),
+            "recording_filename": ["{}.wav".format(i) for i in range(n_recordings)],
+            "recording_device_type": "lena",
+            "date_iso": "2022-01-01",
+            "start_time": "08:00",
+            "duration": 16 * 3600 * 1000,
+        }
+    )
+    recordings.to_csv(os.path.join(path, "metadata/recordings.csv"), index=False)
+    pd.DataFrame(
+        {
+            "experiment": "bench",
+            "child_id": recordings["child_id"].unique(),
+            "child_dob": "2021-01-01",
+        }
+    ).to_csv(os.path.join(path, "metadata/children.csv"), index=False)
+
+    lena_speakers = ["CHN", "CXN", "FAN", "MAN", "OLN", "TVN", "NON", "SIL"]
+    speaker_types = ["CHI", "OCH", "FEM", "MAL", "NA", "NA", "NA", "NA"]
+    cry = {"start": 1.5, "end": 2.25}
+
+    annotations = []
+    for annotation_set in ["its", "its_legacy"]:
+        os.makedirs(os.path.join(path, "annotations", annotation_set, "converted"))
+
+    for i, recording in enumerate(recordings["recording_filename"]):
+        onsets = np.sort(rng.integers(0, 16 * 3600 * 1000, n_segments))
+        speakers = rng.integers(0, len(lena_speakers), n_segments)
+        cries = rng.integers(0, 3, n_segments) * (speakers == 0)
+        vfxs = rng.integers(0, 2, n_segments) * (speakers == 0)
+
+        segments = pd.DataFrame(
+            {
+                "segment_onset": onsets,
+                "segment_offset": onsets + rng.integers(100, 3000, n_segments),
+                "speaker_type": np.array(speaker_types)[speakers],
+                "lena_speaker": np.array(lena_speakers)[speakers],
+                "words": rng.integers(0, 10, n_segments) * np.isin(speakers, [2, 3]),
+                "utterances_count": rng.integers(0, 3, n_segments) * (speakers == 0),
+                "utterances_length": rng.integers(0, 3000, n_segments),
+                "child_cry_vfx_len": rng.integers(0, 2000, n_segments),
+                "cries": [str([cry] * n) for n in cries],
+                "vfxs": [str([cry] * n) for n in vfxs],
+                "cries_count": cries,
+                "vfxs_count": vfxs,
+            }
+        )
+
+        for annotation_set, df in [
+            ("its", segments),
+            ("its_legacy", segments.drop(columns=["cries_count", "vfxs_count"])),
+        ]:
+            df.to_csv(
+                os.path.join(
+                    path, "annotations", annotation_set, "converted", "{}.csv".format(i)
+                ),
+                index=False,
+            )
+            annotations.append(
+                {
+                    "set": annotation_set,
+                    "recording_filename": recording,
+                    "range_onset": 0,
+                    "range_offset": 16 * 3600 * 1000,
+                    "annotation_filename": "{}.csv".format(i),
+                }
+            )
+
+    annotations = pd.DataFrame(annotations)
+    annotations["time_seek"] = 0
+    annotations["raw_filename"] = "raw.its"
+    annotations["format"] = "its"
+    annotations["imported_at"] = "2022-01-01 00:00:00"
+    annotations["package_version"] = "0.0.4"
+    annotations["error"] = np.nan
+
+    project = ChildProject(path)
+    project.read()
+    am = AnnotationManager(project)
+    am.annotations = annotations
+    am.write()
+    return project
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--recordings", type=int, default=500)
+    parser.add_argument("--segments", type=int, default=2000)
+    args = parser.parse_args()
+
+    runs = [
+        ("former", LegacyLenaMetrics, "its", "unit"),
+        ("unit", LenaMetrics, "its", "unit"),
+        ("grouped", LenaMetrics, "its", "grouped"),
+        ("grouped, legacy set", LenaMetrics, "its_legacy", "grouped"),
+    ]
+
+    with tempfile.TemporaryDirectory() as tmp, open(os.devnull, "w") as devnull:
+        with contextlib.redirect_stdout(devnull):
+            project = setup(
+                os.path.join(tmp, "dataset"), args.recordings, args.segments
+            )
+
+        print("{} recordings x {} segments".format(args.recordings, args.segments))
+
+        reference = None
+        for name, cls, annotation_set, engine in runs:
+            metrics = cls(
+                project, set=annotation_set, types=["OLN", "TVN"], engine=engine
+            )
+
+            start = time.perf_counter()
+            result = metrics.extract()
+            elapsed = time.perf_counter() - start
+
+            if reference is None:
+                reference = result
+            else:
+                pd.testing.assert_frame_equal(reference, result)
+
+            print("{:<22}{:>8.2f}s".format(name, elapsed))
+
+
+if __name__ == "__main__":
+    main()
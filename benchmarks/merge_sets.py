@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""Measure how AnnotationManager.merge_sets scales with the amount of portions
+of each recording covered by the right set (e.g. human annotations of sampled chunks),
+when merging it with a set covering the whole recordings (e.g. VTC).
+
+The former implementation filtered all the segments of a recording for each portion,
+so its cost grew with portions x segments; the time per portion should now be flat.
+
+usage: python benchmarks/merge_sets.py [--recordings 2] [--segments 50000]
+"""
+import argparse
+import contextlib
+import os
+import shutil
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from ChildProject.annotations import AnnotationManager
+from ChildProject.projects import ChildProject
+
+
+def setup(path: str, n_recordings: int, n_portions: int, n_segments: int):
+    shutil.copytree("examples/valid_raw_data", path)
+    rng = np.random.default_rng(0)
+
+    duration = n_segments * 2000
+    portions = duration // n_portions
+
+    annotations = []
+    for annotation_set in ["vtc", "human"]:
+        os.makedirs(os.path.join(path, "annotations", annotation_set, "converted"))
+
+    for i in range(n_recordings):
+        recording = "{}.wav".format(i)
+
+        onsets = np.sort(rng.integers(0, duration, n_segments))
+        pd.DataFrame(
+            {
+                "segment_onset": onsets,
+                "segment_offset": onsets + rng.integers(100, 3000, n_segments),
+                "speaker_type": rng.choice(["CHI", "FEM", "MAL", "OCH"], n_segments),
+            }
+        ).to_csv(
+            os.path.join(path, "annotations/vtc/converted", "{}.csv".format(i)),
+            index=False,
+        )
+        annotations.append(
+            {
+                "set": "vtc",
+                "recording_filename": recording,
+                "range_onset": 0,
+                "range_offset": duration,
+                "annotation_filename": "{}.csv".format(i),
+            }
+        )
+
+        # consecutive portions annotated one after the other
+        for onset in range(0, duration, portions):
+            onsets = np.sort(rng.integers(onset, onset + portions - 500, 20))
+            pd.DataFrame(
+                {
+                    "segment_onset": onsets,
+                    "segment_offset": onsets + 500,
+                    "speaker_type": "FEM",
+                    "words": rng.integers(0, 5, 20),
+                }
+            ).to_csv(
+                os.path.join(
+                    path, "annotations/human/converted", "{}_{}.csv".format(i, onset)
+                ),
+                index=False,
+            )
+            annotations.append(
+                {
+                    "set": "human",
+                    "recording_filename": recording,
+                    "range_onset": onset,
+                    "range_offset": onset + portions,
+                    "annotation_filename": "{}_{}.csv".format(i, onset),
+                }
+            )
+
+    annotations = pd.DataFrame(annotations)
+    annotations["time_seek"] = 0
+    annotations["raw_filename"] = "raw"
+    annotations["format"] = "csv"
+    annotations["imported_at"] = "2022-01-01 00:00:00"
+    annotations["package_version"] = "0.0.4"
+    annotations["error"] = np.nan
+
+    project = ChildProject(path)
+    am = AnnotationManager(project)
+    am.annotations = annotations
+    am.write()
+    am.read()
+    return am
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--recordings", type=int, default=2)
+    parser.add_argument("--segments", type=int, default=50000)
+    args = parser.parse_args()
+
+    print("{} recordings x {} segments".format(args.recordings, args.segments))
+    print("{:>10}{:>12}{:>16}".format("portions", "merge", "per portion"))
+
+    for n_portions in [10, 100, 1000]:
+        with tempfile.TemporaryDirectory() as tmp, open(os.devnull, "w") as devnull:
+            with contextlib.redirect_stdout(devnull):
+                am = setup(
+                    os.path.join(tmp, "dataset"),
+                    args.recordings,
+                    n_portions,
+                    args.segments,
+                )
+
+            start = time.perf_counter()
+            am.merge_sets(
+                left_set="vtc",
+                right_set="human",
+                left_columns=["speaker_type"],
+                right_columns=["words"],
+                output_set="merged",
+                threads=1,
+            )
+            elapsed = time.perf_counter() - start
+
+        total = args.recordings * n_portions
+        print(
+            "{:>10}{:>11.2f}s{:>15.2f}ms".format(
+                n_portions, elapsed, 1000 * elapsed / total
+            )
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,275 @@
+#!/usr/bin/env python3
+"""Compare the engines of PeriodMetrics with the former implementation,
+which split the annotated portions of each unit into Python lists
+and clipped all of them once for every time bin.
+
+Each recording has a single annotation, since the former implementation
+counted the gaps between consecutive annotations of a unit as annotated.
+
+usage: python benchmarks/period_metrics.py [--recordings 200] [--segments 5000] [--period 15Min]
+"""
+import argparse
+import contextlib
+import datetime
+import os
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from ChildProject.annotations import AnnotationManager
+from ChildProject.pipelines.metrics import PeriodMetrics
+from ChildProject.projects import ChildProject
+
+
+class LegacyPeriodMetrics(PeriodMetrics):
+    """unit by unit, with one pass over the annotated portions per time bin"""
+
+    SUBCOMMAND = "legacy-period"
+
+    def _process_unit(self, unit: str):
+        annotations, segments = self.retrieve_segments(
+            [self.set], unit, columns=["speaker_type"]
+        )
+
+        # retrieve timestamps for each vocalization, ignoring the day of occurence
+        segments = self.am.get_segments_timestamps(segments, ignore_date=True)
+
+        # dropping segments for which no time information is available
+        segments.dropna(subset=["onset_time"], inplace=True)
+
+        # update the timestamps so that all vocalizations appear
+        # to happen on the same day
+        segments["onset_time"] -= pd.to_timedelta(
+            86400
+            * ((segments["onset_time"] - self.periods[0]).dt.total_seconds() // 86400),
+            unit="s",
+        )
+
+        if len(segments) == 0:
+            return pd.DataFrame()
+
+        # calculate length of available annotations within each bin.
+        # this is necessary in order to calculate correct rates
+        bins = np.array(
+            [dt.total_seconds() for dt in self.periods - self.periods[0]] + [86400]
+        )
+
+        # retrieve the timestamps for all annotated portions of the recordings
+        annotations = self.am.get_segments_timestamps(
+            annotations, ignore_date=True, onset="range_onset", offset="range_offset"
+        )
+
+        # calculate time elapsed since the first time bin
+        annotations["onset_time"] = (
+            annotations["onset_time"]
+            .apply(lambda dt: (dt - self.periods[0]).total_seconds())
+            .astype(int)
+        )
+        annotations["offset_time"] = (
+            annotations["offset_time"]
+            .apply(lambda dt: (dt - self.periods[0]).total_seconds())
+            .astype(int)
+        )
+
+        # split annotations to intervals each within a 0-24h range
+        annotations["stops"] = annotations.apply(
+            lambda row: [row["onset_time"]]
+            + list(
+                86400
+                * np.arange(
+                    (row["onset_time"] // 86400) + 1,
+                    (row["offset_time"] // 86400) + 1,
+                    1,
+                )
+            )
+            + [row["offset_time"]],
+            axis=1,
+        )
+
+        annotations = annotations.explode("stops")
+        annotations["onset"] = annotations["stops"]
+        annotations["offset"] = annotations["stops"].shift(-1)
+
+        annotations.dropna(subset=["offset"], inplace=True)
+        annotations["onset"] = annotations["onset"].astype(int) % 86400
+        annotations["offset"] = (annotations["offset"] - 1e-4) % 86400
+
+        durations = [
+            (
+                annotations["offset"].clip(bins[i], bins[i + 1])
+                - annotations["onset"].clip(bins[i], bins[i + 1])
+            ).sum()
+            for i, t in enumerate(bins[:-1])
+        ]
+
+        durations = pd.Series(durations, index=self.periods)
+        metrics = pd.DataFrame(index=self.periods)
+
+        grouper = pd.Grouper(key="onset_time", freq=self.period, closed="left")
+
+        speaker_types = ["FEM", "MAL", "CHI", "OCH"]
+        adults = ["FEM", "MAL"]
+
+        for speaker in speaker_types:
+            vocs = segments[segments["speaker_type"] == speaker].groupby(grouper)
+
+            vocs = vocs.agg(
+                voc_ph=("segment_onset", "count"),
+                voc_dur_ph=("duration", "sum"),
+                avg_voc_dur=("duration", "mean"),
+            )
+
+            metrics["voc_{}_ph".format(speaker.lower())] = (
+                vocs["voc_ph"].reindex(self.periods, fill_value=0) * 3600 / durations
+            )
+            metrics["voc_dur_{}_ph".format(speaker.lower())] = (
+                vocs["voc_dur_ph"].reindex(self.periods, fill_value=0)
+                * 3600
+                / durations
+            )
+            metrics["avg_voc_dur_{}".format(speaker.lower())] = vocs[
+                "avg_voc_dur"
+            ].reindex(self.periods)
+
+        #add duration and child_id to dataframe as they are always given
+        metrics["duration"] = (durations * 1000).astype(int)
+        metrics[self.by] = unit
+        metrics["child_id"] = self.project.recordings[
+            self.project.recordings[self.by] == unit
+        ]["child_id"].iloc[0]
+        
+        #get and add to dataframe children.csv columns asked
+        if self.child_cols:
+            for label in self.child_cols:
+                metrics[label]=self.project.children[
+                        self.project.children["child_id"] == metrics["child_id"].iloc[0]
+                ][label].iloc[0]
+                
+        #get and add to dataframe recordings.csv columns asked
+        if self.rec_cols:
+            for label in self.rec_cols:
+                #for every unit drop the duplicates for that column
+                value=self.project.recordings[
+                        self.project.recordings[self.by] == unit
+                ][label].drop_duplicates()
+                #check that there is only one row remaining (ie this column has a unique value for that unit)
+                if len(value) == 1:
+                    metrics[label]=value.iloc[0]
+                #otherwise, leave the column as NA
+                else:
+                    metrics[label]="NA"
+        
+        return metrics
+
+
+def setup(path: str, n_recordings: int, n_segments: int):
+    rng = np.random.default_rng(0)
+
+    os.makedirs(os.path.join(path, "metadata"))
+    minutes = rng.integers(0, 24 * 60, n_recordings)
+    recordings = pd.DataFrame(
+        {
+            "experiment": "bench",
+            "child_id": rng.integers(0, max(n_recordings // 5, 1), n_recordings),
+            "recording_filename": ["{}.wav".format(i) for i in range(n_recordings)],
+            "recording_device_type": "lena",
+            "date_iso": "2022-01-01",
+            "start_time": ["{:02d}:{:02d}".format(m // 60, m % 60) for m in minutes],
+            "duration": 16 * 3600 * 1000,
+        }
+    )
+    recordings.to_csv(os.path.join(path, "metadata/recordings.csv"), index=False)
+    pd.DataFrame(
+        {
+            "experiment": "bench",
+            "child_id": recordings["child_id"].unique(),
+            "child_dob": "2021-01-01",
+        }
+    ).to_csv(os.path.join(path, "metadata/children.csv"), index=False)
+
+    os.makedirs(os.path.join(path, "annotations/vtc/converted"))
+    annotations = []
+    for i, recording in enumerate(recordings["recording_filename"]):
+        duration = int(rng.integers(1, 16 * 3600)) * 1000
+        onsets = np.sort(rng.integers(0, duration - 3000, n_segments))
+        pd.DataFrame(
+            {
+                "segment_onset": onsets,
+                "segment_offset": onsets + rng.integers(100, 3000, n_segments),
+                "speaker_type": rng.choice(["CHI", "FEM", "MAL", "OCH"], n_segments),
+            }
+        ).to_csv(
+            os.path.join(path, "annotations/vtc/converted", "{}.csv".format(i)),
+            index=False,
+        )
+        annotations.append(
+            {
+                "set": "vtc",
+                "recording_filename": recording,
+                "range_onset": 0,
+                "range_offset": duration,
+                "annotation_filename": "{}.csv".format(i),
+            }
+        )
+
+    annotations = pd.DataFrame(annotations)
+    annotations["time_seek"] = 0
+    annotations["raw_filename"] = "raw"
+    annotations["format"] = "csv"
+    annotations["imported_at"] = "2022-01-01 00:00:00"
+    annotations["package_version"] = "0.0.4"
+    annotations["error"] = np.nan
+
+    project = ChildProject(path)
+    project.read()
+    am = AnnotationManager(project)
+    am.annotations = annotations
+    am.write()
+    return project
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--recordings", type=int, default=200)
+    parser.add_argument("--segments", type=int, default=5000)
+    parser.add_argument("--period", default="15Min")
+    args = parser.parse_args()
+
+    runs = [
+        ("former", LegacyPeriodMetrics, "unit"),
+        ("unit", PeriodMetrics, "unit"),
+        ("grouped", PeriodMetrics, "grouped"),
+    ]
+
+    with tempfile.TemporaryDirectory() as tmp, open(os.devnull, "w") as devnull:
+        with contextlib.redirect_stdout(devnull):
+            project = setup(
+                os.path.join(tmp, "dataset"), args.recordings, args.segments
+            )
+
+        print(
+            "{} recordings x {} segments, {} period".format(
+                args.recordings, args.segments, args.period
+            )
+        )
+
+        reference = None
+        for name, cls, engine in runs:
+            metrics = cls(project, set="vtc", period=args.period, engine=engine)
+
+            start = time.perf_counter()
+            result = metrics.extract()
+            elapsed = time.perf_counter() - start
+
+            if reference is None:
+                reference = result
+            else:
+                pd.testing.assert_frame_equal(reference, result)
+
+            print("{:<10}{:>8.2f}s".format(name, elapsed))
+
+
+if __name__ == "__main__":
+    main()
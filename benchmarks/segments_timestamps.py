@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""Compare AnnotationManager.get_segments_timestamps with the former implementation,
+which parsed the date and start time of the recording once per segment.
+
+usage: python benchmarks/segments_timestamps.py [--segments 200000] [--recordings 500]
+"""
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from ChildProject.annotations import AnnotationManager
+
+
+class Project:
+    def __init__(self, recordings):
+        self.recordings = recordings
+
+
+def legacy_get_segments_timestamps(am: AnnotationManager, segments: pd.DataFrame):
+    """row by row, as implemented before the recordings were parsed once"""
+    segments = segments.merge(
+        am.project.recordings[["recording_filename", "start_time", "date_iso"]].set_index(
+            "recording_filename"
+        ),
+        how="left",
+        right_index=True,
+        left_on="recording_filename",
+    )
+
+    segments["start_time"] = pd.to_datetime(
+        segments[["date_iso", "start_time"]].apply(
+            lambda row: "{} {}".format(str(row["date_iso"]), str(row["start_time"])),
+            axis=1,
+        ),
+        format="%Y-%m-%d %H:%M",
+        errors="coerce",
+    )
+
+    segments["onset_time"] = segments["start_time"] + pd.to_timedelta(
+        segments["segment_onset"], unit="ms", errors="coerce"
+    )
+    segments["offset_time"] = segments["start_time"] + pd.to_timedelta(
+        segments["segment_offset"], unit="ms", errors="coerce"
+    )
+
+    return segments.drop(columns=["start_time", "date_iso"])
+
+
+def setup(n_segments: int, n_recordings: int):
+    rng = np.random.default_rng(0)
+
+    minutes = rng.integers(0, 24 * 60, n_recordings)
+    recordings = pd.DataFrame(
+        {
+            "recording_filename": ["{}.wav".format(i) for i in range(n_recordings)],
+            "date_iso": pd.Timestamp("2022-01-01")
+            + pd.to_timedelta(rng.integers(0, 365, n_recordings), unit="D"),
+            "start_time": [
+                "{:02d}:{:02d}".format(m // 60, m % 60) for m in minutes
+            ],
+        }
+    )
+    recordings["date_iso"] = recordings["date_iso"].dt.strftime("%Y-%m-%d")
+    recordings.loc[0, "start_time"] = "NA"
+    recordings.loc[1, "date_iso"] = np.nan
+
+    onsets = rng.integers(0, 16 * 3600 * 1000, n_segments)
+    segments = pd.DataFrame(
+        {
+            "recording_filename": rng.choice(
+                recordings["recording_filename"], n_segments
+            ),
+            "segment_onset": onsets,
+            "segment_offset": onsets + rng.integers(100, 3000, n_segments),
+        }
+    )
+
+    am = AnnotationManager.__new__(AnnotationManager)
+    am.project = Project(recordings)
+    return am, segments
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--segments", type=int, default=200000)
+    parser.add_argument("--recordings", type=int, default=500)
+    args = parser.parse_args()
+
+    am, segments = setup(args.segments, args.recordings)
+
+    start = time.perf_counter()
+    legacy = legacy_get_segments_timestamps(am, segments)
+    legacy_elapsed = time.perf_counter() - start
+
+    start = time.perf_counter()
+    timestamps = am.get_segments_timestamps(segments)
+    elapsed = time.perf_counter() - start
+
+    pd.testing.assert_frame_equal(legacy, timestamps)
+
+    print("{} segments, {} recordings".format(args.segments, args.recordings))
+    print("per segment: {:.2f}s".format(legacy_elapsed))
+    print("per recording: {:.2f}s".format(elapsed))
+
+
+if __name__ == "__main__":
+    main()
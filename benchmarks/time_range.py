@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+"""Compare AnnotationManager.get_within_time_range with the former implementation,
+which intersected each annotation with the clock-time range one row at a time.
+
+usage: python benchmarks/time_range.py [--annotations 20000] [--recordings 500]
+"""
+import argparse
+import datetime
+import time
+
+import numpy as np
+import pandas as pd
+
+from ChildProject.annotations import AnnotationManager
+from ChildProject.utils import Segment, intersect_ranges
+
+
+class Project:
+    def __init__(self, recordings):
+        self.recordings = recordings
+
+
+def legacy_get_within_time_range(
+    am: AnnotationManager, annotations: pd.DataFrame, start_time: str, end_time: str
+):
+    """row by row, as implemented before the vectorized version"""
+
+    def get_ms_since_midight(dt):
+        return (dt - dt.replace(hour=0, minute=0, second=0)).total_seconds() * 1000
+
+    start_ts = get_ms_since_midight(datetime.datetime.strptime(start_time, "%H:%M"))
+    end_ts = get_ms_since_midight(datetime.datetime.strptime(end_time, "%H:%M"))
+
+    annotations = annotations.merge(
+        am.project.recordings[["recording_filename", "start_time"]], how="left"
+    )
+    annotations["start_time"] = pd.to_datetime(
+        annotations["start_time"], format="%H:%M", errors="coerce"
+    )
+    annotations.dropna(subset=["start_time"], inplace=True)
+
+    annotations["range_onset_time"] = annotations["start_time"] + pd.to_timedelta(
+        annotations["range_onset"], unit="ms"
+    )
+    annotations["range_onset_ts"] = (
+        annotations["range_onset_time"].apply(get_ms_since_midight).astype(int)
+    )
+    annotations["range_offset_ts"] = (
+        annotations["range_onset_ts"]
+        + annotations["range_offset"]
+        - annotations["range_onset"]
+    ).astype(int)
+
+    matches = []
+    for annotation in annotations.to_dict(orient="records"):
+        onsets = np.arange(start_ts, annotation["range_offset_ts"], 86400 * 1000)
+        offsets = onsets + (end_ts - start_ts)
+
+        xs = (Segment(onset, offset) for onset, offset in zip(onsets, offsets))
+        ys = iter(
+            (Segment(annotation["range_onset_ts"], annotation["range_offset_ts"]),)
+        )
+
+        for segment in intersect_ranges(xs, ys):
+            ann = annotation.copy()
+            ann["range_onset"] += segment.start - ann["range_onset_ts"]
+            ann["range_offset"] += segment.stop - ann["range_offset_ts"]
+
+            ann["range_onset_time"] = str(
+                datetime.timedelta(milliseconds=segment.start % (86400 * 1000))
+            )[:-3].zfill(len("00:00"))
+            ann["range_offset_time"] = str(
+                datetime.timedelta(milliseconds=segment.stop % (86400 * 1000))
+            )[:-3].zfill(len("00:00"))
+
+            if ann["range_onset"] >= ann["range_offset"]:
+                continue
+
+            matches.append(ann)
+
+    return pd.DataFrame(matches).drop(columns=["range_onset_ts", "range_offset_ts"])
+
+
+def setup(n_annotations: int, n_recordings: int):
+    rng = np.random.default_rng(0)
+
+    minutes = rng.integers(0, 24 * 60, n_recordings)
+    recordings = pd.DataFrame(
+        {
+            "recording_filename": ["{}.wav".format(i) for i in range(n_recordings)],
+            "start_time": [
+                "{:02d}:{:02d}".format(m // 60, m % 60) for m in minutes
+            ],
+        }
+    )
+    recordings.loc[0, "start_time"] = "NA"
+
+    # mostly short ranges (e.g. sampled portions), some spanning several days
+    onsets = rng.integers(0, 72 * 3600 * 1000, n_annotations)
+    durations = np.where(
+        rng.random(n_annotations) < 0.9,
+        rng.integers(500, 600 * 1000, n_annotations),
+        rng.integers(3600 * 1000, 72 * 3600 * 1000, n_annotations),
+    )
+    annotations = pd.DataFrame(
+        {
+            "recording_filename": rng.choice(
+                recordings["recording_filename"], n_annotations
+            ),
+            "set": rng.choice(["vtc", "its"], n_annotations),
+            "range_onset": onsets,
+            "range_offset": onsets + durations,
+        }
+    )
+
+    am = AnnotationManager.__new__(AnnotationManager)
+    am.project = Project(recordings)
+    return am, annotations
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--annotations", type=int, default=20000)
+    parser.add_argument("--recordings", type=int, default=500)
+    args = parser.parse_args()
+
+    am, annotations = setup(args.annotations, args.recordings)
+
+    start = time.perf_counter()
+    legacy = legacy_get_within_time_range(am, annotations, "09:00", "18:30")
+    legacy_elapsed = time.perf_counter() - start
+
+    start = time.perf_counter()
+    matches = am.get_within_time_range(annotations, "09:00", "18:30", errors="coerce")
+    elapsed = time.perf_counter() - start
+
+    pd.testing.assert_frame_equal(legacy.reset_index(drop=True), matches)
+
+    print(
+        "{} annotations, {} recordings ({} matches)".format(
+            args.annotations, args.recordings, len(matches)
+        )
+    )
+    print("row by row: {:.2f}s".format(legacy_elapsed))
+    print("vectorized: {:.2f}s".format(elapsed))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""Compare the throughput of IndexTable.validate with the former row-wise implementation
+on a synthetic table of segments.
+
+usage: python benchmarks/validate_table.py [--rows 1000000]
+"""
+import argparse
+import datetime
+import re
+import time
+
+import numpy as np
+import pandas as pd
+
+from ChildProject.annotations import AnnotationManager
+from ChildProject.tables import IndexTable
+
+
+def legacy_validate(table: IndexTable):
+    """row-wise checks, as implemented before the vectorized engine"""
+    errors, warnings = [], []
+    columns = {c.name: c for c in table.columns}
+
+    rows = table.df.to_dict(orient="index")
+    for line_number in rows:
+        row = rows[line_number]
+        for column_name in row.keys():
+            column_attr = columns.get(column_name)
+
+            if column_attr is None:
+                continue
+
+            message = None
+            if callable(column_attr.function):
+                try:
+                    ok = column_attr.function(str(row[column_name])) == True
+                except:
+                    ok = False
+
+                if not ok:
+                    message = "'{}' does not pass callable test for column '{}' on line {}".format(
+                        row[column_name], column_name, line_number
+                    )
+            elif (
+                column_attr.choices and str(row[column_name]) not in column_attr.choices
+            ):
+                message = "'{}' is not a permitted value for column '{}' on line {}, should be any of [{}]".format(
+                    row[column_name],
+                    column_name,
+                    line_number,
+                    ",".join(column_attr.choices),
+                )
+            elif column_attr.datetime:
+                try:
+                    datetime.datetime.strptime(row[column_name], column_attr.datetime)
+                except:
+                    message = "'{}' is not a proper date/time for column '{}' (expected {}) on line {}".format(
+                        row[column_name],
+                        column_name,
+                        column_attr.datetime,
+                        line_number,
+                    )
+            elif column_attr.regex:
+                if not re.fullmatch(column_attr.regex, str(row[column_name])):
+                    message = "'{}' does not match the format required for '{}' on line {}, expected '{}'".format(
+                        row[column_name], column_name, line_number, column_attr.regex,
+                    )
+
+            if message is None:
+                continue
+
+            if column_attr.required and str(row[column_name]) != "NA":
+                errors.append(table.msg(message))
+            elif column_attr.required or str(row[column_name]) != "NA":
+                warnings.append(table.msg(message))
+
+    return errors, warnings
+
+
+def synthetic_segments(rows: int) -> pd.DataFrame:
+    rng = np.random.default_rng(0)
+
+    onsets = np.sort(rng.integers(0, 16 * 3600 * 1000, rows))
+    # about 1% of the values are invalid
+    df = pd.DataFrame(
+        {
+            "raw_filename": "recording.rttm",
+            "segment_onset": onsets,
+            "segment_offset": onsets + rng.integers(100, 5000, rows),
+            "speaker_type": rng.choice(
+                ["CHI", "OCH", "FEM", "MAL", "SPEECH"],
+                rows,
+                p=[0.3, 0.2, 0.3, 0.19, 0.01],
+            ),
+            "vcm_type": rng.choice(
+                ["C", "N", "Y", "L", "NA", "U"], rows, p=[0.2, 0.2, 0.2, 0.2, 0.19, 0.01]
+            ),
+            "words": rng.integers(0, 10, rows).astype(str),
+            "addressee": rng.choice(
+                ["T", "C", "A", "U", "NA", "?"], rows, p=[0.2, 0.2, 0.2, 0.2, 0.19, 0.01]
+            ),
+        }
+    )
+    df.index = df.index + 2
+    return df
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=1000000)
+    parser.add_argument("--skip-legacy", action="store_true")
+    args = parser.parse_args()
+
+    table = IndexTable("segments", "synthetic", AnnotationManager.SEGMENTS_COLUMNS)
+    table.df = synthetic_segments(args.rows)
+
+    start = time.perf_counter()
+    errors, warnings = table.validate()
+    elapsed = time.perf_counter() - start
+    print(
+        "vectorized: {:.2f}s ({:.0f} rows/s), {} errors, {} warnings".format(
+            elapsed, args.rows / elapsed, len(errors), len(warnings)
+        )
+    )
+
+    if args.skip_legacy:
+        return
+
+    start = time.perf_counter()
+    legacy_errors, legacy_warnings = legacy_validate(table)
+    legacy_elapsed = time.perf_counter() - start
+    print(
+        "row-wise:   {:.2f}s ({:.0f} rows/s), {} errors, {} warnings".format(
+            legacy_elapsed,
+            args.rows / legacy_elapsed,
+            len(legacy_errors),
+            len(legacy_warnings),
+        )
+    )
+
+    assert errors == legacy_errors
+    assert warnings == legacy_warnings
+    print("speed-up: x{:.1f}".format(legacy_elapsed / elapsed))
+
+
+if __name__ == "__main__":
+    main()
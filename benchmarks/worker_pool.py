@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""Measure the inter-process traffic and wall time of AnnotationManager.validate
+with a pool that pickles the manager along with every chunk of tasks (former behavior)
+versus ChildProject.parallel.Executor, which ships a lightweight copy once per worker.
+
+usage: python benchmarks/worker_pool.py [--annotations 5000] [--index 200000] [--threads 4]
+"""
+import argparse
+import contextlib
+import math
+import multiprocessing as mp
+import os
+import pickle
+import shutil
+import tempfile
+import time
+from functools import partial
+
+import pandas as pd
+
+from ChildProject.annotations import AnnotationManager
+from ChildProject.parallel import Executor, _run
+from ChildProject.projects import ChildProject
+
+
+def setup(path: str, index_size: int) -> AnnotationManager:
+    shutil.copytree("examples/valid_raw_data", path)
+
+    project = ChildProject(path)
+    am = AnnotationManager(project)
+
+    input_annotations = pd.read_csv(os.path.join(path, "annotations/input.csv"))
+    am.import_annotations(input_annotations[input_annotations["set"] == "vtc_rttm"])
+    am.read()
+
+    # inflate the index, as with a large dataset
+    am.annotations = pd.concat(
+        [am.annotations] * math.ceil(index_size / len(am.annotations))
+    ).iloc[:index_size]
+
+    return am
+
+
+def ipc_bytes(function, tasks: list, threads: int, shared=None) -> int:
+    # same chunking as multiprocessing.pool.Pool.map
+    chunksize, extra = divmod(len(tasks), threads * 4)
+    chunksize += 1 if extra else 0
+
+    total = sum(
+        len(pickle.dumps((function, tasks[i : i + chunksize])))
+        for i in range(0, len(tasks), chunksize)
+    )
+
+    if shared is not None:
+        total += threads * len(pickle.dumps(shared))
+
+    return total
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--annotations", type=int, default=5000)
+    parser.add_argument("--index", type=int, default=200000)
+    parser.add_argument("--threads", type=int, default=4)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp, open(os.devnull, "w") as devnull:
+        with contextlib.redirect_stdout(devnull):
+            am = setup(os.path.join(tmp, "dataset"), args.index)
+
+        annotations = am.annotations[am.annotations["set"] == "vtc_rttm"]
+        tasks = annotations.sample(
+            args.annotations, replace=True, random_state=0
+        ).to_dict(orient="records")
+
+        legacy_bytes = ipc_bytes(am.validate_annotation, tasks, args.threads)
+        worker_bytes = ipc_bytes(
+            partial(_run, "validate_annotation", (), False),
+            tasks,
+            args.threads,
+            shared=am._worker_copy(),
+        )
+
+        with contextlib.redirect_stdout(devnull):
+            start = time.perf_counter()
+            with mp.Pool(processes=args.threads) as pool:
+                legacy = pool.map(am.validate_annotation, tasks)
+            legacy_elapsed = time.perf_counter() - start
+
+            start = time.perf_counter()
+            with Executor(
+                args.threads, "process", target=am._worker_copy()
+            ) as executor:
+                results = executor.map("validate_annotation", tasks)
+            elapsed = time.perf_counter() - start
+
+        assert legacy == results
+
+    print(
+        "manager pickled per chunk: {:.1f} MB sent, {:.2f}s".format(
+            legacy_bytes / 1024 ** 2, legacy_elapsed
+        )
+    )
+    print(
+        "manager shipped per worker: {:.1f} MB sent (at most), {:.2f}s".format(
+            worker_bytes / 1024 ** 2, elapsed
+        )
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -16,7 +16,10 @@ requires = {
     ],  # these are not direct dependencies, but rather constraints to avoid version clashes
 }
 
-extra_requires = {"metrics": 'pygamma-agreement; python_version >= "3.6.0"'}
+extra_requires = {
+    "metrics": 'pygamma-agreement; python_version >= "3.6.0"',
+    "storage": "pyarrow",
+}
 
 setup(
     name="ChildProject",
@@ -1,5 +1,6 @@
 from ChildProject.projects import ChildProject
 from ChildProject.annotations import AnnotationManager
+from ChildProject.storage import SegmentsStore
 from ChildProject.tables import IndexTable
 from ChildProject.converters import *
 import glob
@@ -251,6 +252,11 @@ def test_within_ranges(project):
         exception_caught
     ), "get_within_ranges should raise an exception when annotations do not fully cover the required ranges"
 
+    # replacing the index of annotations should reset the interval index
+    am.annotations = pd.DataFrame(annotations[-2:])
+    matches = am.get_within_ranges(ranges, ["matching"])
+    assert matches["range_onset"].tolist() == [3000, 3500]
+
 
 def test_merge(project):
     am = AnnotationManager(project)
@@ -294,6 +300,473 @@ def test_merge(project):
     )
 
 
+def test_merge_partial_overlap(project):
+    am = AnnotationManager(project)
+
+    left = pd.DataFrame(
+        {
+            "segment_onset": [0, 4000, 7000, 9000],
+            "segment_offset": [2000, 6000, 8000, 12000],
+            "speaker_type": ["CHI", "FEM", "MAL", "FEM"],
+        }
+    )
+    right = pd.DataFrame(
+        {
+            "segment_onset": [4000, 7000, 12000],
+            "segment_offset": [6000, 8000, 13000],
+            "words": [3, 2, 1],
+            "phonemes": [9, 6, 3],
+            "syllables": [4, 3, 1],
+        }
+    )
+
+    # sound2.wav is only annotated in the left set
+    for annotation_set, recording, onset, offset, segments in [
+        ("merge_left", "sound.wav", 0, 10000, left),
+        ("merge_left", "sound2.wav", 0, 5000, left),
+        ("merge_right", "sound.wav", 5000, 15000, right),
+    ]:
+        am.import_annotations(
+            pd.DataFrame(
+                [
+                    {
+                        "set": annotation_set,
+                        "raw_filename": "file.rttm",
+                        "time_seek": 0,
+                        "recording_filename": recording,
+                        "range_onset": onset,
+                        "range_offset": offset,
+                        "format": "rttm",
+                    }
+                ]
+            ),
+            import_function=lambda filename, segments=segments: segments.copy(),
+        )
+
+    am.merge_sets(
+        left_set="merge_left",
+        right_set="merge_right",
+        left_columns=["speaker_type"],
+        right_columns=["phonemes", "syllables", "words"],
+        output_set="merge_output",
+        threads=1,
+    )
+    am.read()
+
+    merged = am.annotations[am.annotations["set"] == "merge_output"]
+    assert merged[
+        ["recording_filename", "annotation_filename", "range_onset", "range_offset"]
+    ].values.tolist() == [["sound.wav", "sound_5000_10000.csv", 5000, 10000]]
+
+    segments = am.get_segments(merged).sort_values("segment_onset")
+    pd.testing.assert_frame_equal(
+        segments[
+            [
+                "segment_onset",
+                "segment_offset",
+                "speaker_type",
+                "words",
+                "phonemes",
+                "syllables",
+            ]
+        ].reset_index(drop=True),
+        pd.DataFrame(
+            {
+                "segment_onset": [5000, 7000, 9000],
+                "segment_offset": [6000, 8000, 10000],
+                "speaker_type": ["FEM", "MAL", "FEM"],
+                "words": [3, 2, np.nan],
+                "phonemes": [9, 6, np.nan],
+                "syllables": [4, 3, np.nan],
+            }
+        ),
+        check_dtype=False,
+    )
+
+
+@pytest.mark.parametrize("output_format", ["parquet", "feather"])
+def test_columnar_storage(project, output_format):
+    pytest.importorskip("pyarrow")
+
+    am = AnnotationManager(project)
+
+    input_annotations = pd.read_csv("examples/valid_raw_data/annotations/input.csv")
+    input_annotations = input_annotations[
+        input_annotations["set"].isin(["vtc_rttm", "eaf_basic"])
+    ]
+    am.import_annotations(input_annotations)
+    am.read()
+
+    csv_segments = am.get_segments(am.annotations)
+    csv_files = [
+        os.path.join(project.path, "annotations", a["set"], "converted", a["annotation_filename"])
+        for a in am.annotations.to_dict(orient="records")
+    ]
+
+    am.migrate_set("vtc_rttm", output_format)
+    am.migrate_set("eaf_basic", output_format)
+    am.read()
+
+    assert all(
+        am.annotations["annotation_filename"].str.endswith("." + output_format)
+    )
+    assert not any(os.path.exists(f) for f in csv_files), "csv files were not removed"
+
+    errors, warnings = am.validate()
+    assert len(errors) == 0 and len(warnings) == 0, "malformed annotations detected"
+
+    segments = am.get_segments(am.annotations)
+    columns = csv_segments.columns.drop("annotation_filename")
+
+    pd.testing.assert_frame_equal(
+        standardize_dataframe(segments.fillna("NA"), columns),
+        standardize_dataframe(csv_segments.fillna("NA"), columns),
+    )
+
+    # column projection
+    projected = am.get_segments(am.annotations, columns=["speaker_type"])
+    assert "transcription" not in projected.columns
+    columns = ["segment_onset", "segment_offset", "speaker_type", "set"]
+    pd.testing.assert_frame_equal(
+        standardize_dataframe(projected.fillna("NA"), columns),
+        standardize_dataframe(csv_segments.fillna("NA"), columns),
+    )
+
+    # new annotations of the set are stored in the same format
+    am.remove_set("vtc_rttm")
+    am.import_annotations(
+        input_annotations[input_annotations["set"] == "eaf_basic"].assign(
+            range_offset=100000
+        )
+    )
+    am.read()
+
+    assert am.get_set_format("eaf_basic") == output_format
+
+
+def test_consolidated_store(project, monkeypatch):
+    pytest.importorskip("pyarrow")
+
+    am = AnnotationManager(project)
+
+    input_annotations = pd.read_csv("examples/valid_raw_data/annotations/input.csv")
+    input_annotations = input_annotations[
+        input_annotations["set"].isin(["vtc_rttm", "eaf_basic", "textgrid"])
+    ]
+    am.import_annotations(input_annotations)
+    am.read()
+
+    truth = am.get_segments(am.annotations)
+
+    for annotation_set in ["vtc_rttm", "eaf_basic", "textgrid"]:
+        am.consolidate_set(annotation_set)
+        assert am.is_consolidated(annotation_set)
+
+    am.read()
+
+    # the footer of each store is only parsed once
+    opened = []
+    open_store = SegmentsStore.open
+
+    def counting_open(store):
+        opened.append(store.path)
+        open_store(store)
+
+    monkeypatch.setattr(SegmentsStore, "open", counting_open)
+    assert all(
+        am.converted_exists(a["set"], a["annotation_filename"])
+        for a in am.annotations.to_dict(orient="records")
+    )
+    assert len(opened) == len(set(opened)) == 3
+    monkeypatch.undo()
+    assert not any(
+        os.path.exists(
+            os.path.join(
+                project.path,
+                "annotations",
+                a["set"],
+                "converted",
+                a["annotation_filename"],
+            )
+        )
+        for a in am.annotations.to_dict(orient="records")
+    ), "standalone files were not removed"
+
+    errors, warnings = am.validate()
+    assert len(errors) == 0 and len(warnings) == 0, "malformed annotations detected"
+
+    columns = truth.columns
+    pd.testing.assert_frame_equal(
+        standardize_dataframe(am.get_segments(am.annotations).fillna("NA"), columns),
+        standardize_dataframe(truth.fillna("NA"), columns),
+    )
+
+    # partial ranges only retrieve the relevant segments
+    annotations = am.annotations[am.annotations["set"] == "eaf_basic"].copy()
+    annotations["range_onset"] = 10000
+    annotations["range_offset"] = 20000
+    segments = am.get_segments(annotations)
+    assert len(segments) > 0
+    assert segments["segment_onset"].between(10000, 20000).all()
+
+    # new annotations are added to the store, and the others are copied as is
+    previous = am.annotations[am.annotations["set"] == "eaf_basic"]
+    am.import_annotations(
+        input_annotations[input_annotations["set"] == "eaf_basic"].assign(
+            range_offset=100000
+        )
+    )
+    am.read()
+    assert (
+        len(
+            glob.glob(
+                os.path.join(project.path, "annotations/eaf_basic/converted/*.csv")
+            )
+        )
+        == 0
+    )
+    assert len(am.get_segments(am.annotations[am.annotations["set"] == "eaf_basic"])) > 0
+    eaf = truth[truth["set"] == "eaf_basic"].dropna(axis=1, how="all")
+    pd.testing.assert_frame_equal(
+        standardize_dataframe(am.get_segments(previous).fillna("NA"), eaf.columns),
+        standardize_dataframe(eaf.fillna("NA"), eaf.columns),
+    )
+
+    # and the set can be turned back into standalone files
+    am.migrate_set("vtc_rttm", "csv")
+    assert not am.is_consolidated("vtc_rttm")
+    am.read()
+    segments = am.get_segments(am.annotations[am.annotations["set"] == "vtc_rttm"])
+    truth = truth[truth["set"] == "vtc_rttm"].dropna(axis=1, how="all")
+    pd.testing.assert_frame_equal(
+        standardize_dataframe(segments.fillna("NA"), truth.columns),
+        standardize_dataframe(truth.fillna("NA"), truth.columns),
+    )
+
+
+def test_incremental_validation(project, capfd):
+    am = AnnotationManager(project)
+
+    input_annotations = pd.read_csv("examples/valid_raw_data/annotations/input.csv")
+    input_annotations = input_annotations[
+        input_annotations["set"].isin(["vtc_rttm", "eaf_basic"])
+    ]
+    am.import_annotations(input_annotations)
+    am.read()
+
+    annotations = am.annotations[am.annotations["set"].isin(["vtc_rttm", "eaf_basic"])]
+    truth = am.validate(annotations)
+
+    assert am.validate(annotations, incremental=True) == truth
+    capfd.readouterr()
+
+    assert am.validate(annotations, incremental=True) == truth
+    assert "validating" not in capfd.readouterr().out, "unchanged files were validated again"
+
+    # altered files are validated again
+    annotation = annotations[annotations["set"] == "vtc_rttm"].iloc[0]
+    path = os.path.join(
+        project.path,
+        "annotations",
+        "vtc_rttm",
+        "converted",
+        annotation["annotation_filename"],
+    )
+    segments = pd.read_csv(path, keep_default_na=False)
+    segments.loc[0, "speaker_type"] = "XXX"
+    segments.to_csv(path, index=False)
+
+    errors, warnings = am.validate(annotations, incremental=True)
+    out = capfd.readouterr().out
+    assert "validating {}".format(annotation["annotation_filename"]) in out
+    assert out.count("validating") == 1
+    assert len(warnings) == len(truth[1]) + 1
+
+    # as long as they do not pass validation
+    segments.loc[0, "segment_onset"] = "X"
+    segments.to_csv(path, index=False)
+    for i in range(2):
+        errors, warnings = am.validate(annotations, incremental=True)
+        assert len(errors) == 1
+        assert capfd.readouterr().out.count("validating") == 1
+
+
+def test_segments_cache(project):
+    am = AnnotationManager(project)
+
+    input_annotations = pd.read_csv("examples/valid_raw_data/annotations/input.csv")
+    input_annotations = input_annotations[input_annotations["set"] == "vtc_rttm"]
+    am.import_annotations(input_annotations)
+    am.read()
+
+    annotations = am.annotations[am.annotations["set"] == "vtc_rttm"]
+    first = am.get_segments(annotations)
+    assert am.segments_cache.misses == len(annotations)
+    assert am.segments_cache.hits == 0
+
+    second = am.get_segments(annotations)
+    assert am.segments_cache.hits == len(annotations)
+    pd.testing.assert_frame_equal(first, second)
+
+    # cached segments must not be altered by callers
+    second["segment_onset"] = 0
+    pd.testing.assert_frame_equal(first, am.get_segments(annotations))
+
+    # the cache does not survive pickling
+    import pickle
+
+    assert len(pickle.loads(pickle.dumps(am.segments_cache))) == 0
+
+    # modifying the set invalidates the cache
+    am.import_annotations(input_annotations)
+    assert len(am.segments_cache) == 0
+
+    am.remove_set("vtc_rttm")
+    am.read()
+    assert len(am.segments_cache) == 0
+
+    # entries are evicted when the capacity is exceeded
+    am = AnnotationManager(project, cache_size=1)
+    am.import_annotations(input_annotations)
+    am.read()
+    am.get_segments(am.annotations[am.annotations["set"] == "vtc_rttm"])
+    assert len(am.segments_cache) == 0 and am.segments_cache.size == 0
+
+
+def test_segments_columns(project):
+    am = AnnotationManager(project)
+
+    input_annotations = pd.read_csv("examples/valid_raw_data/annotations/input.csv")
+    am.import_annotations(
+        input_annotations[input_annotations["set"].isin(["vtc_rttm", "eaf_basic"])]
+    )
+    am.read()
+
+    segments = am.get_segments(am.annotations)
+    projected = am.get_segments(am.annotations, columns=["speaker_type", "words"])
+
+    assert set(projected.columns) - set(am.annotations.columns) == {
+        "segment_onset",
+        "segment_offset",
+        "speaker_type",
+        "words",
+    }
+
+    columns = ["segment_onset", "segment_offset", "speaker_type", "set"]
+    pd.testing.assert_frame_equal(
+        standardize_dataframe(projected.fillna("NA"), columns),
+        standardize_dataframe(segments.fillna("NA"), columns),
+    )
+
+    typed = am.get_segments(am.annotations, enforce_dtypes=True)
+    assert typed["speaker_type"].dtype == object
+    assert typed["transcription"].dropna().map(type).eq(str).all()
+
+
+def test_iter_segments(project):
+    am = AnnotationManager(project)
+
+    input_annotations = pd.read_csv("examples/valid_raw_data/annotations/input.csv")
+    am.import_annotations(
+        input_annotations[input_annotations["set"].isin(["vtc_rttm", "alice"])]
+    )
+    am.read()
+
+    segments = am.get_segments(am.annotations)
+    columns = ["set", "segment_onset", "segment_offset"]
+
+    batches = list(am.iter_segments(am.annotations))
+    pd.testing.assert_frame_equal(
+        standardize_dataframe(pd.concat(batches), columns),
+        standardize_dataframe(segments, columns),
+    )
+
+    batches = list(am.iter_segments(am.annotations, batch_size=3, columns=columns))
+    assert all(len(batch) == 3 for batch in batches[:-1])
+    assert 0 < len(batches[-1]) <= 3
+    assert all(batch.columns.tolist() == columns for batch in batches)
+    pd.testing.assert_frame_equal(
+        standardize_dataframe(pd.concat(batches), columns),
+        standardize_dataframe(segments, columns),
+    )
+
+
+def test_compact_segments(project):
+    am = AnnotationManager(project)
+
+    input_annotations = pd.read_csv("examples/valid_raw_data/annotations/input.csv")
+    am.import_annotations(
+        input_annotations[input_annotations["set"].isin(["vtc_rttm", "alice"])]
+    )
+    am.read(compact=True)
+
+    assert am.annotations["set"].dtype == "category"
+    assert am.annotations["range_onset"].dtype == np.int32
+
+    segments = am.get_segments(am.annotations)
+    compact = am.get_segments(am.annotations, compact=True)
+
+    assert compact["speaker_type"].dtype == "category"
+    assert compact["set"].dtype == "category"
+    assert compact["segment_onset"].dtype == np.int32
+    assert (
+        compact.memory_usage(deep=True).sum() < segments.memory_usage(deep=True).sum()
+    )
+
+    columns = ["set", "segment_onset", "segment_offset", "speaker_type"]
+    pd.testing.assert_frame_equal(
+        standardize_dataframe(compact.astype(segments.dtypes), columns),
+        standardize_dataframe(segments, columns),
+    )
+
+    batches = list(am.iter_segments(am.annotations, batch_size=100, compact=True))
+    assert all(
+        batch["speaker_type"].dtype == compact["speaker_type"].dtype
+        for batch in batches
+    )
+
+
+def test_import_journal(project):
+    am = AnnotationManager(project)
+
+    input_annotations = pd.read_csv("examples/valid_raw_data/annotations/input.csv")
+    index = pd.read_csv("output/annotations/metadata/annotations.csv")
+
+    for s in ["vtc_rttm", "alice"]:
+        am.import_annotations(
+            input_annotations[input_annotations["set"] == s], journal=True
+        )
+
+    # the index is not rewritten, but new rows are visible
+    pd.testing.assert_frame_equal(
+        pd.read_csv("output/annotations/metadata/annotations.csv"), index
+    )
+    journal = pd.read_csv("output/annotations/metadata/annotations.journal.csv")
+    assert set(journal["set"]) == {"vtc_rttm", "alice"}
+    assert len(journal) == len(am.annotations)
+
+    am = AnnotationManager(project)
+    assert len(am.errors) == 0
+    assert len(am.annotations) == len(journal)
+
+    am.compact_index()
+    assert not os.path.exists("output/annotations/metadata/annotations.journal.csv")
+    assert len(pd.read_csv("output/annotations/metadata/annotations.csv")) == len(
+        journal
+    )
+
+    # rows appended after another instance read the index survive its next write
+    stale = AnnotationManager(project)
+    am.import_annotations(
+        input_annotations[input_annotations["set"] == "textgrid"], journal=True
+    )
+    stale.write()
+    assert not os.path.exists("output/annotations/metadata/annotations.journal.csv")
+    index = pd.read_csv("output/annotations/metadata/annotations.csv")
+    assert len(index) == len(journal) + 1
+    assert "textgrid" in set(stale.annotations["set"])
+
+
 def test_clipping(project):
     am = AnnotationManager(project)
 
@@ -314,6 +787,27 @@ def test_clipping(project):
         segments.shape[0]
     )
 
+    # overlapping annotations sharing the same converted file
+    annotation = am.annotations[am.annotations["set"] == "vtc_rttm"].iloc[[0]]
+    annotations = pd.concat([annotation] * 3)
+    annotations["range_onset"] = [1980000, 1982000, 1950000]
+    annotations["range_offset"] = [1983000, 1990000, 1950100]
+
+    segments = am.get_segments(annotations)
+    full = am.get_segments(annotation)
+    truth = pd.concat(
+        [
+            am.clip_segments(full.copy(), onset, offset).assign(range_onset=onset)
+            for onset, offset in annotations[["range_onset", "range_offset"]].values
+        ]
+    )
+
+    assert len(segments) > 0
+    pd.testing.assert_frame_equal(
+        segments[["segment_onset", "segment_offset", "speaker_type", "range_onset"]],
+        truth[["segment_onset", "segment_offset", "speaker_type", "range_onset"]],
+    )
+
 
 def test_within_time_range(project):
     am = AnnotationManager(project)
@@ -338,6 +832,80 @@ def test_within_time_range(project):
     assert exception_caught, "no exception was thrown despite invalid times"
 
 
+@pytest.mark.parametrize(
+    "start_time,range_onset,range_offset,window,truth",
+    [
+        # annotation crossing midnight
+        (
+            "23:30",
+            0,
+            3600000,
+            ("00:00", "01:00"),
+            [(1800000, 3600000, "00:00", "00:30")],
+        ),
+        (
+            "23:30",
+            0,
+            3600000,
+            ("23:00", "23:45"),
+            [(0, 900000, "23:30", "23:45")],
+        ),
+        # recording longer than 24 hours, over three days
+        (
+            "08:00",
+            0,
+            50 * 3600000,
+            ("09:00", "10:00"),
+            [
+                (3600000, 7200000, "09:00", "10:00"),
+                (90000000, 93600000, "09:00", "10:00"),
+                (176400000, 180000000, "09:00", "10:00"),
+            ],
+        ),
+        # onsets with seconds and fractions of seconds
+        (
+            "08:59",
+            30500,
+            90750,
+            ("09:00", "20:00"),
+            [(60500, 90750, "09:00", "9:00:30.250")],
+        ),
+        (
+            "19:59",
+            1250,
+            120000,
+            ("09:00", "20:00"),
+            [(1250, 60250, "19:59", "20:00")],
+        ),
+    ],
+)
+def test_within_time_range_clock(
+    project, start_time, range_onset, range_offset, window, truth
+):
+    am = AnnotationManager(project)
+    am.project.recordings = pd.DataFrame(
+        [{"recording_filename": "sound.wav", "start_time": start_time}]
+    )
+
+    annotations = pd.DataFrame(
+        [
+            {
+                "recording_filename": "sound.wav",
+                "range_onset": range_onset,
+                "range_offset": range_offset,
+            }
+        ]
+    )
+    matches = am.get_within_time_range(annotations, *window)
+
+    assert [
+        tuple(row)
+        for row in matches[
+            ["range_onset", "range_offset", "range_onset_time", "range_offset_time"]
+        ].values.tolist()
+    ] == truth
+
+
 def test_segments_timestamps(project):
     am = AnnotationManager(project)
 
@@ -350,6 +918,11 @@ def test_segments_timestamps(project):
             }
         ]
     )
+    timestamps = am.get_segments_timestamps(segments, ignore_date=True)
+    assert timestamps["onset_time"].tolist() == [
+        datetime.datetime(1900, 1, 1, 9 + 1, 0, 0)
+    ]
+
     segments = am.get_segments_timestamps(segments)
 
     truth = pd.DataFrame(
@@ -493,6 +1066,9 @@ from functools import partial
 
 
 def check_its(segments, truth):
+    assert segments["cries_count"].tolist() == segments["cries"].apply(len).tolist()
+    assert segments["vfxs_count"].tolist() == segments["vfxs"].apply(len).tolist()
+
     segments["cries"] = segments["cries"].astype(str)
     segments["utterances"] = (
         segments["utterances"]
@@ -1,6 +1,15 @@
+import os
+import pytest
+import shutil
 import subprocess
 
 
+@pytest.fixture(scope="function", autouse=True)
+def project(request):
+    if not os.path.exists("output/cli"):
+        shutil.copytree(src="examples/valid_raw_data", dst="output/cli")
+
+
 def cli(cmd):
     process = subprocess.Popen(cmd, stderr=subprocess.PIPE, stdout=subprocess.PIPE)
     stdout, stderr = process.communicate()
@@ -10,14 +19,14 @@ def cli(cmd):
 
 def test_validate():
     stdout, stderr, exit_code = cli(
-        ["child-project", "validate", "examples/valid_raw_data"]
+        ["child-project", "validate", "output/cli"]
     )
     assert exit_code == 0
 
 
 def test_overview():
     stdout, stderr, exit_code = cli(
-        ["child-project", "overview", "examples/valid_raw_data"]
+        ["child-project", "overview", "output/cli"]
     )
     assert exit_code == 0
 
@@ -27,9 +36,9 @@ def test_import_annotations():
         [
             "child-project",
             "import-annotations",
-            "examples/valid_raw_data",
+            "output/cli",
             "--annotations",
-            "examples/valid_raw_data/annotations/input.csv",
+            "output/cli/annotations/input.csv",
         ]
     )
     assert exit_code == 0
@@ -39,7 +48,7 @@ def test_compute_durations():
         [
             "child-project",
             "compute-durations",
-            "examples/valid_raw_data"
+            "output/cli"
         ]
     )
     assert exit_code == 0
@@ -49,7 +58,7 @@ def test_explain():
         [
             "child-project",
             "explain",
-            "examples/valid_raw_data",
+            "output/cli",
             "notes"
         ]
     )
@@ -59,7 +68,7 @@ def test_explain():
         [
             "child-project",
             "explain",
-            "examples/valid_raw_data",
+            "output/cli",
             "non-existent-variable"
         ]
     )
@@ -1,5 +1,7 @@
 from ChildProject.projects import ChildProject
+import os
 import pandas as pd
+import shutil
 
 
 def standardize_dataframe(df, columns):
@@ -8,7 +10,10 @@ def standardize_dataframe(df, columns):
 
 
 def test_read():
-    project = ChildProject("examples/valid_raw_data")
+    if not os.path.exists("output/documentation"):
+        shutil.copytree(src="examples/valid_raw_data", dst="output/documentation")
+
+    project = ChildProject("output/documentation")
     project.read()
 
     doc = project.read_documentation()
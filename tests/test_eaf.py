@@ -1,5 +1,6 @@
 import os
 import pandas as pd
+import shutil
 from pympi import Eaf
 
 from ChildProject.projects import ChildProject
@@ -9,7 +10,10 @@ from ChildProject.pipelines.eafbuilder import EafBuilderPipeline
 def test_periodic():
     os.makedirs('output/eaf', exist_ok = True)
 
-    project = ChildProject('examples/valid_raw_data')
+    if not os.path.exists('output/eaf/dataset'):
+        shutil.copytree(src = 'examples/valid_raw_data', dst = 'output/eaf/dataset')
+
+    project = ChildProject('output/eaf/dataset')
     project.read()
 
     sampler = PeriodicSampler(project, 500, 500, 250, recordings = ['sound.wav'])
@@ -0,0 +1,122 @@
+import numpy as np
+import pandas as pd
+
+from ChildProject.intervals import IntervalIndex
+
+
+def test_interval_index():
+    rng = np.random.default_rng(0)
+    onsets = rng.integers(0, 10000, 500)
+    df = pd.DataFrame(
+        {
+            "recording_filename": rng.choice(["a.wav", "b.wav"], 500),
+            "set": rng.choice(["x", "y", "z"], 500),
+            "range_onset": onsets,
+            "range_offset": onsets + rng.integers(0, 2000, 500),
+        }
+    )
+
+    index = IntervalIndex(df, ["recording_filename", "set"])
+    assert sorted(index.keys()) == sorted(
+        df.groupby(["recording_filename", "set"]).groups.keys()
+    )
+
+    for onset, offset in rng.integers(0, 12000, (50, 2)):
+        onset, offset = min(onset, offset), max(onset, offset)
+        for key in index.keys():
+            group = df[(df["recording_filename"] == key[0]) & (df["set"] == key[1])]
+            truth = group[
+                (group["range_onset"] < offset) & (group["range_offset"] > onset)
+            ]
+
+            matches = df.iloc[index.overlapping(key, onset, offset)]
+            assert sorted(matches.index) == sorted(truth.index)
+            assert matches["range_onset"].is_monotonic_increasing
+
+    assert len(index.overlapping(("c.wav", "x"), 0, 10000)) == 0
+    assert len(IntervalIndex(df.head(0), ["set"]).overlapping("x", 0, 10)) == 0
+
+
+def test_interval_set():
+    from ChildProject.intervals import IntervalSet
+    from ChildProject.utils import Segment, intersect_ranges
+
+    a = IntervalSet([2000, 0, 2500], [3000, 1000, 2600])
+    b = IntervalSet([500, 2900], [2550, 4000])
+
+    assert a == IntervalSet([0, 2000, 2500], [1000, 3000, 2600])
+    assert a.intersection(b) == IntervalSet(
+        [500, 2000, 2500, 2900], [1000, 2550, 2550, 3000]
+    )
+    assert a.union(b) == IntervalSet([0], [4000])
+    assert a.difference(b) == IntervalSet([0, 2550, 2550], [500, 2600, 2900])
+    assert b.difference(a) == IntervalSet([1000, 3000], [2000, 4000])
+    assert a.clip(500, 2550) == IntervalSet([500, 2000, 2500], [1000, 2550, 2550])
+    assert a.coalesce() == IntervalSet([0, 2000], [1000, 3000])
+    assert a.length() == 2000 and b.length() == 3150
+    assert IntervalSet([0, 5], [5, 10]).coalesce() == IntervalSet([0], [10])
+    assert len(a.intersection(IntervalSet())) == 0
+
+    # compatibility with the former generator-based implementation
+    xs = iter([Segment(0, 5), Segment(5, 10)])
+    ys = iter([Segment(3, 7)])
+    assert [(s.start, s.stop) for s in intersect_ranges(xs, ys)] == [(3, 5), (5, 7)]
+
+    # overlapping segments within one input yield every pairwise intersection
+    xs = [Segment(0, 4), Segment(2, 6)]
+    ys = [Segment(3, 5), Segment(5, 8)]
+    assert [(s.start, s.stop) for s in intersect_ranges(xs, ys)] == [
+        (3, 4),
+        (3, 5),
+        (5, 6),
+    ]
+    union = IntervalSet.from_segments(xs).coalesce()
+    assert list(union.intersection(IntervalSet.from_segments(ys))) == [(3, 5), (5, 6)]
+
+
+def test_interval_set_random():
+    from ChildProject.intervals import IntervalSet
+
+    rng = np.random.default_rng(1)
+
+    def random_set(n):
+        starts = rng.integers(0, 1000, n)
+        return IntervalSet(starts, starts + rng.integers(0, 50, n))
+
+    def coverage(s):
+        covered = np.zeros(1100, dtype=bool)
+        for start, stop in s:
+            covered[start:stop] = True
+        return covered
+
+    for _ in range(20):
+        a, b = random_set(30), random_set(30)
+
+        assert np.array_equal(coverage(a.union(b)), coverage(a) | coverage(b))
+        assert np.array_equal(coverage(a.intersection(b)), coverage(a) & coverage(b))
+        assert np.array_equal(coverage(a.difference(b)), coverage(a) & ~coverage(b))
+        assert a.union(b).is_coalesced()
+        assert a.length() == coverage(a).sum()
+
+
+def test_keyed_intersection():
+    from functools import reduce
+    from ChildProject.intervals import IntervalSet, keyed_intersection
+
+    rng = np.random.default_rng(2)
+
+    sets = []
+    for _ in range(4):
+        keys = rng.integers(0, 5, 100)
+        starts = rng.integers(0, 1000, 100)
+        sets.append((keys, starts, starts + rng.integers(0, 100, 100)))
+
+    keys, starts, stops = keyed_intersection(sets)
+    assert np.all(np.diff(keys) >= 0)
+
+    for key in range(5):
+        expected = reduce(
+            IntervalSet.intersection,
+            [IntervalSet(s[k == key], e[k == key]) for k, s, e in sets],
+        )
+        assert IntervalSet(starts[keys == key], stops[keys == key]) == expected
@@ -0,0 +1,121 @@
+import multiprocessing as mp
+import os
+import shutil
+
+import pandas as pd
+import pytest
+
+from ChildProject.projects import ChildProject
+from ChildProject.annotations import AnnotationManager
+from ChildProject.locks import LockManager, lock_file
+
+PATH = "output/locks"
+IMPORTERS = 4
+IMPORTS = 5
+
+
+@pytest.fixture(scope="function")
+def project(request):
+    shutil.rmtree(PATH, ignore_errors=True)
+    shutil.copytree(src="examples/valid_raw_data", dst=PATH)
+
+    for i in range(2):
+        shutil.copytree(
+            os.path.join(PATH, "annotations/vtc_rttm/raw"),
+            os.path.join(PATH, "annotations/vtc_{}/raw".format(i)),
+        )
+
+    yield ChildProject(PATH)
+
+
+def importer(i: int):
+    am = AnnotationManager(ChildProject(PATH))
+
+    for k in range(IMPORTS):
+        onset = 1980000 + (i * IMPORTS + k) * 100
+        am.import_annotations(
+            pd.DataFrame(
+                [
+                    {
+                        "set": "vtc_{}".format(i % 2),
+                        "recording_filename": "sound.wav",
+                        "time_seek": 0,
+                        "raw_filename": "example.rttm",
+                        "range_onset": onset,
+                        "range_offset": onset + 100,
+                        "format": "vtc_rttm",
+                    }
+                ]
+            ),
+            threads=1,
+            journal=i >= IMPORTERS // 2,
+        )
+
+
+def test_concurrent_imports(project):
+    processes = [mp.Process(target=importer, args=(i,)) for i in range(IMPORTERS)]
+
+    for process in processes:
+        process.start()
+
+    for process in processes:
+        process.join()
+        assert process.exitcode == 0
+
+    am = AnnotationManager(project)
+    assert len(am.errors) == 0
+
+    imported = am.annotations[am.annotations["set"].isin(["vtc_0", "vtc_1"])]
+    assert len(imported) == IMPORTERS * IMPORTS
+    assert imported["annotation_filename"].is_unique
+
+    for annotation in imported.to_dict(orient="records"):
+        assert am.converted_exists(annotation["set"], annotation["annotation_filename"])
+
+
+def test_stale_writer(project):
+    input_annotations = pd.read_csv(os.path.join(PATH, "annotations/input.csv"))
+
+    am = AnnotationManager(project)
+    am.import_annotations(input_annotations[input_annotations["set"] == "vtc_rttm"])
+
+    stale = AnnotationManager(project)
+
+    other = AnnotationManager(project)
+    other.import_annotations(
+        input_annotations[input_annotations["set"] == "alice"], journal=True
+    )
+    other.compact_index()
+
+    # the index was rewritten since stale read it
+    with pytest.raises(RuntimeError):
+        stale.write()
+
+    index = pd.read_csv(os.path.join(PATH, "metadata/annotations.csv"))
+    assert {"vtc_rttm", "alice"} <= set(index["set"])
+
+    stale.read()
+    stale.write()
+    index = pd.read_csv(os.path.join(PATH, "metadata/annotations.csv"))
+    assert {"vtc_rttm", "alice"} <= set(index["set"])
+
+
+def test_lock_manager(project):
+    locks = LockManager(PATH)
+
+    with locks.index():
+        # locks are reentrant
+        with locks.index(shared=True):
+            pass
+
+    with locks.index(shared=True):
+        with pytest.raises(RuntimeError):
+            with locks.index():
+                pass
+
+    with locks.sets(shared=["vtc_0", "a/b"], exclusive=["vtc_1"]):
+        assert os.path.exists(locks.lock_path("set-a%2Fb"))
+        assert os.path.exists(os.path.join(PATH, ".childproject/.gitignore"))
+
+    with lock_file(os.path.join(PATH, ".childproject/locks/annotations.lock")):
+        pass
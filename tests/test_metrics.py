@@ -1,19 +1,47 @@
 from functools import partial
+import json
 import numpy as np
 import os
 import pandas as pd
 import pytest
 import shutil
 
+from ChildProject import cache
 from ChildProject.projects import ChildProject
 from ChildProject.annotations import AnnotationManager
-from ChildProject.pipelines.metrics import LenaMetrics, AclewMetrics, PeriodMetrics
+from ChildProject.pipelines.metrics import (
+    Metrics,
+    LenaMetrics,
+    AclewMetrics,
+    PeriodMetrics,
+    MetricsPipeline,
+    pipelines,
+)
 
 
 def fake_vocs(data, filename):
     return data
 
 
+def import_set(am, annotation_set, recording, data):
+    am.import_annotations(
+        pd.DataFrame(
+            [
+                {
+                    "set": annotation_set,
+                    "raw_filename": "file.rttm",
+                    "time_seek": 0,
+                    "recording_filename": recording,
+                    "range_onset": 0,
+                    "range_offset": 4000,
+                    "format": "rttm",
+                }
+            ]
+        ),
+        import_function=partial(fake_vocs, data.copy()),
+    )
+
+
 @pytest.fixture(scope="function")
 def project(request):
     if not os.path.exists("output/metrics"):
@@ -78,6 +106,80 @@ def test_aclew(project):
 
     pd.testing.assert_frame_equal(aclew.metrics, truth)
 
+    aclew = AclewMetrics(project, by="child_id", engine="grouped")
+    aclew.extract()
+
+    pd.testing.assert_frame_equal(aclew.metrics, truth)
+
+    # units without annotations and extra columns
+    options = dict(rec_cols="date_iso,start_time", child_cols="child_dob")
+    unit = AclewMetrics(project, **options).extract()
+    grouped = AclewMetrics(project, engine="grouped", **options).extract()
+
+    pd.testing.assert_frame_equal(unit, grouped)
+
+
+def test_lena(project):
+    # other keys and values may contain "start" as well
+    cry = {"start": 0.1, "end": 0.2, "startClock": "PT0.10S"}
+    data = pd.DataFrame(
+        {
+            "segment_onset": [0, 1000, 2000, 3000],
+            "segment_offset": [1000, 2000, 3000, 3500],
+            "speaker_type": ["CHI", "CHI", "FEM", "NA"],
+            "lena_speaker": ["CHN", "CHN", "FAN", "OLN"],
+            "words": [0, 0, 3, 0],
+            "utterances_count": [2, 1, 1, 0],
+            "utterances_length": [800, 500, 1000, 0],
+            "child_cry_vfx_len": [200, 400, 0, 0],
+            "cries": [[cry], [], [], []],
+            "vfxs": [[], [cry, cry], [], []],
+            "cries_count": [1, 0, 0, 0],
+            "vfxs_count": [0, 2, 0, 0],
+        }
+    )
+
+    am = AnnotationManager(project)
+    for annotation_set, segments in [
+        ("its", data),
+        # converted before the counts were stored
+        ("its_legacy", data.drop(columns=["cries_count", "vfxs_count"])),
+    ]:
+        am.import_annotations(
+            pd.DataFrame(
+                [
+                    {
+                        "set": annotation_set,
+                        "raw_filename": "file.its",
+                        "time_seek": 0,
+                        "recording_filename": "sound.wav",
+                        "range_onset": 0,
+                        "range_offset": 4000,
+                        "format": "its",
+                    }
+                ]
+            ),
+            import_function=partial(fake_vocs, segments),
+        )
+
+    metrics = {
+        (annotation_set, engine): LenaMetrics(
+            project, set=annotation_set, types=["OLN"], engine=engine
+        ).extract()
+        for annotation_set in ["its", "its_legacy"]
+        for engine in ["unit", "grouped"]
+    }
+
+    grouped = metrics[("its", "grouped")]
+    for result in metrics.values():
+        pd.testing.assert_frame_equal(result, grouped)
+
+    assert grouped.loc["sound.wav", "lp_n"] == pytest.approx(3 / (3 + 1 + 2))
+    assert grouped.loc["sound.wav", "lp_dur"] == pytest.approx(1300 / (600 + 1300))
+    assert grouped.loc["sound.wav", "voc_oln_ph"] == pytest.approx(900)
+    assert grouped.loc["sound.wav", "wc_adu_ph"] == pytest.approx(2700)
+    assert pd.isnull(grouped.loc["sound2.wav", "lp_n"])
+
 
 def test_period(project):
     am = AnnotationManager(project)
@@ -116,10 +218,210 @@ def test_period(project):
         import_function=partial(fake_vocs, data),
     )
 
-    period = PeriodMetrics(project, by="child_id", period="2H", set="test")
+    truth = pd.read_csv("tests/truth/period_metrics.csv", index_col=["child_id"])
+
+    for engine in ["unit", "grouped"]:
+        period = PeriodMetrics(
+            project, by="child_id", period="2H", set="test", engine=engine
+        )
+        period.extract()
+
+        pd.testing.assert_frame_equal(period.metrics, truth)
+
+
+def test_period_gaps(project):
+    am = AnnotationManager(project)
+
+    # the dataset persists across runs
+    if "gaps" in am.annotations["set"].values:
+        am.remove_set("gaps")
+
+    data = pd.DataFrame(
+        {
+            "segment_onset": [0, 3600000],
+            "segment_offset": [1000, 3601000],
+            "speaker_type": ["FEM", "CHI"],
+        }
+    )
+
+    # two portions of the recording, one hour apart
+    for onset in [0, 3600000]:
+        am.import_annotations(
+            pd.DataFrame(
+                [
+                    {
+                        "set": "gaps",
+                        "raw_filename": "file.rttm",
+                        "time_seek": 0,
+                        "recording_filename": "sound.wav",
+                        "range_onset": onset,
+                        "range_offset": onset + 1800000,
+                        "format": "rttm",
+                    }
+                ]
+            ),
+            import_function=partial(fake_vocs, data.copy()),
+        )
+
+    period = PeriodMetrics(project, period="1H", set="gaps")
     period.extract()
 
-    truth = pd.read_csv("tests/truth/period_metrics.csv", index_col=["child_id"])
+    metrics = period.metrics.set_index("period")
+    assert metrics.loc["09:00:00", "duration"] == 1800000 - 1
+    assert metrics.loc["10:00:00", "duration"] == 1800000 - 1
+    assert metrics["duration"].sum() == 2 * (1800000 - 1)
+    assert metrics.loc["09:00:00", "voc_fem_ph"] == pytest.approx(2, rel=1e-4)
+    assert metrics.loc["10:00:00", "voc_chi_ph"] == pytest.approx(2, rel=1e-4)
+
+
+
+def test_metrics_cache(project):
+    am = AnnotationManager(project)
+    data = pd.read_csv("tests/data/aclew.csv")
+
+    # start from scratch, as the dataset persists across runs
+    for annotation_set in ["cache_vtc", "cache_alice", "cache_vcm"]:
+        if annotation_set in am.annotations["set"].values:
+            am.remove_set(annotation_set)
+    cache.clear(project.path)
+
+    for annotation_set in ["cache_vtc", "cache_alice", "cache_vcm"]:
+        import_set(am, annotation_set, "sound.wav", data)
+
+    pipelines = [
+        partial(
+            AclewMetrics,
+            vtc="cache_vtc",
+            alice="cache_alice",
+            vcm="cache_vcm",
+            rec_cols="date_iso",
+        ),
+        partial(PeriodMetrics, set="cache_vtc", period="1H"),
+    ]
+
+    def extract(pipeline, engine, use_cache=True):
+        metrics = pipeline(project, engine=engine)
+        metrics.use_cache = use_cache
+        return metrics.extract(), metrics.cache_hits
+
+    for pipeline in pipelines:
+        for engine in ["unit", "grouped"]:
+            first, hits = extract(pipeline, engine)
+            assert hits == 0
+
+            # runs without misses do not write to the dataset
+            stats = cache.cache_path(project.path, cache.STATS_FILE)
+            mtime = os.path.getmtime(stats)
+            second, hits = extract(pipeline, engine)
+            assert hits == 2
+            assert os.path.getmtime(stats) == mtime
+            pd.testing.assert_frame_equal(first, second)
+
+    # only the metrics of sound2.wav depend on its new annotation
+    import_set(am, "cache_vtc", "sound2.wav", data)
+
+    for pipeline in pipelines:
+        for engine in ["unit", "grouped"]:
+            metrics, hits = extract(pipeline, engine)
+            assert hits == 1
+
+            pd.testing.assert_frame_equal(
+                metrics, extract(pipeline, engine, use_cache=False)[0]
+            )
+
+
+def test_custom_metrics(project):
+    # subclasses that do not declare their sets are computed without the cache
+    class CustomMetrics(Metrics):
+        SUBCOMMAND = "test-custom"
+
+        def _process_unit(self, unit):
+            annotations = self.am.annotations[self.am.annotations[self.by] == unit]
+            return {self.by: unit, "annotations": len(annotations)}
+
+    try:
+        metrics = CustomMetrics(project)
+        assert len(metrics.extract()) == len(project.recordings)
+        assert metrics.cache_hits == 0
+
+        # engines must be declared, and implemented
+        with pytest.raises(ValueError):
+            CustomMetrics(project, engine="grouped")
+    finally:
+        pipelines.pop("test-custom")
+
+    with pytest.raises(TypeError):
+
+        class GroupedMetrics(CustomMetrics):
+            SUBCOMMAND = "test-grouped"
+            ENGINES = ["unit", "grouped"]
+
+    assert "test-grouped" not in pipelines
+
+
+def test_metrics_update(project, capsys):
+    am = AnnotationManager(project)
+    data = pd.read_csv("tests/data/aclew.csv")
+
+    for annotation_set in ["update_vtc", "update_alice", "update_vcm"]:
+        import_set(am, annotation_set, "sound.wav", data)
+
+    runs = [
+        ("aclew", dict(vtc="update_vtc", alice="update_alice", vcm="update_vcm")),
+        ("period", dict(set="update_vtc", period="1H")),
+    ]
+
+    def run(pipeline, options, destination, update=None):
+        capsys.readouterr()
+        MetricsPipeline().run(
+            project.path, destination, pipeline, update=update, **options
+        )
+        return capsys.readouterr().out
+
+    for pipeline, options in runs:
+        destination = "output/metrics_update_{}.csv".format(pipeline)
+        run(pipeline, options, destination)
+        assert os.path.exists(destination + ".fingerprints.json")
+
+        with open(destination, "r") as f:
+            original = f.read()
+
+        out = run(pipeline, options, destination, update=destination)
+        assert "0 unit(s) out of 2 with new or changed" in out
+
+        with open(destination, "r") as f:
+            assert f.read() == original
+
+    import_set(am, "update_vtc", "sound2.wav", data)
+
+    for pipeline, options in runs:
+        destination = "output/metrics_update_{}.csv".format(pipeline)
+        out = run(pipeline, options, destination, update=destination)
+        assert "1 unit(s) out of 2 with new or changed" in out
+
+        # child_id is written as a float in the first run, as sound2.wav had none
+        run(pipeline, options, "output/metrics_update_all.csv")
+        pd.testing.assert_frame_equal(
+            pd.read_csv(destination),
+            pd.read_csv("output/metrics_update_all.csv"),
+            check_dtype=False,
+        )
+
+    # units that are no longer selected are dropped
+    pd.DataFrame({"recording_filename": ["sound.wav"]}).to_csv(
+        "output/metrics_update_recordings.csv", index=False
+    )
 
-    pd.testing.assert_frame_equal(period.metrics, truth)
+    for pipeline, options in runs:
+        destination = "output/metrics_update_{}.csv".format(pipeline)
+        out = run(
+            pipeline,
+            dict(options, recordings="output/metrics_update_recordings.csv"),
+            destination,
+            update=destination,
+        )
+        assert "0 unit(s) out of 1 with new or changed" in out
+        assert set(pd.read_csv(destination)["recording_filename"]) == {"sound.wav"}
 
+        with open(destination + ".fingerprints.json", "r") as f:
+            assert list(json.load(f)["units"]) == ["sound.wav"]
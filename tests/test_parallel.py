@@ -0,0 +1,45 @@
+import pytest
+
+from ChildProject.parallel import Executor, TaskError, report_errors
+
+
+class Target:
+    def __init__(self, factor):
+        self.factor = factor
+
+    def scale(self, offset, x):
+        if x < 0:
+            raise ValueError("negative value")
+
+        return self.factor * x + offset
+
+
+@pytest.mark.parametrize("backend", ["serial", "thread", "process"])
+def test_executor(backend, capsys):
+    tasks = list(range(50))
+
+    with Executor(3, backend, chunksize=4, target=Target(2)) as executor:
+        assert executor.map("scale", tasks, 1) == [2 * x + 1 for x in tasks]
+
+        results = executor.map("scale", [1, -1, 2], 0, capture_errors=True)
+        assert results[0] == 2 and results[2] == 4
+        assert isinstance(results[1], TaskError)
+        assert str(results[1]) == "ValueError: negative value"
+
+        assert report_errors(results, lambda x: "task {}".format(x)) == [2, 4]
+        assert "processing task -1" in capsys.readouterr().err
+
+        with pytest.raises(ValueError):
+            executor.map("scale", [1, -1], 0)
+
+
+def test_executor_defaults():
+    assert Executor(1).backend == "serial"
+    assert Executor(2).backend == "process"
+    assert Executor(0).threads >= 1
+
+    with pytest.raises(ValueError):
+        Executor(2, "gpu")
+
+    with pytest.raises(RuntimeError):
+        Executor(2, "thread").map(abs, [1])
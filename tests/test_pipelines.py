@@ -1,3 +1,6 @@
+import os
+import shutil
+
 from ChildProject.projects import ChildProject
 from ChildProject.pipelines.pipeline import Pipeline
 
@@ -5,7 +8,10 @@ import pandas as pd
 
 
 def test_whitelist():
-    project = ChildProject("examples/valid_raw_data")
+    if not os.path.exists("output/pipelines"):
+        shutil.copytree(src="examples/valid_raw_data", dst="output/pipelines")
+
+    project = ChildProject("output/pipelines")
     project.read()
 
     recordings = project.get_recordings_from_list(
@@ -49,8 +55,8 @@ def test_whitelist():
     recordings = project.get_recordings_from_list(
         Pipeline.recordings_from_list(
             [
-                "examples/valid_raw_data/recordings/raw/sound.wav",
-                "examples/valid_raw_data/recordings/raw/sound2.wav",
+                "output/pipelines/recordings/raw/sound.wav",
+                "output/pipelines/recordings/raw/sound2.wav",
             ]
         )
     )
@@ -1,23 +1,36 @@
 from ChildProject.projects import ChildProject
+from ChildProject import cache
+import glob
+import os
 import pandas as pd
+import pytest
+import shutil
 
 
-def test_enforce_dtypes():
-    project = ChildProject("examples/valid_raw_data", enforce_dtypes=True)
+@pytest.fixture(scope="function")
+def path(request):
+    if not os.path.exists("output/projects"):
+        shutil.copytree(src="examples/valid_raw_data", dst="output/projects")
+
+    yield "output/projects"
+
+
+def test_enforce_dtypes(path):
+    project = ChildProject(path, enforce_dtypes=True)
     project.read()
 
     assert project.recordings["child_id"].dtype.kind == "O"
     assert project.children["child_id"].dtype.kind == "O"
 
-    project = ChildProject("examples/valid_raw_data", enforce_dtypes=False)
+    project = ChildProject(path, enforce_dtypes=False)
     project.read()
 
     assert project.recordings["child_id"].dtype.kind == "i"
     assert project.children["child_id"].dtype.kind == "i"
 
 
-def test_compute_ages():
-    project = ChildProject("examples/valid_raw_data")
+def test_compute_ages(path):
+    project = ChildProject(path)
     project.read()
 
     project.recordings["age"] = project.compute_ages()
@@ -28,3 +41,71 @@ def test_compute_ages():
         project.recordings[["child_id", "age"]], truth[["child_id", "age"]]
     )
 
+
+
+def test_metadata_cache():
+    shutil.rmtree("output/cache", ignore_errors=True)
+    shutil.copytree(
+        src="examples/valid_raw_data",
+        dst="output/cache",
+        ignore=shutil.ignore_patterns(".childproject"),
+    )
+
+    project = ChildProject("output/cache")
+    project.read()
+    assert cache.read_stats(project.path)["metadata"] == {"hits": 0, "misses": 1}
+
+    # hits do not modify the dataset
+    mtime = os.path.getmtime(cache.cache_path(project.path, cache.STATS_FILE))
+    cached = ChildProject("output/cache")
+    cached.read()
+    assert cache.read_stats(project.path)["metadata"] == {"hits": 1, "misses": 1}
+    assert os.path.getmtime(cache.cache_path(project.path, "stats.json")) == mtime
+    assert os.path.exists("output/cache/.childproject/.gitignore")
+
+    pd.testing.assert_frame_equal(project.children, cached.children)
+    pd.testing.assert_frame_equal(project.recordings, cached.recordings)
+
+    # changes to the metadata invalidate the cache
+    recordings = pd.read_csv("output/cache/metadata/recordings.csv")
+    recordings["cache_test"] = "updated"
+    recordings.to_csv("output/cache/metadata/recordings.csv", index=False)
+
+    cached = ChildProject("output/cache")
+    cached.read()
+    assert cache.read_stats(project.path)["metadata"] == {"hits": 1, "misses": 2}
+    assert (cached.recordings["cache_test"] == "updated").all()
+    assert len(glob.glob(cache.cache_path(project.path, "metadata-*.pkl"))) == 1
+
+    # and so do the read options
+    cached = ChildProject("output/cache", enforce_dtypes=True)
+    cached.read()
+    assert cached.recordings["child_id"].dtype.kind == "O"
+
+    ChildProject.use_cache = False
+    try:
+        cached = ChildProject("output/cache")
+        cached.read()
+        assert cache.read_stats(project.path)["metadata"]["hits"] == 1
+    finally:
+        ChildProject.use_cache = True
+
+
+@pytest.mark.skipif(
+    hasattr(os, "geteuid") and os.geteuid() == 0, reason="root can write anywhere"
+)
+def test_read_only_cache():
+    shutil.rmtree("output/read_only", ignore_errors=True)
+    shutil.copytree(
+        src="examples/valid_raw_data",
+        dst="output/read_only",
+        ignore=shutil.ignore_patterns(".childproject"),
+    )
+
+    os.chmod("output/read_only", 0o555)
+    try:
+        project = ChildProject("output/read_only")
+        project.read()
+        assert not os.path.exists("output/read_only/.childproject")
+    finally:
+        os.chmod("output/read_only", 0o755)
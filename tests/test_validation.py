@@ -1,4 +1,9 @@
 from ChildProject.projects import ChildProject
+from ChildProject.tables import IndexColumn, IndexTable, is_boolean
+import datetime
+import numpy as np
+import os
+import re
 
 
 def test_valid_project():
@@ -30,3 +35,171 @@ def test_invalid_project():
         warnings
     ), "warnings do not match expected warnings"
 
+
+
+def row_wise_validate(table: IndexTable):
+    """IndexTable.validate as implemented before the column-wise checks"""
+    errors, warnings = [], []
+
+    columns = {c.name: c for c in table.columns}
+
+    for rc in table.columns:
+        if not rc.required:
+            continue
+
+        if rc.name not in table.df.columns:
+            errors.append(
+                table.msg("{} table is missing column '{}'".format(table.name, rc.name))
+            )
+            continue
+
+        null = table.df[table.df[rc.name].isnull()].index.values.tolist()
+        if len(null) > 0:
+            errors.append(
+                table.msg(
+                    """{} table has undefined values
+                    for column '{}' in lines: {}""".format(
+                        table.name, rc.name, ",".join([str(n) for n in null])
+                    )
+                )
+            )
+
+    unknown_columns = [c for c in table.df.columns if c not in columns.keys()]
+
+    if len(unknown_columns) > 0:
+        warnings.append(
+            table.msg(
+                "unknown column{} '{}' in {}, exepected columns are: {}".format(
+                    "s" if len(unknown_columns) > 1 else "",
+                    ",".join(unknown_columns),
+                    table.name,
+                    ",".join(columns.keys()),
+                )
+            )
+        )
+
+    rows = table.df.to_dict(orient="index")
+    for line_number in rows:
+        row = rows[line_number]
+        for column_name in row.keys():
+            column_attr = columns.get(column_name)
+
+            if column_attr is None:
+                continue
+
+            message = None
+            if callable(column_attr.function):
+                try:
+                    ok = column_attr.function(str(row[column_name])) == True
+                except:
+                    ok = False
+
+                if not ok:
+                    message = "'{}' does not pass callable test for column '{}' on line {}".format(
+                        row[column_name], column_name, line_number
+                    )
+            elif (
+                column_attr.choices and str(row[column_name]) not in column_attr.choices
+            ):
+                message = "'{}' is not a permitted value for column '{}' on line {}, should be any of [{}]".format(
+                    row[column_name],
+                    column_name,
+                    line_number,
+                    ",".join(column_attr.choices),
+                )
+            elif column_attr.datetime:
+                try:
+                    datetime.datetime.strptime(row[column_name], column_attr.datetime)
+                except:
+                    message = "'{}' is not a proper date/time for column '{}' (expected {}) on line {}".format(
+                        row[column_name],
+                        column_name,
+                        column_attr.datetime,
+                        line_number,
+                    )
+            elif column_attr.regex:
+                if not re.fullmatch(column_attr.regex, str(row[column_name])):
+                    message = "'{}' does not match the format required for '{}' on line {}, expected '{}'".format(
+                        row[column_name], column_name, line_number, column_attr.regex
+                    )
+
+            if message is None:
+                continue
+
+            if column_attr.required and str(row[column_name]) != "NA":
+                errors.append(table.msg(message))
+            elif column_attr.required or str(row[column_name]) != "NA":
+                warnings.append(table.msg(message))
+
+    for c in table.columns:
+        if not c.unique:
+            continue
+
+        grouped = table.df[table.df[c.name] != "NA"]
+        grouped = grouped.assign(lineno=grouped.index)
+        grouped = (
+            grouped.groupby(c.name)["lineno"]
+            .agg(
+                [
+                    ("count", len),
+                    (
+                        "lines",
+                        lambda lines: ",".join([str(line) for line in sorted(lines)]),
+                    ),
+                    ("first", np.min),
+                ]
+            )
+            .sort_values("first")
+        )
+
+        duplicates = grouped[grouped["count"] > 1]
+        for col, row in duplicates.iterrows():
+            errors.append(
+                table.msg(
+                    "{} '{}' appears {} times in lines [{}], should appear once".format(
+                        c.name, col, row["count"], row["lines"]
+                    )
+                )
+            )
+
+    return errors, warnings
+
+
+def test_column_wise_validation():
+    os.makedirs("output/validation", exist_ok=True)
+    path = "output/validation/table.csv"
+
+    with open(path, "w") as f:
+        f.write(
+            "child_id,date,flag,device,time,code,count,duration,extra\n"
+            "1,2020-01-01,1,usb,10:00:00,AB1,3,1.5,x\n"
+            "2,2020-1-2,0,USB,25:00:00,ab1,NA,2,\n"
+            "1,NA,NA,NA,NA,NA,,NULL,y\n"
+            "3,,2,lena,10:00,AB12,n/a,nan,\n"
+            "NA,2020-02-30,yes,,NaN,A,4,3.25,z\n"
+            "4,2020-12-31,,olympus,23:59:59.5,CD9,-1,#N/A,\n"
+            "NA,not a date,1.0,usb,00:00:00,EF10,5.0,4,\n"
+            "4,2021-06-15,0,unknown,12:30:00,GH3,6,-NaN,\n"
+        )
+
+    columns = [
+        IndexColumn(name="child_id", required=True, unique=True),
+        IndexColumn(name="date", required=True, datetime="%Y-%m-%d"),
+        IndexColumn(name="flag", function=is_boolean),
+        IndexColumn(name="device", choices=["lena", "usb", "olympus", "unknown"]),
+        IndexColumn(name="time", datetime="%H:%M:%S"),
+        IndexColumn(name="code", regex=r"[A-Z]{2}[0-9]+"),
+        IndexColumn(name="count", required=True, regex=r"[0-9]+"),
+        IndexColumn(name="duration", function=lambda x: float(x) >= 0),
+        IndexColumn(name="missing", required=True),
+    ]
+
+    table = IndexTable("test", path, columns)
+    table.read()
+
+    errors, warnings = table.validate()
+    expected_errors, expected_warnings = row_wise_validate(table)
+
+    assert len(errors) > 0 and len(warnings) > 0
+    assert errors == expected_errors
+    assert warnings == expected_warnings
@@ -1,5 +1,6 @@
 import os
 import pandas as pd
+import shutil
 
 from ChildProject.projects import ChildProject
 from ChildProject.pipelines.samplers import PeriodicSampler
@@ -20,7 +21,12 @@ def test_padding():
 def test_extraction():
     os.makedirs("output/zooniverse", exist_ok=True)
 
-    project = ChildProject("examples/valid_raw_data")
+    if not os.path.exists("output/zooniverse/dataset"):
+        shutil.copytree(
+            src="examples/valid_raw_data", dst="output/zooniverse/dataset"
+        )
+
+    project = ChildProject("output/zooniverse/dataset")
     project.read()
 
     sampler = PeriodicSampler(project, 500, 500, 250)